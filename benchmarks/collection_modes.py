@@ -0,0 +1,127 @@
+"""
+Compare both collection modes against what was merged and closed in a window
+
+Serves a synthetic project from the local GitLab stub in which some merged
+merge requests and closed issues were long-lived (created well before the
+window) and some saw activity after they were merged or closed (updated
+after the window). Merge requests and issues of a historical window are
+collected in both `GITLAB_COLLECTION_MODE`s. The update filter of the
+default mode misses merge requests updated after the window; the script
+fails if windowed mode returns anything but the merge requests merged in the
+window, or if either mode loses an issue the other finds, and reports
+requests and items transferred per mode:
+
+    python benchmarks/collection_modes.py --merge-requests 2000 --partitions 4
+"""
+
+import os
+import io
+import sys
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gitlab_stub import GitLabStub, generate_project, _iso  # noqa: E402
+
+DAYS = 90
+
+
+def age_items(data, now: datetime, fraction: float, seed: int):
+    """Make some items long-lived and some updated after they were merged or closed"""
+    rng = random.Random(seed)
+    for resource, done in (('merge_requests', 'merged_at'), ('issues', 'closed_at')):
+        for item in data[resource]:
+            if rng.random() < fraction:
+                item['created_at'] = _iso(datetime.fromisoformat(item[done].replace('Z', '+00:00'))
+                                          - timedelta(days=rng.uniform(30, 365)))
+            if rng.random() < fraction:
+                item['updated_at'] = _iso(now - timedelta(seconds=rng.uniform(0, 86400)))
+
+
+async def collect(mode: str, since: datetime, until: datetime, args) -> dict:
+    from src.tools.gitlab_langchain_tools import GitLabLangChainTools
+
+    tools = GitLabLangChainTools(collection_mode=mode, window_partitions=args.partitions, transport=args.transport)
+    try:
+        started = time.perf_counter()
+        mrs, issues = await asyncio.gather(tools.get_merge_requests(tools.project_id, since, until),
+                                           tools.get_issues(tools.project_id, since, until))
+        elapsed = time.perf_counter() - started
+    finally:
+        await tools.aclose()
+    overfetch = tools.get_overfetch_stats()
+    return {
+        'mode': mode,
+        'merge_requests': sorted(mr['iid'] for mr in mrs),
+        'issues': sorted(issue['iid'] for issue in issues),
+        'api_calls': sum(tools.get_api_call_counts().values()),
+        'fetched': sum(stats['fetched'] for stats in overfetch.values()),
+        'seconds': round(elapsed, 3)
+    }
+
+
+async def run_check(args) -> list:
+    now = datetime.now(timezone.utc)
+    data = generate_project(args.merge_requests, days=DAYS, seed=args.seed, now=now)
+    age_items(data, now, args.aged, args.seed)
+    # A historical window: ended well before the post-merge activity
+    since, until = now - timedelta(days=DAYS * 2 // 3), now - timedelta(days=DAYS // 3)
+    bounds = (_iso(since), _iso(until))
+    merged = sorted(mr['iid'] for mr in data['merge_requests']
+                    if mr.get('merged_at') and bounds[0] <= mr['merged_at'] <= bounds[1])
+
+    with GitLabStub(data, latency=args.gitlab_latency) as stub:
+        os.environ.update({
+            'GITLAB_URL': stub.url,
+            'GITLAB_PRIVATE_TOKEN': 'benchmark',
+            'PROJECT_ID': stub.project,
+            'GITLAB_MIRROR_PATH': '',
+            'RUN_REPORT_DIR': ''
+        })
+        results = []
+        for mode in ('updated', 'windowed'):
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+                results.append(await collect(mode, since, until, args))
+    return results, merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--merge-requests', type=int, default=2000)
+    parser.add_argument('--partitions', type=int, default=4, help="merge-date sub-windows in windowed mode")
+    parser.add_argument('--aged', type=float, default=0.2,
+                        help="fraction of items made long-lived, and of items updated after the window")
+    parser.add_argument('--transport', default='async', choices=['async', 'python-gitlab'])
+    parser.add_argument('--gitlab-latency', type=float, default=0.02, help="seconds added to each GitLab response")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help="show the collectors' own output")
+    args = parser.parse_args()
+
+    results, merged = asyncio.run(run_check(args))
+    print(f"{len(merged)} merge requests merged in the window")
+    print(f"{'mode':>9} {'MRs':>6} {'issues':>6} {'API calls':>9} {'fetched':>8} {'seconds':>8}")
+    for result in results:
+        print(f"{result['mode']:>9} {len(result['merge_requests']):>6} {len(result['issues']):>6} "
+              f"{result['api_calls']:>9} {result['fetched']:>8} {result['seconds']:>8.2f}")
+
+    updated, windowed = results
+    if windowed['merge_requests'] != merged:
+        missing = set(merged) - set(windowed['merge_requests'])
+        extra = set(windowed['merge_requests']) - set(merged)
+        sys.exit(f"windowed merge requests differ from those merged: {len(missing)} missing, {len(extra)} extra")
+    if set(updated['merge_requests']) - set(merged):
+        sys.exit("updated mode returned merge requests merged outside the window")
+    if updated['issues'] != windowed['issues']:
+        sys.exit("issues differ between the modes")
+    print(f"windowed mode returns every merge request merged in the window; "
+          f"updated mode misses {len(merged) - len(updated['merge_requests'])} updated after it")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Deterministic fake chat model for offline benchmarks
+
+Answers both categorization prompts (the batch JSON prompt and the
+single-change prompt) after a configurable latency. Categories follow
+keywords in the change text and otherwise a hash of it, so repeated runs
+produce identical notes. Token usage is estimated from characters.
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+_KEYWORDS = [('fix', 'fixes'), ('perf', 'performance'), ('speed', 'performance'), ('doc', 'documentation'),
+             ('remove', 'breaking'), ('add', 'features'), ('support', 'features')]
+_CATEGORIES = ['features', 'fixes', 'performance', 'documentation', 'other']
+
+# Label the single-change prompt expects for each category ID
+_SINGLE_LABELS = {'features': 'Feature', 'fixes': 'Bug Fix', 'breaking': 'Breaking Change',
+                  'performance': 'Performance', 'documentation': 'Documentation', 'other': 'Other'}
+
+
+def fake_category(change: str) -> str:
+    text = change.lower()
+    for keyword, category in _KEYWORDS:
+        if keyword in text[:80]:
+            return category
+    return _CATEGORIES[hashlib.md5(change.encode()).digest()[0] % len(_CATEGORIES)]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that categorizes changes locally after a fixed delay"""
+
+    latency: float = 0.0
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return 'fake-benchmark'
+
+    def _answer(self, messages: List[BaseMessage]) -> AIMessage:
+        self.calls += 1
+        prompt = messages[-1].content
+        if prompt.startswith('Changes (one JSON object per line)'):
+            items = [json.loads(line) for line in prompt.splitlines()[1:] if line.strip()]
+            content = json.dumps({'items': [{'id': item['id'], 'category': fake_category(item['change'])}
+                                            for item in items]})
+        else:
+            content = _SINGLE_LABELS[fake_category(prompt.replace('Categorize this change: ', '', 1))]
+        input_tokens = sum(len(str(message.content)) for message in messages) // 4
+        return AIMessage(content=content, usage_metadata={
+            'input_tokens': input_tokens,
+            'output_tokens': len(content) // 4,
+            'total_tokens': input_tokens + len(content) // 4
+        })
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._answer(messages))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._answer(messages))])
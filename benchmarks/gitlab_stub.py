@@ -0,0 +1,472 @@
+"""
+Synthetic GitLab project data and a local stub of the GitLab REST and GraphQL APIs
+
+`generate_project` builds deterministic merge request, issue, commit and
+milestone payloads shaped like GitLab's. `GitLabStub` serves them from a
+threaded stdlib HTTP server with the endpoints the collectors use
+(offset pagination with X-Total-Pages and Link headers, date filters,
+single-item lookups, synthetic commit diffs, tags and compare, and the
+GraphQL merged merge request and diff stats queries) and an optional per-request latency, so both transports can run without network
+access. `generate_release` builds the history between two tags out of
+merge-commit, squash, fast-forward and cherry-picked changes.
+"""
+
+import json
+import time
+import random
+import hashlib
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import parse_qs, unquote, urlencode, urlsplit
+
+_TITLE_PREFIXES = ['feat: ', 'fix: ', 'perf: ', 'docs: ', '', '', '', '']
+_TITLE_WORDS = ['cache', 'pipeline', 'runner', 'login', 'export', 'search', 'webhook', 'API', 'dashboard',
+                'importer', 'scheduler', 'permissions', 'notifications', 'settings', 'migration', 'build']
+_TITLE_VERBS = ['Add', 'Fix', 'Improve', 'Refactor', 'Speed up', 'Document', 'Remove', 'Support']
+_COMPONENTS = ['auth', 'billing', 'ci', 'editor', 'graphql', 'groups', 'issues', 'mailers', 'packages',
+               'registry', 'repository', 'sidekiq', 'snippets', 'storage', 'ui', 'wiki']
+_LABELS = ['bug', 'feature', 'performance', 'documentation', 'backend', 'frontend', 'security']
+
+_TEMPLATE = """## What does this MR do?
+
+<!-- Briefly describe what this MR is about. -->
+
+{body}
+
+## Screenshots or screen recordings
+
+![screenshot](/uploads/{sha}/screenshot.png)
+
+## How to set up and validate locally
+
+```shell
+bin/rake {word}:verify
+```
+
+## MR acceptance checklist
+
+- [ ] I have evaluated the MR acceptance checklist
+- [x] Tests added
+
+/label ~"{label}"
+"""
+
+
+def _iso(moment: datetime) -> str:
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def _sha(*parts) -> str:
+    return hashlib.sha1(':'.join(map(str, parts)).encode()).hexdigest()
+
+
+def commit_diff(sha: str) -> List[Dict]:
+    """Deterministic synthetic diff of a commit: a few files under a few components"""
+    rng = random.Random(sha)
+    diffs = []
+    for _ in range(rng.choice([1, 1, 2, 3, 5, 8, 20])):
+        path = f"{rng.choice(_COMPONENTS)}/{rng.choice(_TITLE_WORDS).lower()}_{rng.randrange(100)}.rb"
+        added, removed = int(rng.paretovariate(1.2) * 5), int(rng.paretovariate(1.5) * 2)
+        diffs.append({'old_path': path, 'new_path': path, 'new_file': False, 'deleted_file': False,
+                      'diff': f"@@ -1,{removed} +1,{added} @@\n" + '-old\n' * removed + '+new\n' * added})
+    return diffs
+
+
+def generate_project(merge_requests: int = 100, issues: Optional[int] = None, commits: Optional[int] = None,
+                     description_chars: int = 800, days: int = 30, seed: int = 0,
+                     now: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+    """Generate GitLab payloads for one project, spread over the last `days` days"""
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    issues = merge_requests // 2 if issues is None else issues
+    commits = merge_requests * 2 if commits is None else commits
+    users = [f"user{i}" for i in range(max(5, merge_requests // 20))]
+
+    def moment() -> datetime:
+        return now - timedelta(seconds=rng.uniform(60, days * 86400))
+
+    milestones = [{
+        'id': 500 + i, 'iid': i + 1, 'title': f"Release {i + 1}", 'description': '', 'state': 'active',
+        'created_at': _iso(now - timedelta(days=days)), 'updated_at': _iso(moment()), 'due_date': None,
+        'web_url': f"https://gitlab.example.com/group/project/-/milestones/{i + 1}"
+    } for i in range(3)]
+
+    mrs = []
+    for iid in range(1, merge_requests + 1):
+        merged_at = moment()
+        word = rng.choice(_TITLE_WORDS)
+        title = (f"{rng.choice(_TITLE_PREFIXES)}{rng.choice(_TITLE_VERBS)} {word} "
+                 f"{rng.choice(_TITLE_WORDS).lower()} in {rng.choice(_COMPONENTS)} {rng.choice(_COMPONENTS)}")
+        body = ' '.join(rng.choice(_TITLE_WORDS).lower() for _ in range(max(1, description_chars // 8)))
+        label = rng.choice(_LABELS)
+        author = {'username': rng.choice(users)}
+        mrs.append({
+            'id': 10000 + iid, 'iid': iid, 'project_id': 1, 'title': f"{title} #{iid}",
+            'description': _TEMPLATE.format(body=body[:description_chars], sha=_sha('upload', iid),
+                                            word=word.lower(), label=label),
+            'state': 'merged', 'author': author, 'merged_by': {'username': rng.choice(users)},
+            'created_at': _iso(merged_at - timedelta(hours=rng.uniform(1, 72))),
+            'updated_at': _iso(merged_at + timedelta(minutes=1)), 'merged_at': _iso(merged_at),
+            'labels': rng.sample(_LABELS, rng.randint(0, 2)), 'milestone': rng.choice(milestones + [None]),
+            'source_branch': f"{rng.choice(['feature', 'fix', 'chore'])}/{word.lower()}-{iid}",
+            'target_branch': 'main', 'sha': _sha('head', iid), 'merge_commit_sha': _sha('merge', iid),
+            'squash_commit_sha': None, 'web_url': f"https://gitlab.example.com/group/project/-/merge_requests/{iid}"
+        })
+
+    issue_payloads = []
+    for iid in range(1, issues + 1):
+        closed_at = moment()
+        issue_payloads.append({
+            'id': 20000 + iid, 'iid': iid, 'project_id': 1, 'title': f"{rng.choice(_TITLE_WORDS)} is broken #{iid}",
+            'description': 'Steps to reproduce ' * (description_chars // 40), 'state': 'closed',
+            'author': {'username': rng.choice(users)}, 'closed_by': {'username': rng.choice(users)},
+            'assignees': [{'username': rng.choice(users)}],
+            'created_at': _iso(closed_at - timedelta(days=rng.uniform(1, 10))),
+            'updated_at': _iso(closed_at), 'closed_at': _iso(closed_at),
+            'labels': rng.sample(_LABELS, rng.randint(0, 2)), 'milestone': None,
+            'web_url': f"https://gitlab.example.com/group/project/-/issues/{iid}"
+        })
+
+    commit_payloads = []
+    for i in range(commits):
+        committed = moment()
+        mr = mrs[i % len(mrs)] if mrs else None
+        message = f"Change {i}\n\nSee merge request group/project!{mr['iid']}" if mr else f"Change {i}"
+        commit_payloads.append({
+            'id': _sha('commit', i), 'short_id': _sha('commit', i)[:8], 'title': f"Change {i}", 'message': message,
+            'author_name': rng.choice(users), 'author_email': 'dev@example.com',
+            'authored_date': _iso(committed), 'committed_date': _iso(committed),
+            'parent_ids': [_sha('commit', i - 1)] if i else [],
+            'web_url': f"https://gitlab.example.com/group/project/-/commit/{_sha('commit', i)}"
+        })
+
+    return {'merge_requests': mrs, 'issues': issue_payloads, 'repository/commits': commit_payloads,
+            'milestones': milestones}
+
+
+def _commit(sha: str, parents: List[str], message: str, committed: datetime, author: str) -> Dict:
+    return {
+        'id': sha, 'short_id': sha[:8], 'title': message.splitlines()[0], 'message': message,
+        'author_name': author, 'author_email': 'dev@example.com',
+        'authored_date': _iso(committed), 'committed_date': _iso(committed), 'parent_ids': parents,
+        'web_url': f"https://gitlab.example.com/group/project/-/commit/{sha}"
+    }
+
+
+def _tag(name: str, commit: Dict) -> Dict:
+    return {'name': name, 'target': commit['id'], 'message': '', 'commit': commit}
+
+
+def generate_release(merges: int = 20, squashes: int = 20, fast_forwards: int = 20, cherry_picks: int = 5,
+                     late_updates: int = 3, seed: int = 0, now: Optional[datetime] = None):
+    """Generate the history of one release between tags v1.0.0 and v1.1.0
+
+    Merge-commit merge requests land a side branch through a merge commit
+    naming the merge request; squash merge requests land one squash commit;
+    fast-forward merge requests land their branch commits directly;
+    cherry-picks are pushed straight to the mainline without a merge request.
+    `late_updates` squash merge requests saw activity well after the release.
+    Returns the payloads and the expected {commit SHA: merge request iid or
+    None} attribution of every commit in the range.
+    """
+    rng = random.Random(seed)
+    now = now or datetime.now(timezone.utc)
+    users = [f"user{i}" for i in range(5)]
+    kinds = ['merge'] * merges + ['squash'] * squashes + ['fast_forward'] * fast_forwards + ['cherry_pick'] * cherry_picks
+    rng.shuffle(kinds)
+
+    clock = now - timedelta(days=30)
+    base = _commit(_sha('release', 'base'), [], "Release 1.0.0", clock, users[0])
+    commits, mrs, expected = [base], [], {}
+    head = base['id']
+    late = set(rng.sample([i for i, kind in enumerate(kinds) if kind == 'squash'], min(late_updates, squashes)))
+
+    for i, kind in enumerate(kinds):
+        clock += timedelta(hours=rng.uniform(1, 12))
+        author = rng.choice(users)
+        if kind == 'cherry_pick':
+            picked = _commit(_sha('pick', i), [head], f"Backport fix {i}\n\n(cherry picked from commit "
+                             f"{_sha('stable', i)})", clock, author)
+            commits.append(picked)
+            expected[picked['id']] = None
+            head = picked['id']
+            continue
+
+        iid = len(mrs) + 1
+        mr = {
+            'id': 10000 + iid, 'iid': iid, 'project_id': 1, 'title': f"{kind.replace('_', ' ')} change {i} #{iid}",
+            'description': '', 'state': 'merged', 'author': {'username': author},
+            'merged_by': {'username': rng.choice(users)},
+            'created_at': _iso(clock - timedelta(days=2)), 'merged_at': _iso(clock),
+            'updated_at': _iso(now if i in late else clock + timedelta(minutes=1)),
+            'labels': [], 'milestone': None, 'source_branch': f"change-{i}", 'target_branch': 'main',
+            'merge_commit_sha': None, 'squash_commit_sha': None,
+            'web_url': f"https://gitlab.example.com/group/project/-/merge_requests/{iid}"
+        }
+        if kind == 'merge':
+            parent = head
+            for j in range(rng.randint(1, 3)):
+                branch = _commit(_sha('branch', i, j), [parent], f"Work {i}.{j}", clock - timedelta(hours=1), author)
+                commits.append(branch)
+                expected[branch['id']] = iid
+                parent = branch['id']
+            merge = _commit(_sha('merge', i), [head, parent], f"Merge branch 'change-{i}' into 'main'\n\n"
+                            f"See merge request group/project!{iid}", clock, author)
+            commits.append(merge)
+            expected[merge['id']] = iid
+            mr.update(sha=parent, merge_commit_sha=merge['id'])
+            head = merge['id']
+        elif kind == 'squash':
+            squash = _commit(_sha('squash', i), [head], mr['title'], clock, author)
+            commits.append(squash)
+            expected[squash['id']] = iid
+            mr.update(sha=_sha('head', i), squash_commit_sha=squash['id'])
+            head = squash['id']
+        else:
+            for j in range(rng.randint(1, 3)):
+                landed = _commit(_sha('ff', i, j), [head], f"Step {i}.{j}", clock - timedelta(minutes=3 - j), author)
+                commits.append(landed)
+                expected[landed['id']] = iid
+                head = landed['id']
+            mr.update(sha=head)
+        mrs.append(mr)
+
+    release = _commit(_sha('release', 'head'), [head], "Release 1.1.0", clock + timedelta(hours=1), users[0])
+    commits.append(release)
+    expected[release['id']] = None
+    tags = [_tag('v1.1.0', release), _tag('v1.0.0', base)]
+    return {'merge_requests': mrs, 'repository/commits': commits, 'repository/tags': tags}, expected
+
+
+def _matches(item: Dict, query: Dict[str, List[str]]) -> bool:
+    """Apply GitLab's list filters to one payload"""
+
+    def value(name: str) -> Optional[str]:
+        return query.get(name, [None])[0]
+
+    if value('state') not in (None, 'all') and item.get('state') != value('state'):
+        return False
+    iids = query.get('iids[]') or query.get('iids')
+    if iids and str(item.get('iid')) not in iids:
+        return False
+    bounds = [('updated_after', 'updated_at', 1), ('updated_before', 'updated_at', -1),
+              ('created_after', 'created_at', 1), ('created_before', 'created_at', -1),
+              ('since', 'committed_date', 1), ('until', 'committed_date', -1)]
+    for param, field, direction in bounds:
+        bound = value(param)
+        if bound and field in item:
+            # Generated timestamps share one UTC format, so they compare as strings
+            limit = _iso(datetime.fromisoformat(bound.replace('Z', '+00:00')).astimezone(timezone.utc))
+            if (item[field] < limit and direction > 0) or (item[field] > limit and direction < 0):
+                return False
+    return True
+
+
+def _graphql_node(mr: Dict) -> Dict:
+    """A merge request payload in the shape of a GraphQL merge request node"""
+    return {
+        'iid': str(mr['iid']), 'title': mr['title'], 'description': mr.get('description'),
+        'state': mr.get('state'), 'createdAt': mr.get('created_at'), 'updatedAt': mr.get('updated_at'),
+        'mergedAt': mr.get('merged_at'), 'webUrl': mr.get('web_url'),
+        'sourceBranch': mr.get('source_branch'), 'targetBranch': mr.get('target_branch'),
+        'diffHeadSha': mr.get('sha'), 'mergeCommitSha': mr.get('merge_commit_sha'),
+        'squashCommitSha': mr.get('squash_commit_sha'),
+        'author': mr.get('author'), 'mergeUser': mr.get('merged_by'),
+        'labels': {'nodes': [{'title': label} for label in mr.get('labels') or []]},
+        'milestone': mr.get('milestone')
+    }
+
+
+def _diff_stats_node(mr: Dict) -> Dict:
+    """GraphQL diff stats of a merge request, from the synthetic diff of the commit that landed it"""
+    diffs = commit_diff(mr.get('squash_commit_sha') or mr.get('merge_commit_sha') or mr.get('sha') or str(mr['iid']))
+    files = [{'path': diff['new_path'], 'additions': diff['diff'].count('\n+'), 'deletions': diff['diff'].count('\n-')}
+             for diff in diffs]
+    return {'iid': str(mr['iid']), 'diffStats': files, 'diffStatsSummary': {
+        'additions': sum(file['additions'] for file in files), 'deletions': sum(file['deletions'] for file in files),
+        'fileCount': len(files)}}
+
+
+class GitLabStub:
+    """Threaded stub of the GitLab REST API serving one synthetic project
+
+    `aliases` are further project paths answered with the same data, for
+    runs that span several projects. `commit_merge_requests` maps further
+    commit SHAs to the iid of the merge request containing them (e.g. the
+    earlier commits of a fast-forward merge), for commit MR lookups.
+    """
+
+    def __init__(self, data: Dict[str, List[Dict]], latency: float = 0.0, project: str = 'group/project',
+                 aliases: Sequence[str] = (), commit_merge_requests: Optional[Dict[str, Optional[int]]] = None):
+        self.data = data
+        # Seconds added to every response
+        self.latency = latency
+        self.project = project
+        self._paths = (project, *aliases, '1')
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._by_iid = {resource: {item['iid']: item for item in items if 'iid' in item}
+                        for resource, items in data.items()}
+        # Merge requests by the merge, squash and head SHAs they landed
+        self._by_commit = {mr[field]: mr for mr in data.get('merge_requests', [])
+                           for field in ('sha', 'squash_commit_sha', 'merge_commit_sha') if mr.get(field)}
+        for sha, iid in (commit_merge_requests or {}).items():
+            if iid is not None:
+                self._by_commit.setdefault(sha, self._by_iid['merge_requests'][iid])
+        self._commits = {commit['id']: commit for commit in data.get('repository/commits', [])}
+        self._tags = {tag['name']: tag for tag in data.get('repository/tags', [])}
+        # Filtered lists by query, so paging through a result filters it once
+        self._filtered: Dict[tuple, List[Dict]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> 'GitLabStub':
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                self._respond(*stub.route(parts.path, parse_qs(parts.query), parts))
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if urlsplit(self.path).path.strip('/') != 'api/graphql':
+                    self._respond(404, {'message': '404 Not Found'}, {})
+                else:
+                    self._respond(200, stub.graphql(request.get('query', ''), request.get('variables') or {}), {})
+
+            def _respond(self, status: int, payload, headers: Dict[str, str]):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.latency:
+                    time.sleep(stub.latency)
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def route(self, path: str, query: Dict[str, List[str]], parts):
+        """Answer one GET request, returning (status, payload, headers)"""
+        path = unquote(path).strip('/')
+        prefix = "api/v4/projects/"
+        if not path.startswith(prefix):
+            return 404, {'message': '404 Not Found'}, {}
+        rest = path[len(prefix):]
+        if rest in self._paths:
+            path_with_namespace = self.project if rest == '1' else rest
+            return 200, {'id': 1, 'path_with_namespace': path_with_namespace, 'default_branch': 'main'}, {}
+        for project in self._paths:
+            if rest.startswith(project + '/'):
+                rest = rest[len(project) + 1:]
+                break
+        else:
+            return 404, {'message': '404 Project Not Found'}, {}
+
+        if rest.startswith('repository/commits/') and rest.endswith('/diff'):
+            return 200, commit_diff(rest.split('/')[2]), {}
+        if rest.startswith('repository/commits/') and rest.endswith('/merge_requests'):
+            sha = rest.split('/')[2]
+            mr = self._by_commit.get(sha)
+            return 200, [mr] if mr else [], {}
+        if rest.startswith('repository/tags/'):
+            tag = self._tags.get(rest[len('repository/tags/'):])
+            return (200, tag, {}) if tag else (404, {'message': '404 Tag Not Found'}, {})
+        if rest == 'repository/compare':
+            return self._compare(query.get('from', [''])[0], query.get('to', [''])[0])
+        if rest in self.data:
+            return self._list(rest, query, parts)
+        resource, _, iid = rest.rpartition('/')
+        if resource in self._by_iid and iid.isdigit() and int(iid) in self._by_iid[resource]:
+            return 200, self._by_iid[resource][int(iid)], {}
+        return 404, {'message': '404 Not Found'}, {}
+
+    def graphql(self, query: str, variables: Dict) -> Dict:
+        """Answer the merged merge request query, filtered on merged_at and paged by cursor,
+        and the diff stats query, summarizing each merge request's synthetic commit diff"""
+        if 'mergeRequests' not in query:
+            return {'errors': [{'message': 'Unsupported query'}]}
+        if variables.get('fullPath') not in self._paths[:-1]:
+            return {'data': {'project': None}}
+        if 'diffStatsSummary' in query:
+            mrs = [self._by_iid['merge_requests'][int(iid)] for iid in variables.get('iids') or []
+                   if int(iid) in self._by_iid['merge_requests']]
+            return {'data': {'project': {'mergeRequests': {'nodes': [_diff_stats_node(mr) for mr in mrs]}}}}
+        bounds = [_iso(datetime.fromisoformat(variables[name].replace('Z', '+00:00')).astimezone(timezone.utc))
+                  if variables.get(name) else None for name in ('mergedAfter', 'mergedBefore')]
+        merged = sorted((mr for mr in self.data.get('merge_requests', [])
+                         if mr.get('state') == 'merged' and mr.get('merged_at')
+                         and (bounds[0] is None or mr['merged_at'] >= bounds[0])
+                         and (bounds[1] is None or mr['merged_at'] <= bounds[1])),
+                        key=lambda mr: (mr['merged_at'], mr['iid']))
+        offset = int(variables.get('after') or 0)
+        page = merged[offset:offset + int(variables.get('first') or 100)]
+        end = offset + len(page)
+        return {'data': {'project': {'mergeRequests': {
+            'pageInfo': {'hasNextPage': end < len(merged), 'endCursor': str(end)},
+            'nodes': [_graphql_node(mr) for mr in page]
+        }}}}
+
+    def _resolve(self, ref: str) -> Optional[str]:
+        tag = self._tags.get(ref)
+        return tag['target'] if tag else (ref if ref in self._commits else None)
+
+    def _ancestors(self, sha: str) -> set:
+        seen, pending = set(), [sha]
+        while pending:
+            sha = pending.pop()
+            if sha not in seen and sha in self._commits:
+                seen.add(sha)
+                pending.extend(self._commits[sha]['parent_ids'])
+        return seen
+
+    def _compare(self, from_ref: str, to_ref: str):
+        """Commits reachable from `to` but not from `from`, oldest first, like GET repository/compare"""
+        start, end = self._resolve(from_ref), self._resolve(to_ref)
+        if start is None or end is None:
+            return 404, {'message': '404 Ref Not Found'}, {}
+        shas = self._ancestors(end) - self._ancestors(start)
+        commits = sorted((self._commits[sha] for sha in shas), key=lambda commit: commit['committed_date'])
+        return 200, {'commit': self._commits[end], 'commits': commits, 'diffs': [],
+                     'compare_timeout': False, 'compare_same_ref': start == end}, {}
+
+    def _list(self, resource: str, query: Dict[str, List[str]], parts):
+        key = (resource, tuple(sorted((name, tuple(values)) for name, values in query.items()
+                                      if name not in ('page', 'per_page'))))
+        items = self._filtered.get(key)
+        if items is None:
+            items = self._filtered[key] = [item for item in self.data[resource] if _matches(item, query)]
+        per_page = int(query.get('per_page', ['20'])[0])
+        page = int(query.get('page', ['1'])[0])
+        total_pages = max(1, -(-len(items) // per_page))
+        headers = {'X-Total': str(len(items)), 'X-Total-Pages': str(total_pages),
+                   'X-Page': str(page), 'X-Per-Page': str(per_page)}
+        if page < total_pages:
+            params = {**{key: values[0] for key, values in query.items()}, 'page': page + 1}
+            headers['Link'] = f'<{self.url}{parts.path}?{urlencode(params)}>; rel="next"'
+        return 200, items[(page - 1) * per_page:page * per_page], headers
@@ -0,0 +1,143 @@
+"""
+Load test of the release notes service against stubbed backends
+
+Serves a synthetic project under several project paths from the local
+GitLab stub and answers LLM calls with the fake chat model. Then it sends
+`--requests` release notes requests, at most `--concurrency` at a time,
+each asking for one project's notes and approving them. Reported:
+requests per second, p50/p95/p99 latency, GitLab requests and LLM calls.
+`--mode cold` builds a fresh graph, GitLab client and LLM client per
+request (the behaviour before the service), for comparison:
+
+    python benchmarks/load.py --requests 200 --concurrency 20 --projects 4
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gitlab_stub import GitLabStub, generate_project  # noqa: E402
+from fake_llm import FakeChatModel  # noqa: E402
+
+DAYS = 14
+
+
+async def run_load(args) -> dict:
+    now = datetime.now(timezone.utc)
+    data = generate_project(args.merge_requests, description_chars=args.description_chars, days=DAYS,
+                            seed=args.seed, now=now)
+    projects = [f"group/project-{i}" for i in range(args.projects)]
+
+    with GitLabStub(data, latency=args.gitlab_latency, project=projects[0], aliases=projects[1:]) as stub, \
+            tempfile.TemporaryDirectory() as output_dir:
+        os.environ.update({
+            'GITLAB_URL': stub.url,
+            'GITLAB_PRIVATE_TOKEN': 'benchmark',
+            'GITLAB_TRANSPORT': 'async',
+            'PROJECT_ID': projects[0],
+            'CATEGORY_CACHE_PATH': '',
+            'GITLAB_MIRROR_PATH': '',
+            'EMBEDDING_INDEX_PATH': '',
+            'RUN_REPORT_DIR': ''
+        })
+        from src.graph.service import ReleaseNotesService
+
+        llms = []
+
+        def new_llm():
+            llms.append(FakeChatModel(latency=args.llm_latency))
+            return llms[-1]
+
+        def new_service() -> ReleaseNotesService:
+            return ReleaseNotesService(new_llm, output_dir=output_dir, max_concurrent=args.concurrency)
+
+        service = new_service() if args.mode == 'warm' else None
+        if service is not None:
+            await service.warm(projects)
+        slots = asyncio.Semaphore(args.concurrency)
+        latencies = []
+        failures = 0
+
+        async def request(i: int):
+            nonlocal failures
+            async with slots:
+                started = time.perf_counter()
+                current = service or new_service()
+                try:
+                    draft = await current.generate(projects[i % len(projects)], now - timedelta(days=DAYS + 1), now)
+                    if draft['status'] != 'pending_review':
+                        raise RuntimeError(draft['error'])
+                    reviewed = await current.review(draft['thread_id'], approve=True)
+                    if reviewed['status'] != 'saved':
+                        raise RuntimeError(reviewed['error'])
+                except Exception as e:
+                    failures += 1
+                    print(f"Request {i} failed: {e}", file=sys.stderr)
+                finally:
+                    if service is None:
+                        await current.aclose()
+                latencies.append(time.perf_counter() - started)
+
+        output = sys.stdout if args.verbose else io.StringIO()
+        requests_before = stub.requests
+        with contextlib.redirect_stdout(output):
+            started = time.perf_counter()
+            await asyncio.gather(*(request(i) for i in range(args.requests)))
+            elapsed = time.perf_counter() - started
+        if service is not None:
+            await service.aclose()
+
+    from src.instrumentation import percentiles
+    return {
+        'mode': args.mode,
+        'requests': args.requests,
+        'failures': failures,
+        'seconds': round(elapsed, 3),
+        'requests_per_second': round(args.requests / elapsed, 2),
+        'latency': {name: round(value, 3) for name, value in percentiles(latencies).items()},
+        'gitlab_requests': stub.requests - requests_before,
+        'llm_clients': len(llms),
+        'llm_calls': sum(llm.calls for llm in llms)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', default='warm', choices=['warm', 'cold'])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20, help="requests in flight")
+    parser.add_argument('--projects', type=int, default=4, help="distinct project paths requested")
+    parser.add_argument('--merge-requests', type=int, default=200, help="merged MRs per project")
+    parser.add_argument('--gitlab-latency', type=float, default=0.02, help="seconds added to each GitLab response")
+    parser.add_argument('--llm-latency', type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument('--description-chars', type=int, default=800)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the result to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the service's own output")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load(args))
+    latency = result['latency']
+    print(f"{'mode':>5} {'requests':>8} {'failed':>6} {'req/s':>7} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+          f"{'GitLab req':>10} {'LLM calls':>9}")
+    print(f"{result['mode']:>5} {result['requests']:>8} {result['failures']:>6} {result['requests_per_second']:>7.2f} "
+          f"{latency.get('p50', 0):>7.3f} {latency.get('p95', 0):>7.3f} {latency.get('p99', 0):>7.3f} "
+          f"{result['gitlab_requests']:>10} {result['llm_calls']:>9}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
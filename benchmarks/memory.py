@@ -0,0 +1,78 @@
+"""
+Memory benchmark for collected records
+
+Builds the merge requests, issues and commits of a synthetic release twice
+in fresh interpreters: once as plain dicts (the previous representation)
+and once as the compact records from `src/records.py`. For each it reports
+the memory retained by the collected items, the peak RSS of the process
+and the size of the serialized checkpoint:
+
+    python benchmarks/memory.py --merge-requests 10000 --commits 10000
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import gc, json, resource, sys, tracemalloc
+sys.path[:0] = [{root!r}, {benchmarks!r}]
+from gitlab_stub import generate_project
+from src.records import CommitRecord, IssueRecord, MergeRequestRecord
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+mode, merge_requests, commits, description_chars = {args!r}
+builders = {{'merge_requests': MergeRequestRecord.from_payload, 'issues': IssueRecord.from_payload,
+             'repository/commits': CommitRecord.from_payload}}
+state = {{'merge_requests': [], 'issues': [], 'repository/commits': []}}
+
+tracemalloc.start()
+baseline = tracemalloc.get_traced_memory()[0]
+# Payloads are generated in chunks, as pages arrive from GitLab, and dropped once converted
+chunk = 1000
+for start in range(0, max(merge_requests, commits), chunk):
+    payloads = generate_project(min(chunk, max(0, merge_requests - start)), commits=min(chunk, max(0, commits - start)),
+                                description_chars=description_chars, seed=start)
+    for source, build in builders.items():
+        for payload in payloads[source]:
+            record = build(payload)
+            state[source].append(record.to_dict() if mode == 'dicts' else record)
+    del payloads
+gc.collect()
+retained = tracemalloc.get_traced_memory()[0] - baseline
+tracemalloc.stop()
+
+checkpoint = len(JsonPlusSerializer().dumps_typed(state)[1])
+print(json.dumps({{'mode': mode, 'retained_mb': retained / 1e6, 'checkpoint_mb': checkpoint / 1e6,
+                  'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}}))
+"""
+
+
+def measure(mode: str, args) -> dict:
+    code = PROBE.format(root=ROOT, benchmarks=os.path.join(ROOT, 'benchmarks'),
+                        args=(mode, args.merge_requests, args.commits, args.description_chars))
+    result = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--merge-requests', type=int, default=10000)
+    parser.add_argument('--commits', type=int, default=10000)
+    parser.add_argument('--description-chars', type=int, default=2000)
+    args = parser.parse_args()
+
+    results = [measure(mode, args) for mode in ('dicts', 'records')]
+    print(f"{'items':>8} {'retained MB':>12} {'peak RSS MB':>12} {'checkpoint MB':>14}")
+    for result in results:
+        print(f"{result['mode']:>8} {result['retained_mb']:>12.1f} {result['peak_rss_mb']:>12.1f} "
+              f"{result['checkpoint_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
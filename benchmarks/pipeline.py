@@ -0,0 +1,125 @@
+"""
+Offline end-to-end benchmark of the release notes graph
+
+For each size, a synthetic project is served from a local GitLab stub and
+categorized by a deterministic fake chat model, then the graph from
+`create_release_notes_graph` runs up to the review step. Reported per size:
+end-to-end time, per-node time and throughput, GitLab requests and bytes,
+and LLM calls and latency. No network access or credentials are needed:
+
+    python benchmarks/pipeline.py --sizes 100,1000,10000 --gitlab-latency 0.02 --llm-latency 0.2
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gitlab_stub import GitLabStub, generate_project  # noqa: E402
+from fake_llm import FakeChatModel  # noqa: E402
+
+DAYS = 30
+
+
+async def run_once(size: int, args) -> dict:
+    now = datetime.now(timezone.utc)
+    data = generate_project(size, description_chars=args.description_chars, days=DAYS, seed=args.seed, now=now)
+
+    with GitLabStub(data, latency=args.gitlab_latency) as stub:
+        os.environ.update({
+            'GITLAB_URL': stub.url,
+            'GITLAB_PRIVATE_TOKEN': 'benchmark',
+            'GITLAB_TRANSPORT': args.transport,
+            'PROJECT_ID': stub.project,
+            # Measure cold runs: no category cache, mirror, embeddings or reports
+            'CATEGORY_CACHE_PATH': '',
+            'GITLAB_MIRROR_PATH': '',
+            'EMBEDDING_INDEX_PATH': '',
+            'RUN_REPORT_DIR': '',
+            'CATEGORY_RULES': 'true' if args.rules else 'false',
+            'DIFF_STATS': 'true' if args.diff_stats else 'false',
+            'LLM_MIN_IMPACT': str(args.min_impact)
+        })
+        from src.graph.async_workflow import create_release_notes_graph
+        from src.instrumentation import RunRecorder
+
+        llm = FakeChatModel(latency=args.llm_latency)
+        app = await create_release_notes_graph(llm, use_interrupt=True, streaming=args.streaming)
+        state = {
+            'project_id': stub.project,
+            'from_date': now - timedelta(days=DAYS + 1),
+            'to_date': now,
+            'merge_requests': [], 'issues': [], 'commits': [], 'contributors': set(),
+            'categorized_changes': {}, 'statistics': {}, 'release_notes_markdown': '',
+            'release_notes_sections': {}, 'needs_human_review': False, 'error': None
+        }
+
+        output = sys.stdout if args.verbose else io.StringIO()
+        with contextlib.redirect_stdout(output), RunRecorder(f"benchmark-{size}", report_dir='') as recorder:
+            started = time.perf_counter()
+            final = await app.ainvoke(state, {'configurable': {'thread_id': f"benchmark-{size}"}})
+            elapsed = time.perf_counter() - started
+        if final.get('error'):
+            raise RuntimeError(final['error'])
+
+    report = recorder.report()
+    collected = len(final.get('merge_requests') or [])
+    return {
+        'size': size,
+        'merge_requests': collected,
+        'seconds': round(elapsed, 3),
+        'mrs_per_second': round(collected / elapsed, 1) if elapsed else None,
+        'nodes': {name: {'seconds': round(stats['seconds'], 3),
+                         'mrs_per_second': round(collected / stats['seconds'], 1) if stats['seconds'] else None}
+                  for name, stats in report['nodes'].items()},
+        'gitlab_requests': stub.requests,
+        'gitlab_bytes': report['gitlab']['bytes'],
+        'llm_calls': llm.calls,
+        'llm': report['llm']
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='100,1000,10000', help="comma-separated merge request counts")
+    parser.add_argument('--transport', default='async', choices=['async', 'python-gitlab'])
+    parser.add_argument('--streaming', action='store_true', help="run the streaming pipeline")
+    parser.add_argument('--no-rules', dest='rules', action='store_false', help="send every change to the model")
+    parser.add_argument('--diff-stats', action='store_true', help="enrich changes with diff stats and impact scores")
+    parser.add_argument('--min-impact', type=float, default=0.0,
+                        help="LLM_MIN_IMPACT: list changes scored below it without a model call (needs --diff-stats)")
+    parser.add_argument('--gitlab-latency', type=float, default=0.02, help="seconds added to each GitLab response")
+    parser.add_argument('--llm-latency', type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument('--description-chars', type=int, default=800)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the pipeline's own output")
+    args = parser.parse_args()
+
+    results = [asyncio.run(run_once(int(size), args)) for size in args.sizes.split(',')]
+
+    print(f"{'MRs':>7} {'total s':>8} {'MR/s':>8} {'collect s':>10} {'write s':>8} "
+          f"{'GitLab req':>10} {'GitLab MB':>10} {'LLM calls':>9} {'LLM p95 s':>9}")
+    for result in results:
+        nodes = result['nodes']
+        p95 = max((stats['latency'].get('p95', 0) for stats in result['llm'].values()), default=0)
+        print(f"{result['merge_requests']:>7} {result['seconds']:>8.2f} {result['mrs_per_second'] or 0:>8.1f} "
+              f"{nodes.get('collect', {}).get('seconds', 0):>10.2f} {nodes.get('write', {}).get('seconds', 0):>8.2f} "
+              f"{result['gitlab_requests']:>10} {result['gitlab_bytes'] / 1e6:>10.2f} "
+              f"{result['llm_calls']:>9} {p95:>9.3f}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Import-time and startup benchmark
+
+Each sample runs in a fresh interpreter and measures how long `import main`
+takes and how long LangGraph Studio's first access to `main.app` takes. It
+also counts the sockets opened along the way; startup must not touch the
+network. Pass thresholds to fail on regressions:
+
+    python benchmarks/startup.py --runs 5 --max-import 0.3 --max-build 1.5
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, socket, time
+connections = []
+_connect = socket.socket.connect
+def connect(self, address):
+    connections.append(str(address))
+    return _connect(self, address)
+socket.socket.connect = connect
+
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+main.app
+built = time.perf_counter()
+print(json.dumps({'import': imported - started, 'build': built - imported, 'connections': connections}))
+"""
+
+
+def sample() -> dict:
+    env = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+    # Placeholders so the lazily created clients can be built offline
+    env.setdefault('OPENAI_API_KEY', 'benchmark')
+    env.setdefault('PROJECT_ID', 'group/project')
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import', type=float, help="fail if the median import time (s) exceeds this")
+    parser.add_argument('--max-build', type=float, help="fail if the median app build time (s) exceeds this")
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    report = {
+        'runs': args.runs,
+        'import_seconds': round(statistics.median(s['import'] for s in samples), 4),
+        'build_seconds': round(statistics.median(s['build'] for s in samples), 4),
+        'connections': sorted({c for s in samples for c in s['connections']})
+    }
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if report['connections']:
+        failures.append(f"startup opened network connections: {report['connections']}")
+    if args.max_import is not None and report['import_seconds'] > args.max_import:
+        failures.append(f"import took {report['import_seconds']}s (limit {args.max_import}s)")
+    if args.max_build is not None and report['build_seconds'] > args.max_build:
+        failures.append(f"app build took {report['build_seconds']}s (limit {args.max_build}s)")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
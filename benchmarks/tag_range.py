@@ -0,0 +1,102 @@
+"""
+Check commit-to-merge-request attribution of tag-range collection
+
+Serves a synthetic release from the local GitLab stub: merge-commit, squash
+and fast-forward merge requests plus cherry-picks pushed without one, a few
+of the merge requests updated long after the release. The range between the
+two tags is collected through the compare API with each transport (and the
+local mirror, with --mirror); the script fails if any commit is attributed
+to the wrong merge request and reports the API calls made:
+
+    python benchmarks/tag_range.py --merges 50 --squashes 50 --fast-forwards 50 --mirror
+"""
+
+import os
+import io
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gitlab_stub import GitLabStub, generate_release  # noqa: E402
+
+
+async def collect(transport: str, mirror_path: str) -> dict:
+    from src.tools.gitlab_langchain_tools import GitLabLangChainTools
+
+    os.environ['GITLAB_MIRROR_PATH'] = mirror_path
+    tools = GitLabLangChainTools(transport=transport)
+    try:
+        started = time.perf_counter()
+        result = await tools.get_tag_range('v1.0.0', 'v1.1.0')
+        elapsed = time.perf_counter() - started
+    finally:
+        await tools.aclose()
+    return {
+        'attribution': {commit['id']: commit['merge_request_iid'] for commit in result['commits']},
+        'merge_requests': sorted(mr['iid'] for mr in result['merge_requests']),
+        'api_calls': sum(tools.get_api_call_counts().values()),
+        'seconds': round(elapsed, 3)
+    }
+
+
+async def run_check(args) -> list:
+    data, expected = generate_release(args.merges, args.squashes, args.fast_forwards, args.cherry_picks,
+                                      args.late_updates, seed=args.seed)
+    results = []
+    stub = GitLabStub(data, latency=args.gitlab_latency, commit_merge_requests=expected)
+    with stub, tempfile.TemporaryDirectory() as directory:
+        os.environ.update({
+            'GITLAB_URL': stub.url,
+            'GITLAB_PRIVATE_TOKEN': 'benchmark',
+            'PROJECT_ID': stub.project,
+            'RUN_REPORT_DIR': ''
+        })
+        runs = [(transport, '') for transport in ('async', 'python-gitlab')]
+        if args.mirror:
+            runs.append(('async', os.path.join(directory, 'mirror.sqlite3')))
+        for transport, mirror_path in runs:
+            before = stub.requests
+            with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+                result = await collect(transport, mirror_path)
+            result.update(name=transport + (' +mirror' if mirror_path else ''), requests=stub.requests - before)
+            results.append(result)
+    return [(result, expected, data) for result in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--merges', type=int, default=20, help="merge requests landed by a merge commit")
+    parser.add_argument('--squashes', type=int, default=20, help="merge requests landed by a squash commit")
+    parser.add_argument('--fast-forwards', type=int, default=20, help="merge requests landed by fast-forward")
+    parser.add_argument('--cherry-picks', type=int, default=5, help="commits pushed without a merge request")
+    parser.add_argument('--late-updates', type=int, default=3,
+                        help="squash merge requests updated long after the release")
+    parser.add_argument('--mirror', action='store_true', help="also collect through a local mirror")
+    parser.add_argument('--gitlab-latency', type=float, default=0.0, help="seconds added to each GitLab response")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--verbose', action='store_true', help="show the collector's own output")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_check(args))
+    print(f"{'transport':>20} {'commits':>8} {'MRs':>5} {'API calls':>9} {'requests':>8} {'seconds':>8}")
+    for result, _, _ in results:
+        print(f"{result['name']:>20} {len(result['attribution']):>8} {len(result['merge_requests']):>5} "
+              f"{result['api_calls']:>9} {result['requests']:>8} {result['seconds']:>8.2f}")
+
+    for result, expected, data in results:
+        wrong = {sha for sha, iid in expected.items() if result['attribution'].get(sha, 'missing') != iid}
+        if wrong:
+            sys.exit(f"{result['name']}: {len(wrong)}/{len(expected)} commits attributed wrongly")
+        if result['merge_requests'] != sorted(mr['iid'] for mr in data['merge_requests']):
+            sys.exit(f"{result['name']}: merge requests differ from the release")
+    print("every commit is attributed to the merge request that landed it")
+
+
+if __name__ == '__main__':
+    main()
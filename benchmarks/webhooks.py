@@ -0,0 +1,136 @@
+"""
+Webhook ingest benchmark and fixture generator
+
+Turns a synthetic project into the GitLab webhook payloads it would have
+sent: one `merge` event per merged merge request, one `close` event per
+closed issue, in time order, then a tag push. The payloads are replayed
+into a release draft categorized by the fake chat model, and the script
+reports the ingest rate and the time taken to cut the release from the
+draft:
+
+    python benchmarks/webhooks.py --merge-requests 2000 --batch 1
+
+`--write-fixtures DIR` saves the payloads as JSON for replay with
+`WEBHOOK_FIXTURES=DIR python main.py`.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import contextlib
+from typing import Dict, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from gitlab_stub import generate_project  # noqa: E402
+from fake_llm import FakeChatModel  # noqa: E402
+
+PROJECT = {'id': 1, 'path_with_namespace': 'group/project', 'default_branch': 'main'}
+
+
+def webhook_events(data: Dict[str, List[Dict]], tag: str = 'v1.0.0') -> List[Dict]:
+    """Merge request and issue webhooks for a generated project, oldest first, ending with a tag push"""
+    events = []
+    for mr in data['merge_requests']:
+        events.append((mr['merged_at'], {
+            'object_kind': 'merge_request',
+            'project': PROJECT,
+            'user': mr['merged_by'],
+            'labels': [{'title': label} for label in mr['labels']],
+            'object_attributes': {
+                'iid': mr['iid'], 'title': mr['title'], 'description': mr['description'],
+                'state': 'merged', 'action': 'merge', 'updated_at': mr['merged_at'],
+                'url': mr['web_url'], 'source_branch': mr['source_branch'], 'target_branch': mr['target_branch'],
+                'merge_commit_sha': mr['merge_commit_sha'],
+                'last_commit': {'author': {'name': mr['author']['username']}}
+            }
+        }))
+    for issue in data['issues']:
+        events.append((issue['closed_at'], {
+            'object_kind': 'issue',
+            'project': PROJECT,
+            'user': issue['closed_by'],
+            'assignees': issue['assignees'],
+            'labels': [{'title': label} for label in issue['labels']],
+            'object_attributes': {
+                'iid': issue['iid'], 'title': issue['title'], 'description': issue['description'],
+                'state': 'closed', 'action': 'close', 'closed_at': issue['closed_at'], 'url': issue['web_url']
+            }
+        }))
+    events.sort(key=lambda event: event[0])
+    return [payload for _, payload in events] + [
+        {'object_kind': 'tag_push', 'project': PROJECT, 'ref': f"refs/tags/{tag}", 'after': 'f' * 40}
+    ]
+
+
+async def replay(events: List[Dict], args) -> dict:
+    os.environ.update({'CATEGORY_CACHE_PATH': '', 'EMBEDDING_INDEX_PATH': ''})
+    from src.agents.writer import WriterAgent
+    from src.graph.webhooks import ReleaseDraft
+
+    llm = FakeChatModel(latency=args.llm_latency)
+    with tempfile.TemporaryDirectory() as output_dir:
+        draft = ReleaseDraft(WriterAgent(llm), project_id=PROJECT['path_with_namespace'], event_log='',
+                             output_dir=output_dir)
+        changes, tag_push = events[:-1], events[-1]
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            started = time.perf_counter()
+            for i in range(0, len(changes), args.batch):
+                await draft.ingest_many(changes[i:i + args.batch])
+            ingest_seconds = time.perf_counter() - started
+
+            started = time.perf_counter()
+            draft.snapshot()
+            snapshot_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            release, = await draft.ingest(tag_push)
+            cut_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        'events': len(changes),
+        'merge_requests': len(release['merge_requests']),
+        'ingest_seconds': round(ingest_seconds, 3),
+        'events_per_second': round(len(changes) / ingest_seconds, 1) if ingest_seconds else None,
+        'snapshot_ms': round(snapshot_ms, 2),
+        'cut_ms': round(cut_ms, 2),
+        'llm_calls': llm.calls
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--merge-requests', type=int, default=2000)
+    parser.add_argument('--batch', type=int, default=1, help="webhooks applied together, as when they queue up")
+    parser.add_argument('--llm-latency', type=float, default=0.0, help="seconds per fake LLM call")
+    parser.add_argument('--description-chars', type=int, default=800)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--write-fixtures', metavar='DIR', help="save the webhook payloads instead of replaying them")
+    parser.add_argument('--verbose', action='store_true', help="show the draft's own output")
+    args = parser.parse_args()
+
+    data = generate_project(args.merge_requests, description_chars=args.description_chars, seed=args.seed)
+    events = webhook_events(data)
+    if args.write_fixtures:
+        os.makedirs(args.write_fixtures, exist_ok=True)
+        for i, event in enumerate(events):
+            with open(os.path.join(args.write_fixtures, f"{i:06d}-{event['object_kind']}.json"), 'w') as f:
+                json.dump(event, f)
+        print(f"Wrote {len(events)} webhook fixtures to {args.write_fixtures}")
+        return
+
+    result = asyncio.run(replay(events, args))
+    print(f"{'events':>7} {'MRs':>6} {'ingest s':>9} {'events/s':>9} {'LLM calls':>9} {'snapshot ms':>11} {'cut ms':>7}")
+    print(f"{result['events']:>7} {result['merge_requests']:>6} {result['ingest_seconds']:>9.2f} "
+          f"{result['events_per_second'] or 0:>9.1f} {result['llm_calls']:>9} {result['snapshot_ms']:>11.2f} "
+          f"{result['cut_ms']:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
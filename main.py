@@ -1,33 +1,88 @@
 import asyncio
 import os
+import uuid
+from contextlib import nullcontext
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
-from src.graph.async_workflow import create_release_notes_graph
-from src.graph.state import ReleaseNotesState
+
+# Each entry point imports what it runs, so importing main (e.g. by LangGraph
+# Studio) does not load the graph, checkpointer, backfill and webhook modules
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from src.tools.gitlab_langchain_tools import GitLabLangChainTools
 
 # Load environment variables
 load_dotenv()
 
-# Initialize LLM
-llm = ChatOpenAI(
-    api_key=os.getenv('OPENAI_API_KEY'),
-    model="gpt-3.5-turbo",
-    temperature=0.3
-)
+@lru_cache(maxsize=None)
+def get_llm() -> 'BaseChatModel':
+    """Initialize the LLM on first use"""
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        model="gpt-3.5-turbo",
+        temperature=0.3,
+        # Retries and rate-limit backoff are handled by the categorizer's scheduler
+        max_retries=0
+    )
+
+@lru_cache(maxsize=None)
+def get_gitlab_tools() -> 'GitLabLangChainTools':
+    """GitLab tools shared by the Studio and CLI graphs; the connection opens on first request"""
+    from src.tools.gitlab_langchain_tools import GitLabLangChainTools
+    return GitLabLangChainTools()
+
+def __getattr__(name):
+    # The app for LangGraph Studio (with interrupt, no checkpointer) is built
+    # when Studio first loads `main.py:app`, not at import
+    if name == 'app':
+        from src.graph.async_workflow import build_release_notes_graph
+        app = build_release_notes_graph(get_llm, use_interrupt=True, gitlab_tools=get_gitlab_tools())
+        globals()['app'] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Create the app for LangGraph Studio with interrupt (no checkpointer)
-app = asyncio.run(create_release_notes_graph(llm, use_interrupt=True))
+def open_checkpointer():
+    """Open the durable SQLite checkpointer; an empty CHECKPOINT_PATH disables it"""
+    from src.storage.journal import DEFAULT_CHECKPOINT_PATH
+    path = os.getenv('CHECKPOINT_PATH', DEFAULT_CHECKPOINT_PATH)
+    if not path:
+        return nullcontext()
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    return AsyncSqliteSaver.from_conn_string(path)
 
 async def run_release_notes_generation():
     print("Starting GitLab Release Notes Generator...")
     
+    async with open_checkpointer() as checkpointer:
+        await run_with_checkpointer(checkpointer)
+
+async def run_with_checkpointer(checkpointer):
+    from src.graph.async_workflow import create_release_notes_graph
+    from src.graph.state import ReleaseNotesState
+    from src.instrumentation import RunRecorder
+    
     # Create CLI version without interrupt
-    cli_app = await create_release_notes_graph(llm, use_interrupt=False)
+    cli_app = await create_release_notes_graph(
+        get_llm,
+        use_interrupt=False,
+        streaming=os.getenv('STREAMING_PIPELINE', '').lower() in ('1', 'true', 'yes'),
+        checkpointer=checkpointer,
+        gitlab_tools=get_gitlab_tools()
+    )
+    
+    # Reusing the thread ID of a failed run resumes it from its last checkpoint
+    thread_id = os.getenv('RUN_THREAD_ID') or uuid.uuid4().hex
+    config = {'configurable': {'thread_id': thread_id}}
     
     try:
         initial_state = ReleaseNotesState(
             project_id=os.getenv('PROJECT_ID'),
+            group_id=os.getenv('GROUP_ID'),
+            project_ids=[p.strip() for p in os.getenv('PROJECT_IDS', '').split(',') if p.strip()],
             from_date=datetime.now(timezone.utc) - timedelta(days=14),
             to_date=datetime.now(timezone.utc),
             merge_requests=[],
@@ -42,8 +97,17 @@ async def run_release_notes_generation():
             error=None
         )
         
-        print("🚀 Starting release notes generation...")
-        final_state = await cli_app.ainvoke(initial_state)
+        snapshot = await cli_app.aget_state(config) if checkpointer is not None else None
+        # Node timings, GitLab and LLM calls are exported as a run report and trace
+        with RunRecorder(thread_id):
+            if snapshot is not None and snapshot.next:
+                print(f"🔁 Resuming run {thread_id} at: {', '.join(snapshot.next)}")
+                final_state = await cli_app.ainvoke(None, config)
+            else:
+                print(f"🚀 Starting release notes generation (run {thread_id})...")
+                if checkpointer is not None:
+                    print(f"   Set RUN_THREAD_ID={thread_id} to resume this run if it fails")
+                final_state = await cli_app.ainvoke(initial_state, config)
         
         if final_state.get('error'):
             print(f"\n❌ Error: {final_state['error']}")
@@ -60,5 +124,79 @@ async def run_release_notes_generation():
         traceback.print_exc()
 
 
+async def run_backfill(tags, dates):
+    """Regenerate notes for every release between consecutive tags or dates, one file each"""
+    from src.agents.collector import CollectorAgent
+    from src.agents.linker import ChangeLinker
+    from src.agents.writer import WriterAgent
+    from src.graph.backfill import BackfillRunner
+    from src.instrumentation import RunRecorder
+    
+    print("Starting GitLab Release Notes backfill...")
+    linker = ChangeLinker() if os.getenv('LINK_CHANGES', 'true').lower() not in ('0', 'false', 'no') else None
+    runner = BackfillRunner(CollectorAgent(get_gitlab_tools()), WriterAgent(get_llm), linker=linker)
+    run_id = f"backfill-{uuid.uuid4().hex}"
+    
+    try:
+        with RunRecorder(run_id):
+            releases = await runner.run({'project_id': os.getenv('PROJECT_ID')}, tags=tags, dates=dates, run_id=run_id)
+        print(f"\n✅ Backfilled {len(releases)} releases")
+    except Exception as e:
+        print(f"\n❌ Fatal error: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+async def run_webhook_draft(fixtures=None):
+    """Keep a release draft current from GitLab webhooks, replayed from fixtures or received over HTTP"""
+    from src.agents.writer import WriterAgent
+    from src.graph.webhooks import ReleaseDraft, WebhookReceiver, load_fixtures
+    
+    draft = ReleaseDraft(WriterAgent(get_llm))
+    await draft.restore()
+    if fixtures:
+        releases = await draft.ingest_many(load_fixtures(fixtures))
+        print(f"\nReplayed {fixtures}: {len(releases)} releases cut")
+        print(draft.snapshot()['release_notes_markdown'])
+        return
+    await WebhookReceiver(draft).serve()
+
+
+async def run_service(project_ids):
+    """Draft release notes for several projects at once through the shared service, then review each"""
+    from src.graph.service import ReleaseNotesService
+    service = ReleaseNotesService(get_llm, gitlab_tools=get_gitlab_tools(),
+                                  streaming=os.getenv('STREAMING_PIPELINE', '').lower() in ('1', 'true', 'yes'))
+    try:
+        await service.warm(project_ids)
+        drafts = await asyncio.gather(*(service.generate(project_id) for project_id in project_ids))
+        for project_id, draft in zip(project_ids, drafts):
+            if draft['status'] == 'error':
+                print(f"\n❌ {project_id}: {draft['error']}")
+                continue
+            print(f"\n=== RELEASE NOTES FOR {project_id} ===")
+            print(draft['release_notes_markdown'])
+            approve = await asyncio.to_thread(input, f"Approve the release notes of {project_id}? (y/n): ")
+            result = await service.review(draft['thread_id'], approve.lower() == 'y')
+            print(f"✅ Saved to {result['output_path']}" if result['status'] == 'saved' else f"{project_id}: {result['status']}")
+    finally:
+        await service.aclose()
+
+
+def split_list(value: str):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
 if __name__ == "__main__":
-    asyncio.run(run_release_notes_generation())
\ No newline at end of file
+    # WEBHOOK_FIXTURES replays GitLab webhook payloads into the release draft; WEBHOOK_PORT receives them.
+    # BACKFILL_TAGS=v1.0,v1.1,v1.2 (or BACKFILL_DATES) regenerates every release in between.
+    # SERVICE_PROJECT_IDS=group/a,group/b drafts the notes of several projects concurrently.
+    if os.getenv('WEBHOOK_FIXTURES') or os.getenv('WEBHOOK_PORT'):
+        asyncio.run(run_webhook_draft(os.getenv('WEBHOOK_FIXTURES')))
+    elif os.getenv('BACKFILL_TAGS') or os.getenv('BACKFILL_DATES'):
+        asyncio.run(run_backfill(split_list(os.getenv('BACKFILL_TAGS', '')),
+                                 split_list(os.getenv('BACKFILL_DATES', ''))))
+    elif os.getenv('SERVICE_PROJECT_IDS'):
+        asyncio.run(run_service(split_list(os.getenv('SERVICE_PROJECT_IDS'))))
+    else:
+        asyncio.run(run_release_notes_generation())
\ No newline at end of file
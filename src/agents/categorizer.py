@@ -0,0 +1,159 @@
+import os
+import re
+import json
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain.prompts import ChatPromptTemplate
+from ..tools.scheduler import AdaptiveScheduler
+from ..instrumentation import RunStats, traced_llm_call
+
+# Category IDs understood by the writer
+CATEGORIES = ('features', 'fixes', 'breaking', 'performance', 'documentation', 'other')
+
+# Bump whenever a categorization prompt changes so cached results are not reused
+PROMPT_VERSION = '1'
+
+_JSON_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+def parse_batch_response(content: str, count: int) -> Dict[int, str]:
+    """Parse a batch categorization response into {item id: category}
+
+    Entries with unknown ids or categories are dropped so the caller can
+    retry just those items.
+    """
+    text = _JSON_FENCE.sub('', content.strip())
+    start = min((i for i in (text.find('{'), text.find('[')) if i >= 0), default=-1)
+    if start < 0:
+        return {}
+    try:
+        payload, _ = json.JSONDecoder().raw_decode(text[start:])
+    except json.JSONDecodeError:
+        return {}
+
+    entries = payload.get('items', []) if isinstance(payload, dict) else payload
+    parsed = {}
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        item_id, category = entry.get('id'), str(entry.get('category', '')).strip().lower()
+        if isinstance(item_id, int) and 0 <= item_id < count and category in CATEGORIES:
+            parsed[item_id] = category
+    return parsed
+
+
+class RateLimiter:
+    """Spaces out request starts to stay under a requests-per-minute limit"""
+
+    def __init__(self, requests_per_minute: float = 0):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Wait for the next free request slot"""
+        if not self.interval:
+            return
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class BatchCategorizer:
+    """Categorizes many changes per LLM call and runs batches concurrently"""
+
+    # LLM calls and failed items, per run
+    stats = RunStats(lambda: {'items': 0, 'batch_calls': 0, 'fallback_calls': 0, 'failures': 0})
+
+    def __init__(self, llm: BaseChatModel, fallback: Callable[[str], Awaitable[str]],
+                 batch_size: Optional[int] = None, parallelism: Optional[int] = None,
+                 requests_per_minute: Optional[float] = None, scheduler: Optional[AdaptiveScheduler] = None):
+        self.llm = llm
+        # Per-item categorizer used for items the batch response did not cover
+        self.fallback = fallback
+        self.batch_size = batch_size or int(os.getenv('CATEGORIZE_BATCH_SIZE', '20'))
+        self.parallelism = parallelism or int(os.getenv('CATEGORIZE_PARALLELISM', '4'))
+        self.requests_per_minute = (requests_per_minute if requests_per_minute is not None
+                                    else float(os.getenv('CATEGORIZE_RPM', '0')))
+        # Caps calls in flight at `parallelism`, backs off on 429s and retries transient errors
+        self.scheduler = scheduler or AdaptiveScheduler('llm', self.parallelism)
+
+        self.prompt = ChatPromptTemplate.from_messages([
+            ("system", """You are a release notes expert. Categorize each of the following changes using one of these category IDs:
+            - features: New functionality
+            - fixes: Bug fixes
+            - breaking: Breaking changes
+            - performance: Performance improvements
+            - documentation: Doc updates
+            - other: Everything else
+
+            Respond with JSON only, in the form {{"items": [{{"id": 0, "category": "features"}}]}}, with one entry per change."""),
+            ("human", "Changes (one JSON object per line):\n{changes}")
+        ])
+        self.chain = self.prompt | self.llm
+
+    async def categorize(self, changes: List[str],
+                         on_batch: Optional[Callable[[Dict[int, str]], None]] = None) -> List[Optional[str]]:
+        """Categorize changes, returning one category ID per change
+
+        Items whose every attempt failed come back as None. `on_batch` is
+        called with {index: category} for the answered items of each batch
+        as soon as that batch completes.
+        """
+        # Concurrent calls of one run add to its counters; this call's failures are counted apart
+        stats = self.stats
+        stats['items'] += len(changes)
+        failures = []
+        limiter = RateLimiter(self.requests_per_minute)
+
+        async def call(coro_factory):
+            async def attempt():
+                await limiter.wait()
+                return await coro_factory()
+            return await self.scheduler.run(attempt)
+
+        async def run_fallback(change: str) -> Optional[str]:
+            # The bare call goes through the scheduler so throttling is retried
+            # and shrinks the window; only the final failure is caught here
+            try:
+                return await call(lambda: self.fallback(change))
+            except Exception as e:
+                print(f"Error categorizing change: {e}")
+                stats['failures'] += 1
+                failures.append(change)
+                return None
+
+        async def run_batch(offset: int) -> Dict[int, str]:
+            batch = changes[offset:offset + self.batch_size]
+            lines = '\n'.join(json.dumps({'id': i, 'change': change}) for i, change in enumerate(batch))
+            stats['batch_calls'] += 1
+            try:
+                result = await call(lambda: traced_llm_call(
+                    'categorize_batch', self.chain.ainvoke({'changes': lines}), items=len(batch)))
+                parsed = parse_batch_response(result.content, len(batch))
+            except Exception as e:
+                print(f"Error categorizing batch at {offset}: {e}")
+                parsed = {}
+
+            # Fall back to per-item calls only for what the batch did not answer
+            missing = [i for i in range(len(batch)) if i not in parsed]
+            stats['fallback_calls'] += len(missing)
+            answers = await asyncio.gather(*(run_fallback(batch[i]) for i in missing))
+            parsed.update(zip(missing, answers))
+            result = {offset + i: category for i, category in parsed.items()}
+            if on_batch is not None:
+                on_batch({i: category for i, category in result.items() if category})
+            return result
+
+        results = await asyncio.gather(*(run_batch(offset) for offset in range(0, len(changes), self.batch_size)))
+        categories = {}
+        for result in results:
+            categories.update(result)
+        if failures:
+            print(f"{len(failures)}/{len(changes)} changes could not be categorized")
+        return [categories[i] for i in range(len(changes))]
@@ -1,51 +1,136 @@
-from typing import Dict, Any
+import os
+import asyncio
+from typing import Dict, Any, Iterable, List, Optional, Set
 from datetime import datetime
 from ..tools.gitlab_langchain_tools import GitLabLangChainTools
+from ..tools.scheduler import is_transient
+
+STATISTICS_KEYS = ('merge_requests', 'issues', 'commits', 'milestones', 'contributors')
+
+
+def collection_statistics(collected: Dict[str, Any]) -> Dict[str, int]:
+    """Item counts of a collection, derived from the collected data rather than refetched"""
+    return {key: len(collected.get(key) or ()) for key in STATISTICS_KEYS}
+
+
+def collect_contributors(merge_requests: List[Dict], issues: List[Dict]) -> Set[str]:
+    """Merge request authors and the users who closed issues"""
+    contributors = set()
+    for mr in merge_requests:
+        if 'author' in mr:
+            contributors.add(mr['author'])
+    for issue in issues:
+        if issue.get('closed_by'):
+            contributors.add(issue['closed_by'])
+    return contributors
+
 
 class CollectorAgent:
-    def __init__(self, gitlab_tools: GitLabLangChainTools):
+    def __init__(self, gitlab_tools: GitLabLangChainTools, source_timeout: Optional[float] = None,
+                 raise_transient: bool = False):
         self.tools = gitlab_tools
+        # Seconds each source may take before it is abandoned
+        self.source_timeout = source_timeout or float(os.getenv('COLLECT_SOURCE_TIMEOUT', '300'))
+        # Raise transient GitLab failures instead of recording them, so a
+        # checkpointed run fails at the collect node and resumes there
+        self.raise_transient = raise_transient
+    
+    async def _collect_source(self, name: str, coro) -> Dict[str, Any]:
+        """Await one source under the per-source timeout, keeping failures local"""
+        try:
+            return {'data': await asyncio.wait_for(coro, timeout=self.source_timeout)}
+        except asyncio.TimeoutError:
+            print(f"Timed out collecting {name} after {self.source_timeout}s")
+            return {'data': [], 'error': f"timed out after {self.source_timeout}s"}
+        except Exception as e:
+            if self.raise_transient and is_transient(e):
+                raise
+            print(f"Error collecting {name}: {e}")
+            return {'data': [], 'error': str(e)}
+    
+    async def project_paths(self, project_id: str) -> Dict[str, str]:
+        """Map a numeric project ID to the project's full path, which category rules are keyed by"""
+        if not str(project_id).isdigit() or str(project_id) != str(self.tools.project_id):
+            return {}
+        try:
+            return {str(project_id): await self.tools.get_project_path()}
+        except Exception as e:
+            if self.raise_transient and is_transient(e):
+                raise
+            print(f"Error resolving the path of project {project_id}: {e}")
+            return {}
     
-    async def run_async(self, state: Dict[str, Any]) -> Dict[str, Any]:
-        """Collect all relevant data from GitLab using LangChain GitLab toolkit"""
+    async def run_async(self, state: Dict[str, Any], exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """Collect all relevant data from GitLab using LangChain GitLab toolkit
+        
+        Args:
+            state: Current workflow state
+            exclude: Date-mode sources to skip, e.g. when merge requests are streamed separately
+        """
         try:
             project_id = state.get('project_id')
             if not project_id:
                 raise ValueError("project_id is required in state")
             
-            # For now, only support date-based collection (tags can be added later)
+            from_tag = state.get('from_tag')
+            to_tag = state.get('to_tag')
             from_date = state.get('from_date')
             to_date = state.get('to_date')
             
-            if not from_date or not to_date:
-                raise ValueError("from_date and to_date are required")
+            if from_tag and to_tag:
+                # Tag-based collection: commits and MRs come from one compare call,
+                # issues and milestones from the window between the tag commits
+                from_date, to_date = await self.tools.get_tag_dates(from_tag, to_tag)
+                sources = {
+                    'tag_range': self.tools.get_tag_range(from_tag, to_tag),
+                    'issues': self.tools.get_issues(project_id, from_date, to_date),
+                    'milestones': self.tools.get_milestones(from_date, to_date)
+                }
+            elif from_date and to_date:
+                # Convert string dates to datetime if needed
+                if isinstance(from_date, str):
+                    from_date = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
+                if isinstance(to_date, str):
+                    to_date = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
+                
+                # Collect all sources concurrently; they share the tools' request budget
+                sources = {
+                    'merge_requests': lambda: self.tools.get_merge_requests(project_id, from_date, to_date),
+                    'issues': lambda: self.tools.get_issues(project_id, from_date, to_date),
+                    'commits': lambda: self.tools.get_commits(project_id, from_date, to_date),
+                    'milestones': lambda: self.tools.get_milestones(from_date, to_date)
+                }
+                sources = {name: start() for name, start in sources.items() if name not in exclude}
+            else:
+                raise ValueError("from_tag and to_tag, or from_date and to_date, are required")
             
-            # Convert string dates to datetime if needed
-            if isinstance(from_date, str):
-                from_date = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-            if isinstance(to_date, str):
-                to_date = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
+            paths, *results = await asyncio.gather(self.project_paths(project_id), *(
+                self._collect_source(name, coro) for name, coro in sources.items()
+            ))
+            collected = dict(zip(sources, results))
             
-            # Collect data using LangChain GitLab tools
-            merge_requests = await self.tools.get_merge_requests(project_id, from_date, to_date)
-            issues = await self.tools.get_issues(project_id, from_date, to_date)
-            commits = await self.tools.get_commits(project_id, from_date, to_date)
+            if 'tag_range' in collected:
+                tag_range = collected['tag_range']['data'] or {}
+                collected['merge_requests'] = {'data': tag_range.get('merge_requests', [])}
+                collected['commits'] = {'data': tag_range.get('commits', [])}
             
-            # Extract contributors
-            contributors = set()
-            for mr in merge_requests:
-                if 'author' in mr:
-                    contributors.add(mr['author'])
-            for issue in issues:
-                if issue.get('closed_by'):
-                    contributors.add(issue['closed_by'])
+            merge_requests: List[Dict] = collected.get('merge_requests', {}).get('data', [])
+            issues: List[Dict] = collected['issues']['data']
             
             return {
                 'merge_requests': merge_requests,
                 'issues': issues,
-                'commits': commits,
-                'contributors': contributors
+                'commits': collected.get('commits', {}).get('data', []),
+                'milestones': collected['milestones']['data'],
+                'from_date': from_date,
+                'to_date': to_date,
+                'contributors': collect_contributors(merge_requests, issues),
+                'project_paths': paths,
+                'collection_errors': {name: result['error']
+                                      for name, result in collected.items() if 'error' in result}
             }
             
         except Exception as e:
-            return {'error': str(e)}
\ No newline at end of file
+            if self.raise_transient and is_transient(e):
+                raise
+            return {'error': str(e)}
@@ -0,0 +1,157 @@
+"""
+Token-budgeted compaction of merge request text before categorization
+
+MR descriptions written from templates are mostly boilerplate: HTML
+comments with instructions, checklists, screenshots, pasted logs and quick
+actions. The compactor strips those, then truncates each item to a token
+budget measured with the model's tokenizer (tiktoken), so the prompt only
+carries the text that actually describes the change.
+"""
+
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from ..instrumentation import RunStats
+
+try:
+    import tiktoken
+except ImportError:  # installed with langchain-openai; fall back to a character estimate
+    tiktoken = None
+
+# Bump whenever the stripping or truncation rules change so cached categories are not reused
+COMPACTION_VERSION = '1'
+
+_HTML_COMMENT = re.compile(r'<!--.*?(?:-->|$)', re.DOTALL)
+_CODE_FENCE = re.compile(r'^\s*(```|~~~).*?(?:^\s*\1[^\n]*$|\Z)', re.DOTALL | re.MULTILINE)
+_DETAILS = re.compile(r'<details>.*?(?:</details>|\Z)', re.DOTALL | re.IGNORECASE)
+_IMAGE = re.compile(r'!\[[^\]]*\]\([^)]*\)|<img\b[^>]*>', re.IGNORECASE)
+# Lowercase HTML tags that GitLab renders in markdown; generics such as
+# List<String> or Map<K, V> are left alone
+_HTML_TAG_NAMES = (
+    'a', 'abbr', 'b', 'blockquote', 'br', 'center', 'code', 'dd', 'del', 'details', 'div', 'dl', 'dt',
+    'em', 'figcaption', 'figure', 'font', 'h[1-6]', 'hr', 'i', 'img', 'input', 'ins', 'kbd', 'li',
+    'ol', 'p', 'picture', 'pre', 's', 'samp', 'small', 'source', 'span', 'strike', 'strong', 'sub',
+    'summary', 'sup', 'table', 'tbody', 'td', 'tfoot', 'th', 'thead', 'tr', 'tt', 'u', 'ul', 'var', 'video'
+)
+_HTML_TAG = re.compile(r'</?(?:%s)(?=[\s/>])[^>]*>' % '|'.join(_HTML_TAG_NAMES))
+_CHECKLIST = re.compile(r'^\s*[-*+]\s*\[[ xX]\].*$', re.MULTILINE)
+# GitLab quick actions, which must stand at the start of their own line
+_QUICK_ACTION_VERBS = (
+    'approve', 'unapprove', 'assign', 'unassign', 'assign_reviewer', 'unassign_reviewer', 'reviewer',
+    'request_review', 'reassign', 'reassign_reviewer', 'label', 'unlabel', 'relabel', 'milestone',
+    'remilestone', 'iteration', 'remove_iteration', 'epic', 'remove_epic', 'close', 'reopen', 'merge',
+    'draft', 'ready', 'wip', 'rebase', 'squash', 'target_branch', 'title', 'due', 'remove_due_date',
+    'weight', 'clear_weight', 'estimate', 'remove_estimate', 'spend', 'remove_time_spent', 'lock',
+    'unlock', 'confidential', 'copy_metadata', 'duplicate', 'move', 'clone', 'relate', 'unrelate',
+    'blocks', 'blocked_by', 'cc', 'todo', 'done', 'subscribe', 'unsubscribe', 'award', 'react',
+    'severity', 'health_status', 'clear_health_status', 'promote', 'create_merge_request',
+    'submit_review', 'shrug', 'tableflip'
+)
+_QUICK_ACTION = re.compile(r'^\s*/(?:%s)(?=\s|$).*$' % '|'.join(_QUICK_ACTION_VERBS), re.MULTILINE)
+_TABLE_RULE = re.compile(r'^\s*\|?\s*:?-{3,}.*$', re.MULTILINE)
+_HEADING = re.compile(r'^\s*#{1,6}\s')
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+# Characters per token assumed when no tokenizer is available
+_CHARS_PER_TOKEN = 4
+
+
+def strip_boilerplate(text: str) -> str:
+    """Remove template noise from a markdown description"""
+    text = _HTML_COMMENT.sub('', text or '')
+    text = _DETAILS.sub('', text)
+    text = _CODE_FENCE.sub('', text)
+    text = _IMAGE.sub('', text)
+    text = _HTML_TAG.sub('', text)
+    text = _CHECKLIST.sub('', text)
+    text = _QUICK_ACTION.sub('', text)
+    text = _TABLE_RULE.sub('', text)
+
+    # Drop template headings whose section ended up empty
+    lines = [line.rstrip() for line in text.splitlines()]
+    kept = []
+    for i, line in enumerate(lines):
+        if _HEADING.match(line):
+            following = next((later for later in lines[i + 1:] if later.strip()), None)
+            if following is None or _HEADING.match(following):
+                continue
+        kept.append(line)
+    return _BLANK_LINES.sub('\n\n', '\n'.join(kept)).strip()
+
+
+class PromptCompactor:
+    """Strips boilerplate and truncates change text to a per-item token budget"""
+
+    # Input tokens before and after compaction, per run
+    stats = RunStats(lambda: {'items': 0, 'tokens_before': 0, 'tokens_after': 0})
+
+    def __init__(self, model_name: Optional[str] = None, max_tokens: Optional[int] = None):
+        # Token budget per change, title included; 0 disables truncation
+        self.max_tokens = max_tokens if max_tokens is not None else int(os.getenv('CATEGORIZE_MAX_TOKENS', '256'))
+        self.model_name = model_name
+        self._encoding = None
+        self._encoding_loaded = False
+
+    @property
+    def version(self) -> str:
+        """Identifies what the model is shown of a change: the rules version and the token budget"""
+        return f"{COMPACTION_VERSION}:{self.max_tokens}"
+
+    @property
+    def encoding(self):
+        """The model's tokenizer, loaded on first use; None when unavailable"""
+        if not self._encoding_loaded:
+            self._encoding_loaded = True
+            if tiktoken is not None:
+                try:
+                    name = tiktoken.encoding_name_for_model(self.model_name or '')
+                except KeyError:
+                    name = 'cl100k_base'
+                try:
+                    self._encoding = tiktoken.get_encoding(name)
+                except Exception as e:
+                    # tiktoken downloads its vocabularies on first use
+                    print(f"Tokenizer unavailable, estimating tokens from characters: {e}")
+        return self._encoding
+
+    def count_tokens(self, text: str) -> int:
+        if self.encoding is None:
+            return -(-len(text) // _CHARS_PER_TOKEN)
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def _truncate(self, text: str, budget: int) -> str:
+        if budget <= 0:
+            return ''
+        if self.encoding is None:
+            return text[:budget * _CHARS_PER_TOKEN]
+        tokens = self.encoding.encode(text, disallowed_special=())
+        return self.encoding.decode(tokens[:budget]) if len(tokens) > budget else text
+
+    def compact(self, title: str, description: str) -> Tuple[str, int, int]:
+        """Build the change text, returning (text, tokens before, tokens after)"""
+        before = self.count_tokens(f"{title} - {description}")
+        body = strip_boilerplate(description)
+        if self.max_tokens:
+            budget = self.max_tokens - self.count_tokens(f"{title} - ")
+            truncated = self._truncate(body, budget)
+            body = truncated + ' …' if truncated != body else body
+        text = f"{title} - {body}"
+        return text, before, self.count_tokens(text)
+
+    def compact_many(self, merge_requests: List[Dict]) -> List[str]:
+        """Compact change text for many merge requests and record token counts"""
+        texts = []
+        stats = self.stats
+        for mr in merge_requests:
+            text, before, after = self.compact(mr['title'], mr.get('description') or '')
+            texts.append(text)
+            stats['items'] += 1
+            stats['tokens_before'] += before
+            stats['tokens_after'] += after
+        return texts
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get token counts with the share saved by compaction"""
+        before = self.stats['tokens_before']
+        saved = 1 - self.stats['tokens_after'] / before if before else 0.0
+        return {**self.stats, 'saved_share': saved}
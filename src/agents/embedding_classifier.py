@@ -0,0 +1,177 @@
+"""
+Nearest-neighbour categorization over previously labelled merge requests
+
+Merge requests are embedded and compared against a NumPy index of
+human-approved examples from past runs. Items whose k nearest neighbours
+agree with enough confidence are categorized without a chat model call; the
+rest fall through to the LLM. The index is stored as plain `.npy` files that
+are memory-mapped at startup. Each content is stored once, and the index keeps
+only the newest EMBEDDING_INDEX_MAX_ITEMS examples.
+"""
+
+import os
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from .categorizer import CATEGORIES
+from .compaction import strip_boilerplate
+from ..instrumentation import traced_llm_call
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, see the `embeddings` extra
+    np = None
+
+
+def embedding_text(mr: Dict, max_chars: int = 2000) -> str:
+    """Text embedded for a merge request"""
+    return f"{mr['title']}\n\n{strip_boilerplate(mr.get('description'))}"[:max_chars]
+
+
+def _content_key(text: str) -> bytes:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest().encode('ascii')
+
+
+class EmbeddingIndex:
+    """Unit-normalized embeddings with category labels, persisted as .npy files"""
+
+    def __init__(self, directory: str, max_items: Optional[int] = None):
+        if np is None:
+            raise ImportError("numpy is required for the embedding index: pip install 'gitlab-release-notes[embeddings]'")
+        self.directory = directory
+        # Oldest examples are dropped beyond this many; 0 keeps everything
+        self.max_items = max_items if max_items is not None else int(os.getenv('EMBEDDING_INDEX_MAX_ITEMS', '50000'))
+        self.vectors = None
+        self.labels = None
+        self.keys = None
+        self.load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.npy")
+
+    def load(self):
+        """Memory-map the stored index, if there is one"""
+        if os.path.exists(self._path('vectors')):
+            self.vectors = np.load(self._path('vectors'), mmap_mode='r')
+            self.labels = np.load(self._path('labels'), mmap_mode='r')
+            self.keys = np.load(self._path('keys'), mmap_mode='r')
+
+    def __len__(self) -> int:
+        return 0 if self.vectors is None else len(self.vectors)
+
+    def add(self, vectors, labels: List[int], keys: List[bytes]):
+        """Append examples, replacing earlier examples with the same content, and persist"""
+        vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        labels = np.asarray(labels, dtype=np.int8)
+        keys = np.asarray(keys, dtype='S64')
+
+        # The last of repeated contents in one call wins
+        _, last = np.unique(keys[::-1], return_index=True)
+        newest = np.sort(len(keys) - 1 - last)
+        vectors, labels, keys = vectors[newest], labels[newest], keys[newest]
+
+        if len(self):
+            keep = ~np.isin(self.keys, keys)
+            vectors = np.concatenate([self.vectors[keep], vectors])
+            labels = np.concatenate([self.labels[keep], labels])
+            keys = np.concatenate([self.keys[keep], keys])
+
+        if self.max_items and len(keys) > self.max_items:
+            vectors, labels, keys = vectors[-self.max_items:], labels[-self.max_items:], keys[-self.max_items:]
+
+        os.makedirs(self.directory, exist_ok=True)
+        for name, array in (('vectors', vectors), ('labels', labels), ('keys', keys)):
+            tmp_path = self._path(f"{name}.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, self._path(name))
+        self.load()
+
+    def knn(self, queries, k: int):
+        """Return (best category index, vote confidence, top similarity) per query"""
+        queries = _normalize(np.asarray(queries, dtype=np.float32))
+        k = min(k, len(self))
+        similarities = queries @ self.vectors.T
+        top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+        top_similarities = np.take_along_axis(similarities, top, axis=1)
+
+        # Similarity-weighted vote over the neighbours' categories
+        votes = np.zeros((len(queries), len(CATEGORIES)), dtype=np.float32)
+        rows = np.repeat(np.arange(len(queries)), k)
+        np.add.at(votes, (rows, np.asarray(self.labels)[top].ravel()), np.clip(top_similarities, 0, None).ravel())
+        totals = votes.sum(axis=1)
+        confidence = np.divide(votes.max(axis=1), totals, out=np.zeros_like(totals), where=totals > 0)
+        return votes.argmax(axis=1), confidence, top_similarities.max(axis=1)
+
+
+class EmbeddingClassifier:
+    """Categorizes merge requests from their nearest labelled neighbours"""
+
+    def __init__(self, embeddings, index_path: Optional[str] = None, k: Optional[int] = None,
+                 min_confidence: Optional[float] = None, min_similarity: Optional[float] = None,
+                 max_vectors: Optional[int] = None):
+        self.embeddings = embeddings
+        self.index = EmbeddingIndex(index_path or os.getenv('EMBEDDING_INDEX_PATH', '.release_notes_cache/embeddings'))
+        self.k = k or int(os.getenv('EMBEDDING_K', '5'))
+        self.min_confidence = min_confidence or float(os.getenv('EMBEDDING_MIN_CONFIDENCE', '0.8'))
+        self.min_similarity = min_similarity or float(os.getenv('EMBEDDING_MIN_SIMILARITY', '0.8'))
+
+        # Vectors embedded recently, reused when learning; least recently used are evicted
+        self._vectors: Dict[bytes, List[float]] = OrderedDict()
+        self.max_vectors = max_vectors or int(os.getenv('EMBEDDING_VECTOR_CACHE_SIZE', '10000'))
+        self.stats = {'items': 0, 'resolved': 0}
+
+    async def _embed(self, texts: List[str]):
+        keys = [_content_key(text) for text in texts]
+        found = {}
+        for key in keys:
+            if key in self._vectors:
+                self._vectors.move_to_end(key)
+                found[key] = self._vectors[key]
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            vectors = await traced_llm_call('embed', self.embeddings.aembed_documents([texts[i] for i in missing]),
+                                            items=len(missing))
+            for i, vector in zip(missing, vectors):
+                found[keys[i]] = self._vectors[keys[i]] = vector
+        while len(self._vectors) > self.max_vectors:
+            self._vectors.popitem(last=False)
+        return keys, np.asarray([found[key] for key in keys], dtype=np.float32)
+
+    async def classify(self, merge_requests: List[Dict]) -> Dict[int, str]:
+        """Categorize the confident items, returning {index: category}"""
+        if not merge_requests or not len(self.index):
+            return {}
+        _, vectors = await self._embed([embedding_text(mr) for mr in merge_requests])
+        best, confidence, similarity = self.index.knn(vectors, self.k)
+
+        confident = (confidence >= self.min_confidence) & (similarity >= self.min_similarity)
+        resolved = {int(i): CATEGORIES[best[i]] for i in np.flatnonzero(confident)}
+        self.stats['items'] += len(merge_requests)
+        self.stats['resolved'] += len(resolved)
+        print(f"Embedding index resolved {len(resolved)}/{len(merge_requests)} changes")
+        return resolved
+
+    async def learn(self, categorized: Dict[str, List[Dict]]):
+        """Add approved categorizations to the index
+
+        Callers pass only trusted labels; WriterAgent.learn_categories drops
+        fallbacks and labels the index produced itself.
+        """
+        texts, labels = [], []
+        for category, merge_requests in categorized.items():
+            if category not in CATEGORIES:
+                continue
+            for mr in merge_requests:
+                texts.append(embedding_text(mr))
+                labels.append(CATEGORIES.index(category))
+        if not texts:
+            return
+        keys, vectors = await self._embed(texts)
+        self.index.add(vectors, labels, keys)
+        print(f"Embedding index now holds {len(self.index)} labelled changes")
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
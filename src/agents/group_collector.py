@@ -0,0 +1,161 @@
+import os
+import time
+import asyncio
+from typing import Dict, Any, List, Optional
+from urllib.parse import quote
+import gitlab
+from .collector import CollectorAgent
+from ..tools.gitlab_langchain_tools import GitLabLangChainTools, connect_gitlab
+from ..tools.gitlab_async_client import AsyncGitLabClient
+from ..tools.scheduler import AdaptiveScheduler, is_transient
+from ..records import with_fields
+
+
+class GroupCollector:
+    """Collects many projects through a bounded worker pool sharing one connection"""
+
+    def __init__(self, max_workers: Optional[int] = None, transport: Optional[str] = None,
+                 async_client: Optional[AsyncGitLabClient] = None, gitlab_api: Optional[gitlab.Gitlab] = None,
+                 shared_tools: Optional[GitLabLangChainTools] = None, raise_transient: bool = False,
+                 **tools_kwargs):
+        # Projects collected at the same time
+        self.max_workers = max_workers or int(os.getenv('GROUP_MAX_WORKERS', '4'))
+        # Raise transient GitLab failures instead of recording them (see CollectorAgent)
+        self.raise_transient = raise_transient
+        self.transport = transport or os.getenv('GITLAB_TRANSPORT', 'python-gitlab')
+        self.async_client = async_client
+        self.gitlab_api = gitlab_api
+        # Rate-limit scheduler of the python-gitlab connection, shared like the connection itself
+        self.scheduler: Optional[AdaptiveScheduler] = None
+        # Single-project tools whose (lazily opened) connection is reused
+        self.shared_tools = shared_tools
+        # Extra keyword arguments for every per-project GitLabLangChainTools
+        self.tools_kwargs = tools_kwargs
+        self._tools: Dict[str, GitLabLangChainTools] = {}
+
+    def _connection(self) -> Dict[str, Any]:
+        """Get the single connection every project shares, creating it on first use"""
+        if self.shared_tools is not None and self.async_client is None and self.gitlab_api is None:
+            if self.shared_tools.async_client is not None:
+                self.async_client = self.shared_tools.async_client
+            else:
+                self.gitlab_api = self.shared_tools.gitlab_api
+                self.scheduler = self.shared_tools.scheduler
+        if self.transport == 'async' or self.async_client is not None:
+            if self.async_client is None:
+                self.async_client = AsyncGitLabClient(
+                    max_concurrency=int(os.getenv('GITLAB_MAX_CONCURRENCY', '8'))
+                )
+            return {'async_client': self.async_client}
+        if self.scheduler is None:
+            self.scheduler = AdaptiveScheduler('gitlab', int(os.getenv('GITLAB_MAX_CONCURRENCY', '8')))
+        if self.gitlab_api is None:
+            self.gitlab_api = connect_gitlab(self.scheduler)
+        return {'gitlab_api': self.gitlab_api, 'scheduler': self.scheduler}
+
+    def tools_for(self, project_id: str) -> GitLabLangChainTools:
+        """Get the tools bound to a project, reusing the shared connection"""
+        if project_id not in self._tools:
+            self._tools[project_id] = GitLabLangChainTools(
+                project_id=project_id, **self._connection(), **self.tools_kwargs
+            )
+        return self._tools[project_id]
+
+    async def discover_projects(self, group_id: str) -> List[str]:
+        """List the non-archived projects of a group, including subgroups"""
+        connection = self._connection()
+        filters = {'include_subgroups': True, 'archived': False, 'with_shared': False}
+        if 'async_client' in connection:
+            path = f"groups/{quote(str(group_id), safe='')}/projects"
+            projects = await connection['async_client'].list_all(path, keyset=True, **filters)
+        else:
+            group = connection['gitlab_api'].groups.get(group_id, lazy=True)
+            projects = await connection['scheduler'].run(lambda: asyncio.to_thread(
+                lambda: [p.attributes for p in group.projects.list(iterator=True, **filters)]
+            ))
+        return sorted(project['path_with_namespace'] for project in projects)
+
+    async def run_async(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """Collect every project in the group (or explicit project list) and merge the results"""
+        try:
+            project_ids = list(state.get('project_ids') or [])
+            if not project_ids and state.get('group_id'):
+                project_ids = await self.discover_projects(state['group_id'])
+            if not project_ids:
+                raise ValueError("group_id or project_ids is required in state")
+            print(f"Collecting {len(project_ids)} projects with {self.max_workers} workers")
+
+            semaphore = asyncio.Semaphore(self.max_workers)
+
+            async def collect(project_id: str) -> Dict[str, Any]:
+                async with semaphore:
+                    started = time.perf_counter()
+                    try:
+                        collector = CollectorAgent(self.tools_for(project_id), raise_transient=self.raise_transient)
+                        result = await collector.run_async({**state, 'project_id': project_id})
+                    except Exception as e:
+                        if self.raise_transient and is_transient(e):
+                            raise
+                        result = {'error': str(e)}
+                    result['seconds'] = time.perf_counter() - started
+                    if result.get('error'):
+                        print(f"Error collecting project {project_id}: {result['error']}")
+                    return result
+
+            results = await asyncio.gather(*(collect(project_id) for project_id in project_ids))
+            return merge_project_results(dict(zip(project_ids, results)))
+
+        except Exception as e:
+            if self.raise_transient and is_transient(e):
+                raise
+            return {'error': str(e)}
+
+    async def aclose(self):
+        """Close the shared connection pool"""
+        if self.async_client is not None:
+            await self.async_client.aclose()
+
+
+def merge_project_results(results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-project collector results into one state update
+
+    Items are tagged with their project and a cross-project reference
+    (`group/project!123`, `group/project#45`) since iids are only unique per project.
+    """
+    merged = {
+        'merge_requests': [],
+        'issues': [],
+        'commits': [],
+        'milestones': [],
+        'contributors': set(),
+        'collection_errors': {},
+        'project_stats': {},
+        'project_paths': {}
+    }
+
+    for project_id, result in results.items():
+        merged['project_stats'][project_id] = {
+            'seconds': round(result.get('seconds', 0.0), 3),
+            'merge_requests': len(result.get('merge_requests', [])),
+            'issues': len(result.get('issues', [])),
+            'commits': len(result.get('commits', [])),
+            'error': result.get('error')
+        }
+        if result.get('error'):
+            merged['collection_errors'][project_id] = result['error']
+            continue
+
+        for name, error in result.get('collection_errors', {}).items():
+            merged['collection_errors'][f"{project_id}:{name}"] = error
+        for mr in result.get('merge_requests', []):
+            merged['merge_requests'].append(with_fields(mr, project=project_id, reference=f"{project_id}!{mr['iid']}"))
+        for issue in result.get('issues', []):
+            merged['issues'].append(with_fields(issue, project=project_id, reference=f"{project_id}#{issue['iid']}"))
+        for commit in result.get('commits', []):
+            merged['commits'].append(with_fields(commit, project=project_id))
+        for milestone in result.get('milestones', []):
+            merged['milestones'].append({**milestone, 'project': project_id})
+        merged['contributors'].update(result.get('contributors', set()))
+        merged['project_paths'].update(result.get('project_paths', {}))
+
+    return merged
@@ -0,0 +1,141 @@
+"""
+Diff statistics and change-impact scores for merge requests
+
+The enricher fetches the diff summary of a page of merge requests per
+GraphQL call through a bounded number of concurrent requests, caching stats
+by project and merge request since a merged change never changes. Files,
+changed lines and touched top-level paths are aggregated into release
+statistics and per-change impact scores. Scores order and trim the rendered
+sections, and changes below `LLM_MIN_IMPACT` are listed in bulk instead of
+being sent to the model, so enrichment runs before categorization.
+"""
+
+import os
+import math
+import asyncio
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from ..tools.gitlab_langchain_tools import GitLabLangChainTools, LIST_PAGE_SIZE
+from ..records import with_fields
+
+try:
+    import numpy as np
+except ImportError:  # optional, scores are computed in pure Python without it
+    np = None
+
+# Weights of log(lines changed), log(files changed) and distinct top-level paths
+IMPACT_WEIGHTS = (1.0, 0.5, 0.75)
+# Lines, files and top-level paths of a change scoring 1; larger changes are capped there.
+# A fixed scale scores each streamed page the same way as a whole release.
+IMPACT_REFERENCE = (1000, 50, 5)
+
+
+def impact_scores(lines: Sequence[int], files: Sequence[int], paths: Sequence[int]) -> List[float]:
+    """Impact of each change relative to IMPACT_REFERENCE, in [0, 1]"""
+    w_lines, w_files, w_paths = IMPACT_WEIGHTS
+    ref_lines, ref_files, ref_paths = IMPACT_REFERENCE
+    top = w_lines * math.log1p(ref_lines) + w_files * math.log1p(ref_files) + w_paths * ref_paths
+    if np is not None:
+        raw = (w_lines * np.log1p(np.asarray(lines, dtype=float))
+               + w_files * np.log1p(np.asarray(files, dtype=float))
+               + w_paths * np.asarray(paths, dtype=float))
+        return np.minimum(raw / top, 1.0).round(4).tolist()
+    raw = [w_lines * math.log1p(n_lines) + w_files * math.log1p(n_files) + w_paths * n_paths
+           for n_lines, n_files, n_paths in zip(lines, files, paths)]
+    return [round(min(score / top, 1.0), 4) for score in raw]
+
+
+def release_statistics(stats: Sequence[Optional[Dict]]) -> Dict[str, Any]:
+    """Diff statistics and most-touched top-level paths of the changes with known stats"""
+    known = [item for item in stats if item]
+    touched = Counter(path for item in known for path in item['paths'])
+    return {
+        'statistics': {
+            'files_changed': sum(item['files'] for item in known),
+            'lines_added': sum(item['additions'] for item in known),
+            'lines_removed': sum(item['deletions'] for item in known),
+            'paths_touched': len(touched)
+        },
+        'top_paths': dict(touched.most_common(10))
+    }
+
+
+class DiffStatsEnricher:
+    """Adds diff stats and impact scores to collected merge requests"""
+
+    def __init__(self, max_concurrency: Optional[int] = None, cache_size: Optional[int] = None):
+        # Stats requests in flight, kept below the collection budget
+        self.max_concurrency = max_concurrency or int(os.getenv('DIFF_STATS_CONCURRENCY', '4'))
+        # Stats of this many merge requests are kept between runs, keyed by (project, iid)
+        self.cache_size = cache_size or int(os.getenv('DIFF_STATS_CACHE_SIZE', '50000'))
+        self.cache: 'OrderedDict[Tuple[Optional[str], int], Dict[str, Any]]' = OrderedDict()
+
+    async def _project_stats(self, tools: GitLabLangChainTools, iids: List[int],
+                             slots: asyncio.Semaphore) -> Dict[int, Dict]:
+        missing = [iid for iid in dict.fromkeys(iids) if (tools.project_id, iid) not in self.cache]
+
+        async def fetch(batch: List[int]) -> Dict[int, Dict]:
+            async with slots:
+                try:
+                    return await tools.get_diff_stats(batch)
+                except Exception:
+                    # Changes without stats keep their place; enrichment never fails a run
+                    return {}
+
+        batches = [missing[i:i + LIST_PAGE_SIZE] for i in range(0, len(missing), LIST_PAGE_SIZE)]
+        for fetched in await asyncio.gather(*(fetch(batch) for batch in batches)):
+            for iid, stats in fetched.items():
+                self.cache[(tools.project_id, iid)] = stats
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        found = {}
+        for iid in iids:
+            key = (tools.project_id, iid)
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                found[iid] = self.cache[key]
+        return found
+
+    async def enrich_items(self, merge_requests: Sequence[Any],
+                           tools_for: Callable[[Optional[str]], GitLabLangChainTools]) -> Tuple[List[Any], List[Optional[Dict]]]:
+        """Return the merge requests with diff stats and impact, and the stats of each (None if unknown)
+
+        Args:
+            merge_requests: Merge requests of a release, or one page of them
+            tools_for: GitLab tools of an item's project (None for single-project runs)
+        """
+        by_project: Dict[Optional[str], List[int]] = defaultdict(list)
+        for mr in merge_requests:
+            by_project[mr.get('project')].append(mr['iid'])
+        slots = asyncio.Semaphore(self.max_concurrency)
+        projects = list(by_project)
+        found = dict(zip(projects, await asyncio.gather(*(
+            self._project_stats(tools_for(project), by_project[project], slots) for project in projects
+        ))))
+
+        stats = [found[mr.get('project')].get(mr['iid']) for mr in merge_requests]
+        files = [item['files'] if item else 0 for item in stats]
+        lines = [item['additions'] + item['deletions'] if item else 0 for item in stats]
+        paths = [len(item['paths']) if item else 0 for item in stats]
+        scores = impact_scores(lines, files, paths)
+        enriched = [
+            with_fields(mr, files_changed=files[i], lines_changed=lines[i], impact=scores[i]) if item else mr
+            for i, (mr, item) in enumerate(zip(merge_requests, stats))
+        ]
+        return enriched, stats
+
+    def report(self, stats: Sequence[Optional[Dict]]):
+        print(f"Diff stats for {sum(1 for item in stats if item)}/{len(stats)} merge requests")
+
+    async def enrich(self, collected: Dict[str, Any],
+                     tools_for: Callable[[Optional[str]], GitLabLangChainTools]) -> Dict[str, Any]:
+        """Return the merge requests with diff stats and impact, and the release's diff statistics
+
+        Args:
+            collected: Collected state with `merge_requests` (linked, if linking is on)
+            tools_for: GitLab tools of an item's project (None for single-project runs)
+        """
+        enriched, stats = await self.enrich_items(collected.get('merge_requests') or [], tools_for)
+        self.report(stats)
+        return {'merge_requests': enriched, **release_statistics(stats)}
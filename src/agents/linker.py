@@ -0,0 +1,232 @@
+"""
+Linking of merge requests, commits and issues into one record per change
+
+The same change usually appears three times in collected data: as a merge
+request, as its merge or squash commit, and as the issue it closes. Backports
+and cherry-picks add near-identical merge requests on top. The linker
+attaches commits and closed issues to their merge request through hash
+indexes and collapses near-duplicate titles (MinHash signatures bucketed
+with LSH) so each change is categorized and listed once. Similar titles
+alone are not enough: generic titles ("Fix typo", "Bump version") repeat
+across unrelated changes, so two merge requests are only folded together
+when they also share a commit, one cherry-picks the other, or they merge
+the same source branch into different target branches.
+"""
+
+import os
+import re
+import struct
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+from ..tools.gitlab_langchain_tools import MERGE_REQUEST_REF
+from ..records import with_fields
+
+# GitLab's default issue closing pattern, e.g. "Closes #12", "fixes group/project#3 and #4"
+CLOSING_PATTERN = re.compile(
+    r'\b(?:clos(?:e|es|ed|ing)|fix(?:es|ed|ing)?|resolv(?:e|es|ed|ing)|implement(?:s|ed|ing)?)'
+    r':?\s+((?:[\w.\-/]*#\d+(?:\s*(?:,|and)\s*)?)+)',
+    re.IGNORECASE
+)
+ISSUE_REF = re.compile(r'(?P<project>[\w.\-]+(?:/[\w.\-]+)+)?#(?P<iid>\d+)')
+
+# Title noise ignored when comparing: draft markers, version tags, references
+_TITLE_NOISE = re.compile(r'^\s*(?:draft|wip)\s*:\s*|\[[^\]]*\]|\([^)]*[#!]\d+\)|[#!]\d+', re.IGNORECASE)
+_WORD = re.compile(r'[a-z0-9]+')
+
+# Trailer git and GitLab add to cherry-picked commits
+CHERRY_PICK_REF = re.compile(r'cherry[- ]picked from commit ([0-9a-f]{7,40})', re.IGNORECASE)
+
+def closed_issue_refs(text: str, project: Optional[str] = None) -> List[Tuple[Optional[str], int]]:
+    """Get (project, iid) pairs for the issues a description or commit message closes"""
+    refs = []
+    for match in CLOSING_PATTERN.finditer(text or ''):
+        for ref in ISSUE_REF.finditer(match.group(1)):
+            refs.append((ref.group('project') or project, int(ref.group('iid'))))
+    return refs
+
+
+def title_shingles(title: str) -> set:
+    """Word unigrams and bigrams of a normalized title"""
+    words = _WORD.findall(_TITLE_NOISE.sub(' ', (title or '').lower()))
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+class MinHasher:
+    """MinHash signatures over shingle sets
+
+    Each shingle is hashed once into `num_perm` independent 32-bit values
+    (one SHAKE digest); a signature is their elementwise minimum.
+    """
+
+    def __init__(self, num_perm: int = 32):
+        self.num_perm = num_perm
+        self._format = struct.Struct(f'>{num_perm}I')
+        self._hashes: Dict[str, Tuple[int, ...]] = {}
+
+    def _shingle_hashes(self, shingle: str) -> Tuple[int, ...]:
+        hashes = self._hashes.get(shingle)
+        if hashes is None:
+            digest = hashlib.shake_256(shingle.encode('utf-8')).digest(4 * self.num_perm)
+            hashes = self._hashes[shingle] = self._format.unpack(digest)
+        return hashes
+
+    def signature(self, shingles: set) -> Tuple[int, ...]:
+        if not shingles:
+            return ()
+        return tuple(map(min, zip(*(self._shingle_hashes(s) for s in shingles))))
+
+
+def estimated_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """Estimate Jaccard similarity from two signatures"""
+    if not left or not right:
+        return 0.0
+    return sum(a == b for a, b in zip(left, right)) / len(left)
+
+
+class ChangeLinker:
+    """Collapses collected merge requests, commits and issues into one record per change"""
+
+    def __init__(self, threshold: Optional[float] = None, num_perm: int = 32, bands: int = 8):
+        # Estimated title similarity at which two changes count as the same
+        self.threshold = threshold or float(os.getenv('LINK_TITLE_THRESHOLD', '0.8'))
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+
+    def _near_duplicates(self, titles: List[str],
+                         same_change: Optional[Callable[[int, int], bool]] = None) -> List[int]:
+        """Cluster titles, returning the representative index of each title
+
+        With `same_change`, similar titles are only clustered when it also
+        confirms the pair.
+        """
+        parent = list(range(len(titles)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        # Reverts share their subject's title but are separate changes
+        signatures = [() if title.lower().startswith('revert') else self.hasher.signature(title_shingles(title))
+                      for title in titles]
+
+        # Only signatures sharing an LSH band bucket are compared
+        buckets: Dict[Tuple, List[int]] = {}
+        for i, signature in enumerate(signatures):
+            for band in range(len(signature) // self.rows):
+                key = (band, signature[band * self.rows:(band + 1) * self.rows])
+                buckets.setdefault(key, []).append(i)
+
+        for members in buckets.values():
+            for position, other in enumerate(members[1:], 1):
+                for earlier in members[:position]:
+                    if find(other) == find(earlier):
+                        break
+                    if estimated_similarity(signatures[earlier], signatures[other]) < self.threshold:
+                        continue
+                    if same_change is not None and not same_change(earlier, other):
+                        continue
+                    # The earliest collected item represents the cluster
+                    low, high = sorted((find(earlier), find(other)))
+                    parent[high] = low
+                    break
+        return [find(i) for i in range(len(titles))]
+
+    def _evidence(self, records: List[Dict], commits: List[Dict],
+                  project_id: Optional[str]) -> Callable[[int, int], bool]:
+        """Check whether two merge requests are provably the same change, beyond their titles"""
+        messages = {commit['id']: commit.get('message') or '' for commit in commits}
+        shas, picked = [], []
+        for record in records:
+            own = {record[field] for field in ('merge_commit_sha', 'squash_commit_sha') if record.get(field)}
+            own.update(record['commits'])
+            shas.append(own)
+            texts = [record.get('description') or ''] + [messages.get(sha, '') for sha in record['commits']]
+            picked.append({ref.lower() for text in texts for ref in CHERRY_PICK_REF.findall(text)})
+
+        def cherry_picks(i: int, j: int) -> bool:
+            return any(sha.startswith(ref) for ref in picked[i] for sha in shas[j])
+
+        def same_change(i: int, j: int) -> bool:
+            if shas[i] & shas[j] or cherry_picks(i, j) or cherry_picks(j, i):
+                return True
+            left, right = records[i], records[j]
+            return (left.get('project', project_id) == right.get('project', project_id)
+                    and bool(left.get('source_branch')) and left.get('source_branch') == right.get('source_branch')
+                    and left.get('target_branch') != right.get('target_branch'))
+
+        return same_change
+
+    def link(self, state: Dict) -> Dict:
+        """Return the collapsed merge requests and linking statistics"""
+        return self.link_indexed(state)[0]
+
+    def link_indexed(self, state: Dict) -> Tuple[Dict, List[int]]:
+        """Link and collapse, also returning the original index of each kept merge request"""
+        merge_requests = state.get('merge_requests') or []
+        commits = state.get('commits') or []
+        issues = state.get('issues') or []
+        project_id = state.get('project_id')
+
+        records = [with_fields(mr, commits=[], closes_issues=[], duplicates=[]) for mr in merge_requests]
+
+        # Hash indexes: MR by (project, iid) and by merge/squash SHA, issue by (project, iid)
+        by_iid = {(mr.get('project', project_id), mr['iid']): i for i, mr in enumerate(records)}
+        by_sha = {mr[field]: i for i, mr in enumerate(records)
+                  for field in ('merge_commit_sha', 'squash_commit_sha') if mr.get(field)}
+        issues_by_iid = {(issue.get('project', project_id), issue['iid']): issue for issue in issues}
+
+        # Commits join their merge request by SHA, collector attribution or merge trailer
+        linked_commits = 0
+        for commit in commits:
+            project = commit.get('project', project_id)
+            target = by_sha.get(commit['id'])
+            if target is None and commit.get('merge_request_iid') is not None:
+                target = by_iid.get((project, commit['merge_request_iid']))
+            if target is None:
+                match = MERGE_REQUEST_REF.search(commit.get('message') or '')
+                if match:
+                    target = by_iid.get((project, int(match.group(1))))
+            if target is not None:
+                records[target]['commits'].append(commit['id'])
+                linked_commits += 1
+
+        # Closing references in descriptions link issues
+        linked_issues = set()
+        for record in records:
+            project = record.get('project', project_id)
+            for ref in closed_issue_refs(record.get('description'), project):
+                issue = issues_by_iid.get(ref)
+                if issue is not None and ref not in linked_issues:
+                    linked_issues.add(ref)
+                    record['closes_issues'].append(issue.get('reference', f"#{issue['iid']}"))
+
+        # Near-duplicate merge requests (backports, cherry-picks) fold into the first one
+        representatives = self._near_duplicates([record['title'] for record in records],
+                                                self._evidence(records, commits, project_id))
+        collapsed, kept = [], []
+        for i, record in enumerate(records):
+            rep = representatives[i]
+            if rep == i:
+                collapsed.append(record)
+                kept.append(i)
+                continue
+            target = records[rep]
+            target['duplicates'].append(record.get('reference', f"#{record['iid']}"))
+            target['commits'].extend(record['commits'])
+            target['closes_issues'].extend(ref for ref in record['closes_issues']
+                                           if ref not in target['closes_issues'])
+            target['labels'] = list(dict.fromkeys((target.get('labels') or []) + (record.get('labels') or [])))
+
+        stats = {
+            'merge_requests_in': len(merge_requests),
+            'merge_requests_out': len(collapsed),
+            'near_duplicates': len(merge_requests) - len(collapsed),
+            'commits_linked': linked_commits,
+            'issues_linked': len(linked_issues)
+        }
+        print(f"Linked {linked_commits} commits and {len(linked_issues)} issues; "
+              f"collapsed {stats['near_duplicates']} near-duplicate merge requests")
+        return {'merge_requests': collapsed, 'link_stats': stats}, kept
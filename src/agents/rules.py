@@ -0,0 +1,159 @@
+"""
+Deterministic pre-classification of merge requests
+
+Obvious changes are categorized locally from their labels, conventional
+commit style titles (`feat:`, `fix(api):`, `refactor!:`) and branch names
+(`fix/...`), so only ambiguous items need an LLM call. Rules can be
+overridden per project with a JSON file (see CATEGORY_RULES_PATH).
+"""
+
+import os
+import re
+import json
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_RULES = {
+    # Label (case-insensitive) -> category
+    'labels': {
+        'breaking': ['breaking', 'breaking change', 'breaking-change', 'type::breaking'],
+        'fixes': ['bug', 'bugfix', 'fix', 'type::bug', 'regression'],
+        'features': ['feature', 'enhancement', 'type::feature', 'new feature'],
+        'performance': ['performance', 'perf', 'type::performance'],
+        'documentation': ['documentation', 'docs', 'type::documentation']
+    },
+    # Conventional commit type in the title -> category
+    'title_prefixes': {
+        'features': ['feat', 'feature'],
+        'fixes': ['fix', 'bugfix', 'hotfix'],
+        'performance': ['perf'],
+        'documentation': ['docs', 'doc']
+    },
+    # Leading branch name segment -> category
+    'branch_prefixes': {
+        'features': ['feat', 'feature'],
+        'fixes': ['fix', 'bugfix', 'hotfix', 'bug'],
+        'performance': ['perf'],
+        'documentation': ['docs', 'doc']
+    }
+}
+
+_CONVENTIONAL_TITLE = re.compile(r'^\s*(?P<type>[a-z]+)(?:\([^)]*\))?(?P<bang>!)?:\s', re.IGNORECASE)
+_BRANCH_PREFIX = re.compile(r'^(?P<prefix>[a-z]+)[/_-]', re.IGNORECASE)
+_BREAKING_FOOTER = re.compile(r'^BREAKING[ -]CHANGE:', re.MULTILINE)
+
+
+class CompiledRules:
+    """Lookup tables for one rule set, built from rule layers applied in order
+
+    A key listed by a later layer (the project's overrides after the
+    defaults) wins over the same key in an earlier one, even when the
+    earlier layer files it under another category.
+    """
+
+    def __init__(self, *layers: Dict):
+        self.labels = _invert([layer.get('labels', {}) for layer in layers])
+        self.title_prefixes = _invert([layer.get('title_prefixes', {}) for layer in layers])
+        self.branch_prefixes = _invert([layer.get('branch_prefixes', {}) for layer in layers])
+
+    def classify(self, mr: Dict) -> Optional[str]:
+        """Categorize a merge request, or return None when the rules do not decide"""
+        title_match = _CONVENTIONAL_TITLE.match(mr.get('title') or '')
+        if (title_match and title_match.group('bang')) or _BREAKING_FOOTER.search(mr.get('description') or ''):
+            return 'breaking'
+
+        # Labels win, but only when they agree on a single category
+        label_categories = {self.labels[label.lower()] for label in mr.get('labels') or []
+                            if label.lower() in self.labels}
+        if 'breaking' in label_categories:
+            return 'breaking'
+        if len(label_categories) > 1:
+            return None
+        if label_categories:
+            return label_categories.pop()
+
+        if title_match:
+            category = self.title_prefixes.get(title_match.group('type').lower())
+            if category:
+                return category
+
+        branch_match = _BRANCH_PREFIX.match(mr.get('source_branch') or '')
+        if branch_match:
+            return self.branch_prefixes.get(branch_match.group('prefix').lower())
+        return None
+
+
+class RuleClassifier:
+    """Per-project rule engine with resolution statistics"""
+
+    def __init__(self, rules: Optional[Dict] = None, path: Optional[str] = None):
+        # Config shape: {"default": {...rules}, "projects": {"group/project": {...rules}}};
+        # projects are keyed by full path or numeric ID
+        path = path or os.getenv('CATEGORY_RULES_PATH')
+        if rules is None and path:
+            with open(path) as f:
+                rules = json.load(f)
+        rules = rules or {}
+
+        self.default = _merge(DEFAULT_RULES, rules.get('default', {}))
+        self.project_rules = {str(project): overrides for project, overrides in rules.get('projects', {}).items()}
+        self._layers = (DEFAULT_RULES, rules.get('default', {}))
+        self._compiled: Dict[Optional[str], CompiledRules] = {None: CompiledRules(*self._layers)}
+        # Numeric project ID -> full path, so path-keyed overrides apply to projects given by ID
+        self.project_paths: Dict[str, str] = {}
+
+        self.stats = {'items': 0, 'resolved': 0}
+
+    def add_project_paths(self, paths: Dict[str, str]):
+        """Register the full paths of numeric project IDs"""
+        for project_id, path in paths.items():
+            if self.project_paths.get(str(project_id)) != path:
+                self.project_paths[str(project_id)] = path
+                self._compiled.pop(str(project_id), None)
+
+    def _rules_for(self, project: Optional[str]) -> CompiledRules:
+        key = str(project) if project is not None else None
+        if key not in self._compiled:
+            overrides = self.project_rules.get(self.project_paths.get(key, key)) or self.project_rules.get(key)
+            self._compiled[key] = CompiledRules(*self._layers, overrides) if overrides else self._compiled[None]
+        return self._compiled[key]
+
+    def classify_many(self, merge_requests: Iterable[Dict], project: Optional[str] = None) -> Dict[int, str]:
+        """Categorize what the rules can decide, returning {index: category}"""
+        resolved = {}
+        count = 0
+        for i, mr in enumerate(merge_requests):
+            count += 1
+            category = self._rules_for(mr.get('project', project)).classify(mr)
+            if category:
+                resolved[i] = category
+        self.stats['items'] += count
+        self.stats['resolved'] += len(resolved)
+        return resolved
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get the share of items resolved without a model call"""
+        items = self.stats['items']
+        return {**self.stats, 'resolved_share': self.stats['resolved'] / items if items else 0.0}
+
+
+def _invert(layers: List[Dict[str, List[str]]]) -> Dict[str, str]:
+    """Turn layers of {category: [keys]} into {key: category}
+
+    A category listed in a later layer replaces its earlier entry, and the
+    later layer's keys are applied last.
+    """
+    table = {}
+    for i, mapping in enumerate(layers):
+        replaced = {category for later in layers[i + 1:] for category in later}
+        for category, keys in mapping.items():
+            if category not in replaced:
+                table.update((key.lower(), category) for key in keys)
+    return table
+
+
+def _merge(base: Dict, overrides: Dict) -> Dict:
+    """Overlay rule sections; a category listed in an override replaces the base entry"""
+    merged = {section: dict(entries) for section, entries in base.items()}
+    for section, entries in (overrides or {}).items():
+        merged.setdefault(section, {}).update(entries)
+    return merged
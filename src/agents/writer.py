@@ -1,11 +1,106 @@
-from typing import Dict, Any, List
-from langchain_openai import ChatOpenAI
+import os
+import time
+from functools import cached_property
+from typing import Dict, Any, Callable, List, Optional, Tuple, Union
+from langchain_core.language_models import BaseChatModel, BaseLanguageModel
 from langchain.prompts import ChatPromptTemplate
-from langchain.schema import BaseMessage
+from .categorizer import BatchCategorizer, PROMPT_VERSION
+from .rules import RuleClassifier
+from .embedding_classifier import EmbeddingClassifier
+from .compaction import PromptCompactor
+from ..storage.categorization_cache import CategorizationCache, cache_key, DEFAULT_CACHE_PATH
+from ..storage.journal import CategorizationJournal
+from ..instrumentation import record_llm_call, traced_llm_call
+
+
+class IncompleteCategorization(RuntimeError):
+    """A journaled run left changes uncategorized; resuming it retries only those"""
+
+
+def change_reference(mr: Dict) -> str:
+    """Reference of a merge request, project-qualified in group runs"""
+    return mr.get('reference', '#' + str(mr['iid']))
+
+
+def format_change(mr: Dict) -> str:
+    """Release notes line for a merge request, listing any collapsed duplicates"""
+    references = [change_reference(mr)] + mr.get('duplicates', [])
+    return f"- {mr['title']} ({', '.join(references)})"
+
+
+# Where a category came from. The journal and the cache only hold model answers,
+# so their hits count as 'model'; 'neighbours' (the embedding index), 'impact'
+# (below LLM_MIN_IMPACT) and 'failed' (every attempt failed) are not labels
+# anyone decided on and are never learned as examples.
+LEARNABLE_SOURCES = ('rules', 'model')
+
+
+# Categories with a section in the notes, in order
+SECTION_HEADINGS = [
+    ('features', "## ✨ New Features"),
+    ('fixes', "## 🐛 Bug Fixes"),
+    ('breaking', "## ⚠️ Breaking Changes")
+]
+
+
+def rank_changes(changes: List[Dict], max_items: int = 0) -> List[str]:
+    """Section lines, highest impact first when diff stats are known, trimmed to max_items"""
+    if any(mr.get('impact') is not None for mr in changes):
+        changes = sorted(changes, key=lambda mr: mr.get('impact') or 0.0, reverse=True)
+    lines = [format_change(mr) for mr in changes]
+    if max_items and len(lines) > max_items:
+        lines = lines[:max_items] + [f"- …and {len(lines) - max_items} smaller changes"]
+    return lines
+
+
+def render_markdown(title: Optional[str], sections: Dict[str, List[str]], contributors=None) -> str:
+    """Assemble the markdown release notes from rendered section lines"""
+    markdown_parts = [f"# Release Notes - {title}\n"]
+    for category, heading in SECTION_HEADINGS:
+        if sections.get(category):
+            markdown_parts.append(f"\n{heading}")
+            markdown_parts.extend(sections[category])
+    
+    # Contributors
+    if contributors:
+        markdown_parts.append("\n## 👥 Contributors")
+        markdown_parts.append(f"Thanks to: {', '.join(sorted(contributors))}")
+    return '\n'.join(markdown_parts)
+
 
 class WriterAgent:
-    def __init__(self, llm: ChatOpenAI):
-        self.llm = llm
+    def __init__(self, llm: Union[BaseChatModel, Callable[[], BaseChatModel]],
+                 cache: Optional[CategorizationCache] = None,
+                 rules: Optional[RuleClassifier] = None, embeddings: Optional[EmbeddingClassifier] = None,
+                 journal: Optional[CategorizationJournal] = None):
+        # A chat model, or a zero-argument factory called on first use
+        self._llm = llm
+        
+        # Set CATEGORY_CACHE_PATH to an empty string to disable the on-disk cache
+        if cache is None and os.getenv('CATEGORY_CACHE_PATH', DEFAULT_CACHE_PATH):
+            cache = CategorizationCache()
+        self.cache = cache
+        # Per-run journal of completed batches, used when the graph is checkpointed
+        self.journal = journal
+        
+        # Set CATEGORY_RULES=false to send every change to the LLM
+        if rules is None and os.getenv('CATEGORY_RULES', 'true').lower() not in ('0', 'false', 'no'):
+            rules = RuleClassifier()
+        self.rules = rules
+        
+        # Set EMBEDDING_INDEX_PATH to resolve changes from labelled neighbours before the LLM
+        if embeddings is None and os.getenv('EMBEDDING_INDEX_PATH'):
+            from langchain_openai import OpenAIEmbeddings
+            embeddings = EmbeddingClassifier(
+                OpenAIEmbeddings(model=os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small'))
+            )
+        self.embeddings = embeddings
+        
+        # Changes scored below LLM_MIN_IMPACT by diff-stats enrichment are listed
+        # under 'other' without a model call; SECTION_MAX_ITEMS trims long sections
+        self.min_impact = float(os.getenv('LLM_MIN_IMPACT', '0'))
+        self.section_max_items = int(os.getenv('SECTION_MAX_ITEMS', '0'))
+        
         self.categorization_prompt = ChatPromptTemplate.from_messages([
             ("system", """You are a release notes expert. Categorize the following changes:
             - Features: New functionality
@@ -16,10 +111,237 @@ class WriterAgent:
             - Other: Everything else"""),
             ("human", "Categorize this change: {change}")
         ])
+    
+    @cached_property
+    def llm(self) -> BaseChatModel:
+        return self._llm if isinstance(self._llm, BaseLanguageModel) else self._llm()
+    
+    @cached_property
+    def model_name(self) -> str:
+        return getattr(self.llm, 'model_name', None) or getattr(self.llm, 'model', None) or type(self.llm).__name__
+    
+    @cached_property
+    def categorization_chain(self):
+        return self.categorization_prompt | self.llm
+    
+    @cached_property
+    def categorizer(self) -> BatchCategorizer:
+        return BatchCategorizer(self.llm, fallback=self._categorize_one)
+    
+    @cached_property
+    def compactor(self) -> PromptCompactor:
+        """Strips description boilerplate and truncates to CATEGORIZE_MAX_TOKENS per change"""
+        return PromptCompactor(self.model_name)
         
     def categorize_changes(self, state: Dict[str, Any]) -> Dict[str, List[Dict]]:
-        """Use LLM to categorize all changes"""
-        categories = {
+        """Use LLM to categorize all changes, one call per uncached change"""
+        merge_requests = state.get('merge_requests', [])
+        keys, assigned, _ = self.local_categories(merge_requests, state.get('project_id'))
+        tokens = dict(self.compactor.stats)
+        
+        # Process merge requests
+        pending = [i for i in range(len(merge_requests)) if i not in assigned]
+        computed = {}
+        for i, text in zip(pending, self.compactor.compact_many([merge_requests[i] for i in pending])):
+            started = time.perf_counter()
+            result = self.categorization_chain.invoke({'change': text})
+            record_llm_call('categorize_single', time.perf_counter() - started, message=result)
+            computed[i] = self._extract_category(result.content)
+        
+        self._store_categories(keys, computed)
+        self.report_compaction(tokens)
+        return self.group_categories(merge_requests, {**assigned, **computed})
+    
+    async def acategorize_changes(self, state: Dict[str, Any], run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Use LLM to categorize all uncached changes in concurrent batches
+        
+        Returns the `categorized_changes` and `category_sources` state keys.
+        """
+        merge_requests = state.get('merge_requests', [])
+        tokens = dict(self.compactor.stats)
+        assigned, sources = await self.acategorize_sourced(merge_requests, state.get('project_id'), run_id)
+        self.report_compaction(tokens)
+        return {
+            'categorized_changes': self.group_categories(merge_requests, dict(enumerate(assigned))),
+            'category_sources': self.category_sources(merge_requests, dict(enumerate(sources)))
+        }
+    
+    async def acategorize_items(self, merge_requests: List[Dict], project: Optional[str] = None,
+                                run_id: Optional[str] = None) -> List[str]:
+        """Categorize merge requests, returning one category ID per item
+        
+        With a run ID and a journal, every completed batch is journaled so a
+        resumed run does not repeat its LLM calls.
+        """
+        assigned, _ = await self.acategorize_sourced(merge_requests, project, run_id)
+        return assigned
+    
+    async def acategorize_sourced(self, merge_requests: List[Dict], project: Optional[str] = None,
+                                  run_id: Optional[str] = None) -> Tuple[List[str], List[str]]:
+        """Categorize merge requests, returning one category ID and one source per item"""
+        keys, assigned, sources = self.local_categories(merge_requests, project, run_id)
+        pending = [i for i in range(len(merge_requests)) if i not in assigned]
+        found, found_sources = await self.acategorize_pending(
+            [merge_requests[i] for i in pending], [keys[i] for i in pending], run_id)
+        assigned.update({pending[j]: category for j, category in found.items()})
+        sources.update({pending[j]: source for j, source in found_sources.items()})
+        return ([assigned.get(i, 'other') for i in range(len(merge_requests))],
+                [sources.get(i, 'failed') for i in range(len(merge_requests))])
+    
+    async def acategorize_pending(self, merge_requests: List[Dict], keys: List[str],
+                                  run_id: Optional[str] = None) -> Tuple[Dict[int, str], Dict[int, str]]:
+        """Categorize changes nothing local resolved: labelled neighbours first, then the model
+        
+        Returns the {index: category} assignments found and their {index:
+        source}. Items that failed every attempt are left out and never
+        stored, so callers list them as 'other' and a later run retries them.
+        In a journaled run they raise IncompleteCategorization instead, once
+        the completed batches are journaled, so the run can be resumed.
+        """
+        assigned, sources = {}, {}
+        pending = list(range(len(merge_requests)))
+        if self.embeddings is not None and pending:
+            assigned.update(await self.embeddings.classify(merge_requests))
+            sources.update(dict.fromkeys(assigned, 'neighbours'))
+            pending = [i for i in pending if i not in assigned]
+        
+        def journal_batch(batch: Dict[int, str]):
+            self.journal.put_many(run_id, {keys[pending[j]]: category for j, category in batch.items()})
+        
+        journaled = self.journal is not None and run_id
+        texts = self.compactor.compact_many([merge_requests[i] for i in pending])
+        results = await self.categorizer.categorize(texts, on_batch=journal_batch if journaled else None)
+        computed = {i: category for i, category in zip(pending, results) if category}
+        
+        self._store_categories(keys, computed)
+        if journaled and len(computed) < len(pending):
+            raise IncompleteCategorization(
+                f"{len(pending) - len(computed)}/{len(pending)} changes could not be categorized; "
+                f"resume run {run_id} to retry them")
+        assigned.update(computed)
+        sources.update(dict.fromkeys(computed, 'model'))
+        return assigned, sources
+    
+    def add_project_paths(self, paths: Dict[str, str]):
+        """Let per-project category rules keyed by path apply to projects given by numeric ID"""
+        if self.rules is not None and paths:
+            self.rules.add_project_paths(paths)
+    
+    def local_categories(self, merge_requests: List[Dict], project: Optional[str] = None,
+                         run_id: Optional[str] = None, counts: Optional[Dict[str, int]] = None):
+        """Resolve categories without the LLM: rules first, then the run journal and the cache
+        
+        Returns the cache keys, the {index: category} assignments found and
+        their {index: source}. Hits are reported right away, or added to `counts` for callers that
+        resolve a run in several parts and report it once with `report_local`.
+        """
+        tally = counts if counts is not None else {}
+        for name in ('items', 'rules', 'journal', 'cache_hits', 'cache_lookups', 'minor'):
+            tally.setdefault(name, 0)
+        tally['items'] += len(merge_requests)
+        
+        assigned = {}
+        if self.rules is not None:
+            assigned = self.rules.classify_many(merge_requests, project)
+            tally['rules'] += len(assigned)
+        sources = dict.fromkeys(assigned, 'rules')
+        
+        compaction = self.compactor.version
+        keys = [cache_key(mr['title'], mr['description'], self.model_name, PROMPT_VERSION, compaction)
+                for mr in merge_requests]
+        
+        if self.journal is not None and run_id:
+            lookup = [i for i in range(len(merge_requests)) if i not in assigned]
+            found = self.journal.get_many(run_id, (keys[i] for i in lookup))
+            journaled = {i: found[keys[i]] for i in lookup if keys[i] in found}
+            tally['journal'] += len(journaled)
+            assigned.update(journaled)
+            sources.update(dict.fromkeys(journaled, 'model'))
+        
+        if self.cache is not None:
+            lookup = [i for i in range(len(merge_requests)) if i not in assigned]
+            found = self.cache.get_many(keys[i] for i in lookup)
+            hits = {i: found[keys[i]] for i in lookup if keys[i] in found}
+            tally['cache_hits'] += len(hits)
+            tally['cache_lookups'] += len(lookup)
+            assigned.update(hits)
+            sources.update(dict.fromkeys(hits, 'model'))
+        
+        if self.min_impact > 0:
+            minor = {i: 'other' for i, mr in enumerate(merge_requests)
+                     if i not in assigned and mr.get('impact') is not None and mr['impact'] < self.min_impact}
+            tally['minor'] += len(minor)
+            assigned.update(minor)
+            sources.update(dict.fromkeys(minor, 'impact'))
+        
+        if counts is None:
+            self.report_local(tally, run_id)
+        return keys, assigned, sources
+    
+    def report_local(self, counts: Dict[str, int], run_id: Optional[str] = None):
+        """Print what `local_categories` resolved without a model call"""
+        if not counts.get('items'):
+            return
+        if self.rules is not None:
+            print(f"Rules resolved {counts['rules']}/{counts['items']} changes "
+                  f"({counts['rules'] / counts['items']:.0%}) without a model call")
+        if counts['journal']:
+            print(f"Resuming {counts['journal']} categorizations journaled by run {run_id}")
+        if self.cache is not None:
+            print(f"Categorization cache: {counts['cache_hits']} hits, "
+                  f"{counts['cache_lookups'] - counts['cache_hits']} misses")
+        if counts['minor']:
+            print(f"Listing {counts['minor']} low-impact changes without a model call")
+    
+    def finish_run(self, run_id: Optional[str]):
+        """Drop a run's journal once the run is done with its categorization"""
+        if self.journal is not None and run_id:
+            self.journal.clear(run_id)
+    
+    def report_compaction(self, since: Dict[str, int]):
+        """Print the input tokens sent since a snapshot of the compactor stats"""
+        before = self.compactor.stats['tokens_before'] - since['tokens_before']
+        after = self.compactor.stats['tokens_after'] - since['tokens_after']
+        if before:
+            print(f"Prompt compaction: {before} -> {after} input tokens ({1 - after / before:.0%} saved)")
+    
+    def _store_categories(self, keys: List[str], computed: Dict[int, str]):
+        """Write freshly computed categories back to the cache"""
+        if self.cache is not None:
+            self.cache.put_many({keys[i]: category for i, category in computed.items()})
+    
+    async def learn_categories(self, categorized: Dict[str, List[Dict]], sources: Optional[Dict[str, str]] = None):
+        """Add approved categorizations to the embedding index, if enabled
+        
+        Only changes categorized by the rules or the model are learned; see
+        LEARNABLE_SOURCES. Changes without a recorded source are skipped.
+        """
+        if self.embeddings is None:
+            return
+        sources = sources or {}
+        await self.embeddings.learn({
+            category: [mr for mr in changes if sources.get(change_reference(mr)) in LEARNABLE_SOURCES]
+            for category, changes in categorized.items()
+        })
+    
+    def category_sources(self, merge_requests: List[Dict], sources: Dict[int, str]) -> Dict[str, str]:
+        """Map each change reference to where its category came from"""
+        return {change_reference(mr): sources.get(i, 'failed') for i, mr in enumerate(merge_requests)}
+    
+    def group_categories(self, merge_requests: List[Dict], assigned: Dict[int, str]) -> Dict[str, List[Dict]]:
+        """Group merge requests by their assigned category, preserving order"""
+        categories = self._empty_categories()
+        for i, mr in enumerate(merge_requests):
+            categories[assigned[i]].append(mr)
+        return categories
+    
+    async def _categorize_one(self, change: str) -> str:
+        """Categorize a single change with the per-item prompt"""
+        result = await traced_llm_call('categorize_single', self.categorization_chain.ainvoke({'change': change}))
+        return self._extract_category(result.content)
+    
+    def _empty_categories(self) -> Dict[str, List[Dict]]:
+        return {
             'features': [],
             'fixes': [],
             'breaking': [],
@@ -27,53 +349,26 @@ class WriterAgent:
             'documentation': [],
             'other': []
         }
-        
-        # Process merge requests
-        for mr in state.get('merge_requests', []):
-            chain = self.categorization_prompt | self.llm
-            result = chain.invoke({'change': f"{mr['title']} - {mr['description']}"})
-            category = self._extract_category(result.content)
-            categories[category].append(mr)
-        
-        return categories
     
     def generate_release_notes(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """Generate formatted release notes"""
-        categorized = self.categorize_changes(state)
-        
-        sections = {}
-        markdown_parts = [f"# Release Notes - {state.get('to_tag', 'Latest')}\n"]
-        
-        # Features section
-        if categorized['features']:
-            sections['features'] = [f"- {mr['title']} (#{mr['iid']})" 
-                                   for mr in categorized['features']]
-            markdown_parts.append("\n## ✨ New Features")
-            markdown_parts.extend(sections['features'])
-        
-        # Bug fixes
-        if categorized['fixes']:
-            sections['fixes'] = [f"- {mr['title']} (#{mr['iid']})" 
-                               for mr in categorized['fixes']]
-            markdown_parts.append("\n## 🐛 Bug Fixes")
-            markdown_parts.extend(sections['fixes'])
-        
-        # Breaking changes
-        if categorized['breaking']:
-            sections['breaking'] = [f"- {mr['title']} (#{mr['iid']})" 
-                                  for mr in categorized['breaking']]
-            markdown_parts.append("\n## ⚠️ Breaking Changes")
-            markdown_parts.extend(sections['breaking'])
-        
-        # Contributors
-        if state.get('contributors'):
-            markdown_parts.append(f"\n## 👥 Contributors")
-            markdown_parts.append(f"Thanks to: {', '.join(sorted(state.get('contributors', [])))}")
-        
+        return self.render_release_notes(state, self.categorize_changes(state))
+    
+    async def agenerate_release_notes(self, state: Dict[str, Any], run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Generate formatted release notes using batched categorization"""
+        result = await self.acategorize_changes(state, run_id)
+        return {**self.render_release_notes(state, result['categorized_changes']),
+                'category_sources': result['category_sources']}
+    
+    def render_release_notes(self, state: Dict[str, Any], categorized: Dict[str, List[Dict]]) -> Dict[str, Any]:
+        """Render categorized changes as markdown release notes"""
+        sections = {category: rank_changes(categorized[category], self.section_max_items)
+                    for category, _ in SECTION_HEADINGS if categorized[category]}
         return {
             'categorized_changes': categorized,
             'release_notes_sections': sections,
-            'release_notes_markdown': '\n'.join(markdown_parts)
+            'release_notes_markdown': render_markdown(state.get('to_tag', 'Latest'), sections,
+                                                      state.get('contributors'))
         }
     
     def _extract_category(self, llm_response: str) -> str:
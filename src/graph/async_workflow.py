@@ -1,29 +1,87 @@
 from langgraph.graph import StateGraph, END, START
-from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
 import os
-from langchain_openai import ChatOpenAI
-from typing import Dict, Any
+import asyncio
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import RunnableConfig
+from typing import Dict, Callable, Optional, Union
 from .state import ReleaseNotesState
-from ..agents.collector import CollectorAgent
-from ..agents.writer import WriterAgent
+from ..agents.collector import CollectorAgent, collection_statistics
+from ..agents.group_collector import GroupCollector
+from ..agents.writer import IncompleteCategorization, WriterAgent
+from ..agents.linker import ChangeLinker
+from ..agents.impact import DiffStatsEnricher
+from .streaming import StreamingPipeline
+from ..storage.journal import CategorizationJournal
 from ..tools.gitlab_langchain_tools import GitLabLangChainTools
+from ..tools.memo import fetch_scope
+from ..tools.scheduler import is_transient
+from ..instrumentation import instrument_node
 
 
-async def create_release_notes_graph(llm: ChatOpenAI, use_interrupt: bool = True):
+async def create_release_notes_graph(llm: Union[BaseChatModel, Callable[[], BaseChatModel]], use_interrupt: bool = True, streaming: bool = False,
+                                     checkpointer: Optional[BaseCheckpointSaver] = None,
+                                     gitlab_tools: Optional[GitLabLangChainTools] = None,
+                                     group_collector: Optional[GroupCollector] = None,
+                                     journal: Optional[CategorizationJournal] = None):
     """Create async LangGraph workflow with LangChain GitLab integration
     
     Args:
-        llm: The language model to use
+        llm: The language model to use, or a zero-argument factory called on first use
         use_interrupt: Whether to use interrupt for human review (for LangGraph Studio)
+        streaming: Categorize merge requests inside the collect node as pages arrive;
+            the write node then only renders. The graph shape is unchanged.
+        checkpointer: Durable checkpointer; state is saved after every node and
+            categorization batches are journaled, so a run resumes by thread ID
+        gitlab_tools: GitLab tools to share between graphs; created if omitted
+        group_collector: Pool of per-project tools sharing gitlab_tools' connection,
+            used for group runs and for requests about other projects; created if omitted
+        journal: Journal of categorization batches; one is opened for durable checkpointers if omitted
+    """
+    return build_release_notes_graph(llm, use_interrupt, streaming, checkpointer, gitlab_tools, group_collector,
+                                     journal)
+
+
+def build_release_notes_graph(llm: Union[BaseChatModel, Callable[[], BaseChatModel]], use_interrupt: bool = True, streaming: bool = False,
+                              checkpointer: Optional[BaseCheckpointSaver] = None,
+                              gitlab_tools: Optional[GitLabLangChainTools] = None,
+                              group_collector: Optional[GroupCollector] = None,
+                              journal: Optional[CategorizationJournal] = None):
+    """Synchronous variant of create_release_notes_graph
+    
+    Building the graph makes no network calls: the GitLab connection is only
+    opened when the collect node first needs it, and `llm` may be a factory
+    that is only called when the first change is categorized.
     """
     
     try:
         # Initialize LangChain GitLab tools
-        gitlab_tools = GitLabLangChainTools()
+        gitlab_tools = gitlab_tools or GitLabLangChainTools()
+        
+        # Batches are journaled next to durable checkpoints; in-memory checkpoints do not outlive the process.
+        # Transient failures of durable runs are raised, leaving the run to be resumed at the failed node.
+        durable = checkpointer is not None and not isinstance(checkpointer, InMemorySaver)
         
         # Initialize agents with GitLab tools
-        collector = CollectorAgent(gitlab_tools)
-        writer = WriterAgent(llm)
+        collector = CollectorAgent(gitlab_tools, raise_transient=durable)
+        group_collector = group_collector or GroupCollector(shared_tools=gitlab_tools, raise_transient=durable)
+        writer = WriterAgent(llm, journal=journal if journal is not None else CategorizationJournal() if durable else None)
+        # Set LINK_CHANGES=false to categorize merge requests exactly as collected
+        linker = ChangeLinker() if os.getenv('LINK_CHANGES', 'true').lower() not in ('0', 'false', 'no') else None
+        # Set DIFF_STATS=true to fetch diff stats and score the impact of every change
+        enricher = DiffStatsEnricher() if os.getenv('DIFF_STATS', '').lower() in ('1', 'true', 'yes') else None
+        
+        # Requests for other projects reuse warm per-project tools (project lookup,
+        # in-flight fetches) over the shared connection
+        collectors: Dict[str, CollectorAgent] = {}
+        
+        def collector_for(project_id: Optional[str]) -> CollectorAgent:
+            if not project_id or str(project_id) == str(gitlab_tools.project_id):
+                return collector
+            if project_id not in collectors:
+                collectors[project_id] = CollectorAgent(group_collector.tools_for(project_id), raise_transient=durable)
+            return collectors[project_id]
         
         # Create graph
         workflow = StateGraph(ReleaseNotesState)
@@ -31,22 +89,62 @@ async def create_release_notes_graph(llm: ChatOpenAI, use_interrupt: bool = True
         print(f"Error initializing workflow components: {e}")
         raise
     
-    # Define async nodes
-    async def collect_data(state: ReleaseNotesState) -> ReleaseNotesState:
+    # Define async nodes. Each returns only the keys it changes; LangGraph merges
+    # them into the state, so large collections are never copied between nodes.
+    async def collect_data(state: ReleaseNotesState, config: RunnableConfig) -> ReleaseNotesState:
         """Async collector agent node"""
+        run_id = config.get('configurable', {}).get('thread_id')
         try:
-            result = await collector.run_async(state)
-            return {**state, **result}
+            # Group / multi-project runs fan out over a worker pool; single-project
+            # streaming runs link and categorize inside the pipeline
+            grouped = bool(state.get('group_id') or state.get('project_ids'))
+            # Everything fetched during this node is fetched once: repeated and
+            # concurrent requests for the same source and window share the result
+            with fetch_scope():
+                if grouped:
+                    result = await group_collector.run_async(state)
+                elif streaming:
+                    pipeline = StreamingPipeline(collector_for(state.get('project_id')), writer, linker=linker,
+                                                 enricher=enricher)
+                    result = await pipeline.run(state, run_id)
+                else:
+                    result = await collector_for(state.get('project_id')).run_async(state)
+            if result.get('error'):
+                return result
+            writer.add_project_paths(result.get('project_paths') or {})
+            
+            # Collapse each change into one record and score it before categorization;
+            # the streaming pipeline does both itself
+            if (grouped or not streaming) and linker is not None:
+                result.update(linker.link({**state, **result}))
+            if (grouped or not streaming) and enricher is not None:
+                result.update(await enricher.enrich(
+                    result, lambda project: collector_for(project or state.get('project_id')).tools))
+            if grouped and streaming:
+                result.update(await writer.acategorize_changes(result, run_id))
+            result['statistics'] = {**collection_statistics(result), **result.get('statistics', {})}
+            return result
         except Exception as e:
+            if durable and (is_transient(e) or isinstance(e, IncompleteCategorization)):
+                # Fails the step; the checkpoint before it is kept for the resume
+                raise
             print(f"Error in collect_data node: {e}")
-            return {**state, 'error': str(e)}
+            return {'error': str(e)}
     
-    def write_notes(state: ReleaseNotesState) -> ReleaseNotesState:
-        """Writer agent node"""
-        result = writer.generate_release_notes(state)
-        return {**state, **result}
+    async def write_notes(state: ReleaseNotesState, config: RunnableConfig) -> ReleaseNotesState:
+        """Async writer agent node"""
+        run_id = config.get('configurable', {}).get('thread_id')
+        # A resumed run starts here, with the project paths only in its state
+        writer.add_project_paths(state.get('project_paths') or {})
+        if streaming:
+            # Changes were already categorized while collecting
+            result = writer.render_release_notes(state, state.get('categorized_changes') or writer.group_categories([], {}))
+        else:
+            # Raises IncompleteCategorization in journaled runs, which resume here
+            result = await writer.agenerate_release_notes(state, run_id)
+        return result
     
-    def human_review(state: ReleaseNotesState) -> ReleaseNotesState:
+    async def human_review(state: ReleaseNotesState, config: RunnableConfig) -> ReleaseNotesState:
         """Human review node - displays release notes for approval"""
         release_notes = state.get('release_notes_markdown', 'No release notes generated')
         
@@ -60,33 +158,42 @@ async def create_release_notes_graph(llm: ChatOpenAI, use_interrupt: bool = True
             print("To approve: Continue the workflow in LangGraph Studio")
             print("To reject: Stop the workflow")
         else:
-            # CLI mode - interactive prompt
+            # CLI mode - interactive prompt, read off the event loop so other runs keep going
             print("\nPlease review the release notes above.")
-            approve = input("Approve these release notes? (y/n): ")
+            approve = await asyncio.to_thread(input, "Approve these release notes? (y/n): ")
             if approve.lower() != 'y':
-                state['needs_human_review'] = True
-                state['rejected'] = True
                 print("Release notes rejected. Workflow will end.")
+                # The run ends here; its categories are checkpointed with the write node's output
+                writer.finish_run(config.get('configurable', {}).get('thread_id'))
+                return {'needs_human_review': True, 'rejected': True}
         
-        return state
+        return {}
     
-    def save_release_notes(state: ReleaseNotesState) -> ReleaseNotesState:
+    async def save_release_notes(state: ReleaseNotesState, config: RunnableConfig) -> ReleaseNotesState:
         """Save the approved release notes to file"""
+        path = state.get('output_path') or 'RELEASE_NOTES.md'
         try:
-            with open('RELEASE_NOTES.md', 'w') as f:
+            with open(path, 'w') as f:
                 f.write(state.get('release_notes_markdown', ''))
-            print("✅ Release notes saved to RELEASE_NOTES.md")
-            state['saved'] = True
+            print(f"✅ Release notes saved to {path}")
         except Exception as e:
             print(f"❌ Error saving release notes: {e}")
-            state['error'] = str(e)
-        return state
+            return {'error': str(e)}
+        
+        # Approved categorizations from the rules or the model become neighbours for future runs
+        try:
+            await writer.learn_categories(state.get('categorized_changes') or {}, state.get('category_sources'))
+        except Exception as e:
+            print(f"Error updating embedding index: {e}")
+        # The run is complete; its journal is no longer needed for a resume
+        writer.finish_run(config.get('configurable', {}).get('thread_id'))
+        return {'saved': True}
     
-    # Add nodes
-    workflow.add_node("collect", collect_data)
-    workflow.add_node("write", write_notes)
-    workflow.add_node("review", human_review)
-    workflow.add_node("save", save_release_notes)
+    # Add nodes; each records its wall time when a run recorder is active
+    workflow.add_node("collect", instrument_node("collect")(collect_data))
+    workflow.add_node("write", instrument_node("write")(write_notes))
+    workflow.add_node("review", instrument_node("review")(human_review))
+    workflow.add_node("save", instrument_node("save")(save_release_notes))
     
     # Define edges
     workflow.add_edge(START, "collect")
@@ -127,6 +234,6 @@ async def create_release_notes_graph(llm: ChatOpenAI, use_interrupt: bool = True
     
     # Compile based on mode
     if use_interrupt:
-        return workflow.compile(interrupt_before=["review"])
+        return workflow.compile(checkpointer=checkpointer, interrupt_before=["review"])
     else:
-        return workflow.compile()
\ No newline at end of file
+        return workflow.compile(checkpointer=checkpointer)
\ No newline at end of file
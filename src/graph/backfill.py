@@ -0,0 +1,157 @@
+import os
+import re
+import asyncio
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Sequence, Union
+from ..agents.collector import CollectorAgent, collect_contributors, collection_statistics
+from ..agents.writer import WriterAgent
+from ..agents.linker import ChangeLinker
+from ..tools.gitlab_langchain_tools import parse_gitlab_datetime
+from ..tools.memo import fetch_scope
+
+# Release notes files of backfills, webhook drafts and the service
+DEFAULT_OUTPUT_DIR = 'release_notes'
+
+# Timestamp each collected item is assigned to a release by
+RELEASE_TIMESTAMPS = {
+    'merge_requests': 'merged_at',
+    'issues': 'closed_at',
+    'commits': 'committed_date',
+    'milestones': 'due_date'
+}
+
+
+def parse_boundary(value: Union[str, datetime]) -> datetime:
+    """Parse a date boundary, treating naive values as UTC"""
+    if isinstance(value, str):
+        value = parse_gitlab_datetime(value)
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def partition(items: List[Dict], field: str, boundaries: List[datetime]) -> List[List[Dict]]:
+    """Split items into the releases between consecutive boundaries
+
+    Release i covers (boundaries[i], boundaries[i + 1]]; each item is placed
+    with one binary search over the sorted boundaries. Items without the
+    timestamp or outside every release are dropped.
+    """
+    releases: List[List[Dict]] = [[] for _ in boundaries[1:]]
+    for item in items:
+        timestamp = item.get(field)
+        if not timestamp:
+            continue
+        try:
+            index = bisect_left(boundaries, parse_boundary(timestamp))
+        except ValueError:
+            continue
+        if 0 < index < len(boundaries):
+            releases[index - 1].append(item)
+    return releases
+
+
+def release_filename(name: str) -> str:
+    """Output file name of a release, safe for tag names such as `release/1.2`"""
+    return f"RELEASE_NOTES-{re.sub(r'[^A-Za-z0-9._-]+', '_', name)}.md"
+
+
+class BackfillRunner:
+    """Generates release notes for many consecutive releases in one pass
+
+    The union of all release windows is collected once, then every item is
+    assigned to its release through a sorted index of the boundaries. All
+    merge requests are categorized together, so each change costs at most
+    one categorization, and the releases are rendered and written in
+    parallel, one file each.
+    """
+
+    def __init__(self, collector: CollectorAgent, writer: WriterAgent, linker: Optional[ChangeLinker] = None,
+                 output_dir: Optional[str] = None):
+        self.collector = collector
+        self.writer = writer
+        # Linking runs per release, so duplicates are only collapsed within a release
+        self.linker = linker
+        # Set BACKFILL_OUTPUT_DIR to an empty string to render without writing files
+        self.output_dir = output_dir if output_dir is not None else os.getenv('BACKFILL_OUTPUT_DIR', DEFAULT_OUTPUT_DIR)
+
+    async def resolve_boundaries(self, tags: Sequence[str] = (),
+                                 dates: Sequence[Union[str, datetime]] = ()) -> List[Dict[str, Any]]:
+        """Boundary dates and names, oldest first, from tags or from dates"""
+        if tags:
+            tag_dates = await asyncio.gather(*(self.collector.tools.get_tag_date(tag) for tag in tags))
+            boundaries = [{'name': tag, 'date': date} for tag, date in zip(tags, tag_dates)]
+        else:
+            boundaries = [{'name': parse_boundary(date).date().isoformat(), 'date': parse_boundary(date)}
+                          for date in dates]
+        return sorted(boundaries, key=lambda boundary: boundary['date'])
+
+    async def run(self, state: Dict[str, Any], tags: Sequence[str] = (),
+                  dates: Sequence[Union[str, datetime]] = (), run_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Collect, categorize and render every release between consecutive boundaries
+
+        Returns one result per release, oldest first, with the rendered notes
+        and the path of the written file.
+        """
+        with fetch_scope():
+            boundaries = await self.resolve_boundaries(tags, dates)
+            if len(boundaries) < 2:
+                raise ValueError("Backfill needs at least two tags or dates")
+            dates = [boundary['date'] for boundary in boundaries]
+
+            collected = await self.collector.run_async({
+                'project_id': state.get('project_id'),
+                'from_date': dates[0],
+                'to_date': dates[-1]
+            })
+        if collected.get('error'):
+            raise RuntimeError(collected['error'])
+        self.writer.add_project_paths(collected.get('project_paths') or {})
+        print(f"Backfill: collected {len(collected['merge_requests'])} merged MRs for "
+              f"{len(boundaries) - 1} releases between {boundaries[0]['name']} and {boundaries[-1]['name']}")
+
+        releases = []
+        parts = {source: partition(collected.get(source) or [], field, dates)
+                 for source, field in RELEASE_TIMESTAMPS.items()}
+        for i, (previous, boundary) in enumerate(zip(boundaries, boundaries[1:])):
+            release = {
+                **state,
+                **{source: parts[source][i] for source in RELEASE_TIMESTAMPS},
+                'from_date': previous['date'],
+                'to_date': boundary['date'],
+                'from_tag': previous['name'] if tags else None,
+                'to_tag': boundary['name'],
+                'collection_errors': collected.get('collection_errors', {})
+            }
+            if self.linker is not None:
+                release.update(self.linker.link(release))
+            release['contributors'] = collect_contributors(release['merge_requests'], release['issues'])
+            release['statistics'] = collection_statistics(release)
+            releases.append(release)
+
+        # One categorization pass over every release's changes
+        changes = [mr for release in releases for mr in release['merge_requests']]
+        tokens = dict(self.writer.compactor.stats)
+        assigned = await self.writer.acategorize_items(changes, state.get('project_id'), run_id)
+        self.writer.report_compaction(tokens)
+        offset = 0
+        for release in releases:
+            count = len(release['merge_requests'])
+            release['categorized_changes'] = self.writer.group_categories(
+                release['merge_requests'], dict(enumerate(assigned[offset:offset + count])))
+            offset += count
+        self.writer.finish_run(run_id)
+
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+        return list(await asyncio.gather(*(asyncio.to_thread(self._render, release) for release in releases)))
+
+    def _render(self, release: Dict[str, Any]) -> Dict[str, Any]:
+        """Render one release and write it to its own file"""
+        result = {**release, **self.writer.render_release_notes(release, release['categorized_changes'])}
+        if self.output_dir:
+            path = os.path.join(self.output_dir, release_filename(release['to_tag']))
+            with open(path, 'w') as f:
+                f.write(result['release_notes_markdown'])
+            result['path'] = path
+            print(f"✅ Release notes for {release['to_tag']} saved to {path}")
+        return result
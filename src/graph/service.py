@@ -0,0 +1,138 @@
+import os
+import uuid
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Callable, Iterable, Optional, Union
+from langchain_core.language_models import BaseChatModel
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+from .async_workflow import build_release_notes_graph
+from .backfill import DEFAULT_OUTPUT_DIR, release_filename
+from ..agents.group_collector import GroupCollector
+from ..tools.gitlab_langchain_tools import GitLabLangChainTools
+from ..instrumentation import RunRecorder
+from ..storage.journal import CategorizationJournal
+
+
+class ReleaseNotesService:
+    """Serves many concurrent release notes requests on one event loop
+
+    One graph is built up front and shared by every request, together with
+    one LLM client and one GitLab connection. Per-project tools are pooled,
+    so a project's lookup is done once and requests for the same project
+    and window share in-flight fetches. Each request runs up to the review
+    step and returns the draft; `review()` later approves (saves) or rejects
+    it, so nothing waits on a human inside the event loop.
+    """
+
+    def __init__(self, llm: Union[BaseChatModel, Callable[[], BaseChatModel]],
+                 gitlab_tools: Optional[GitLabLangChainTools] = None,
+                 checkpointer: Optional[BaseCheckpointSaver] = None, streaming: bool = False,
+                 max_concurrent: Optional[int] = None, output_dir: Optional[str] = None):
+        # Paused runs are kept until reviewed; in memory unless a durable saver is given.
+        # Runs failing transiently under a durable saver are resumed by generating the same thread again.
+        self.checkpointer = checkpointer or InMemorySaver()
+        durable = not isinstance(self.checkpointer, InMemorySaver)
+        self.gitlab_tools = gitlab_tools or GitLabLangChainTools()
+        self.pool = GroupCollector(shared_tools=self.gitlab_tools, raise_transient=durable)
+        self.journal = CategorizationJournal() if durable else None
+        self.app = build_release_notes_graph(llm, use_interrupt=True, streaming=streaming,
+                                             checkpointer=self.checkpointer, gitlab_tools=self.gitlab_tools,
+                                             group_collector=self.pool, journal=self.journal)
+        # Requests running at once; further requests wait for a slot
+        self.max_concurrent = max_concurrent or int(os.getenv('SERVICE_MAX_CONCURRENT', '32'))
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.output_dir = output_dir if output_dir is not None else os.getenv('SERVICE_OUTPUT_DIR', DEFAULT_OUTPUT_DIR)
+
+    def tools_for(self, project_id: str) -> GitLabLangChainTools:
+        """Pooled tools of a project"""
+        if str(project_id) == str(self.gitlab_tools.project_id):
+            return self.gitlab_tools
+        return self.pool.tools_for(project_id)
+
+    async def warm(self, project_ids: Iterable[str] = ()):
+        """Open the GitLab connection and look up projects before the first request"""
+        await asyncio.gather(*(self.tools_for(project_id)._default_branch() for project_id in project_ids))
+
+    async def generate(self, project_id: str, from_date: Optional[datetime] = None, to_date: Optional[datetime] = None,
+                       from_tag: Optional[str] = None, to_tag: Optional[str] = None,
+                       thread_id: Optional[str] = None) -> Dict[str, Any]:
+        """Collect and write release notes for one project, stopping before review
+
+        Without tags or dates, the last 14 days are used. The returned
+        `thread_id` identifies the draft for `review()`. A run that failed
+        with status 'failed' is resumed by passing its `thread_id` again.
+        """
+        thread_id = thread_id or uuid.uuid4().hex
+        to_date = to_date or datetime.now(timezone.utc)
+        state = {
+            'project_id': project_id,
+            'from_tag': from_tag,
+            'to_tag': to_tag,
+            'from_date': from_date or to_date - timedelta(days=14),
+            'to_date': to_date,
+            'merge_requests': [], 'issues': [], 'commits': [], 'contributors': set(),
+            'categorized_changes': {}, 'statistics': {}, 'release_notes_markdown': '',
+            'release_notes_sections': {}, 'needs_human_review': False, 'error': None,
+            'output_path': os.path.join(self.output_dir, release_filename(thread_id)) if self.output_dir else None
+        }
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+        config = self._config(thread_id)
+        async with self._slots:
+            with RunRecorder(thread_id):
+                snapshot = await self.app.aget_state(config)
+                if 'review' in snapshot.next:
+                    raise ValueError(f"Release notes of {thread_id} are already awaiting review")
+                try:
+                    final = await self.app.ainvoke(None if snapshot.next else state, config)
+                except Exception as e:
+                    # Checkpointed up to the failed node, so the same thread ID resumes it
+                    return {'thread_id': thread_id, 'status': 'failed', 'error': str(e),
+                            'release_notes_markdown': '', 'statistics': {}, 'collection_errors': {}}
+        if final.get('error'):
+            await self._forget(thread_id)
+        return {
+            'thread_id': thread_id,
+            'status': 'error' if final.get('error') else 'pending_review',
+            'error': final.get('error'),
+            'release_notes_markdown': final.get('release_notes_markdown', ''),
+            'statistics': final.get('statistics', {}),
+            'collection_errors': final.get('collection_errors', {})
+        }
+
+    async def review(self, thread_id: str, approve: bool) -> Dict[str, Any]:
+        """Approve (save) or reject a draft returned by `generate()`"""
+        config = self._config(thread_id)
+        snapshot = await self.app.aget_state(config)
+        if 'review' not in snapshot.next:
+            raise ValueError(f"No release notes awaiting review for {thread_id}")
+        if approve:
+            if self.output_dir:
+                os.makedirs(self.output_dir, exist_ok=True)
+            final = await self.app.ainvoke(None, config)
+        else:
+            await self.app.aupdate_state(config, {'needs_human_review': True, 'rejected': True}, as_node='review')
+            final = (await self.app.aget_state(config)).values
+        await self._forget(thread_id)
+        return {
+            'thread_id': thread_id,
+            'status': 'saved' if final.get('saved') else 'rejected' if final.get('rejected') else 'error',
+            'error': final.get('error'),
+            'output_path': final.get('output_path') if final.get('saved') else None
+        }
+
+    async def _forget(self, thread_id: str):
+        """Drop a finished run's checkpoints and journal so a long-running service does not accumulate them"""
+        if hasattr(self.checkpointer, 'adelete_thread'):
+            await self.checkpointer.adelete_thread(thread_id)
+        if self.journal is not None:
+            self.journal.clear(thread_id)
+
+    def _config(self, thread_id: str) -> Dict[str, Any]:
+        return {'configurable': {'thread_id': thread_id}}
+
+    async def aclose(self):
+        """Close pooled GitLab connections"""
+        await self.gitlab_tools.aclose()
+        await self.pool.aclose()
@@ -4,6 +4,8 @@ from datetime import datetime
 class ReleaseNotesState(TypedDict, total=False):
     # Configuration - required fields
     project_id: str
+    group_id: Optional[str]
+    project_ids: List[str]
     from_tag: Optional[str]
     to_tag: Optional[str]
     from_date: Optional[datetime]
@@ -13,15 +15,23 @@ class ReleaseNotesState(TypedDict, total=False):
     merge_requests: List[Dict]
     issues: List[Dict]
     commits: List[Dict]
+    milestones: List[Dict]
+    collection_errors: Dict[str, str]
     
     # Processed data
     categorized_changes: Dict[str, List[Dict]]
+    category_sources: Dict[str, str]
     contributors: Set[str]
     statistics: Dict[str, int]
+    top_paths: Dict[str, int]
+    project_stats: Dict[str, Dict]
+    project_paths: Dict[str, str]
+    link_stats: Dict[str, int]
     
     # Output
     release_notes_markdown: str
     release_notes_sections: Dict[str, List[str]]
+    output_path: Optional[str]
     
     # Control flow
     needs_human_review: bool
@@ -0,0 +1,183 @@
+import os
+import asyncio
+from datetime import datetime
+from typing import Dict, Any, Awaitable, List, Optional
+from ..agents.collector import CollectorAgent
+from ..agents.writer import WriterAgent
+from ..agents.linker import ChangeLinker
+from ..agents.impact import DiffStatsEnricher, release_statistics
+from ..tools.scheduler import is_transient
+
+
+async def gather_or_cancel(*aws: Awaitable) -> List[Any]:
+    """Like asyncio.gather, but the first failure cancels the other awaitables
+
+    A failed stage must not leave the rest running: a producer blocked on a
+    full queue nobody reads would never finish.
+    """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in tasks:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        return [task.result() for task in tasks]
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class StreamingPipeline:
+    """Overlaps GitLab collection with LLM categorization
+
+    Merge requests are streamed from the GitLab tools page by page into a
+    bounded queue. Each page is scored by the diff-stats enricher, if any,
+    and then resolved locally (rules, journal, cache, impact) as it arrives, and the changes left for the model are sent in full batches
+    as they fill up, while issues, commits and milestones are collected
+    alongside. Categorization results are only assembled once both sides
+    have drained.
+    """
+
+    def __init__(self, collector: CollectorAgent, writer: WriterAgent, queue_size: Optional[int] = None,
+                 linker: Optional[ChangeLinker] = None, enricher: Optional[DiffStatsEnricher] = None):
+        self.collector = collector
+        self.writer = writer
+        # Scores every page before it is categorized, so low-impact changes skip the model
+        self.enricher = enricher
+        # Links and collapses changes once collection is done; categories are already paid for
+        self.linker = linker
+        # Pages buffered between the GitLab producer and the categorizer
+        self.queue_size = queue_size or int(os.getenv('STREAM_QUEUE_SIZE', '8'))
+
+    async def run(self, state: Dict[str, Any], run_id: Optional[str] = None) -> Dict[str, Any]:
+        """Collect and categorize, returning collected data plus categorized_changes"""
+        from_date, to_date = state.get('from_date'), state.get('to_date')
+        if state.get('from_tag') and state.get('to_tag') or not (from_date and to_date):
+            # Tag ranges resolve in one compare call, so there is nothing to stream
+            result = await self.collector.run_async(state)
+            if result.get('error'):
+                return result
+            self.writer.add_project_paths(result.get('project_paths') or {})
+            if self.linker is not None:
+                result.update(self.linker.link({**state, **result}))
+            if self.enricher is not None:
+                result.update(await self.enricher.enrich(result, lambda project: self.collector.tools))
+            result.update(await self.writer.acategorize_changes(result, run_id))
+            return result
+
+        if isinstance(from_date, str):
+            from_date = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
+        if isinstance(to_date, str):
+            to_date = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
+
+        # Pages are categorized before the other sources return, so rules need the project's path first
+        self.writer.add_project_paths(await self.collector.project_paths(state['project_id']))
+        tokens = dict(self.writer.compactor.stats)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        merge_requests: List[Dict] = []
+        assigned: Dict[int, str] = {}
+        sources: Dict[int, str] = {}
+        diff_stats: List[Optional[Dict]] = []
+        errors: Dict[str, str] = {}
+        enriching: List[asyncio.Future] = []
+
+        async def enrich(page: List) -> List:
+            if self.enricher is None:
+                return page
+            page, page_stats = await self.enricher.enrich_items(page, lambda project: self.collector.tools)
+            diff_stats.extend(page_stats)
+            return page
+
+        async def produce():
+            try:
+                async for page in self.collector.tools.iter_merge_requests(state['project_id'], from_date, to_date):
+                    # Enriched while the next page is listed; the consumer awaits pages in order
+                    enriching.append(asyncio.ensure_future(enrich(page)))
+                    await queue.put(enriching[-1])
+            except Exception as e:
+                if self.collector.raise_transient and is_transient(e):
+                    raise
+                # Recorded like any other failed source; pages already streamed are kept
+                errors['merge_requests'] = str(e)
+            await queue.put(None)
+
+        async def consume():
+            project = state.get('project_id')
+            batch_size = self.writer.categorizer.batch_size
+            semaphore = asyncio.Semaphore(self.writer.categorizer.parallelism)
+            keys: List[str] = []
+            counts: Dict[str, int] = {}
+            tasks = []
+
+            async def categorize(indices: List[int]):
+                async with semaphore:
+                    found, found_sources = await self.writer.acategorize_pending(
+                        [merge_requests[i] for i in indices], [keys[i] for i in indices], run_id)
+                assigned.update({indices[j]: category for j, category in found.items()})
+                sources.update({indices[j]: source for j, source in found_sources.items()})
+
+            # Rules, journal and cache resolve each page as it arrives; only what
+            # they leave is buffered into full batches for the model
+            pending: List[int] = []
+            try:
+                while True:
+                    page = await queue.get()
+                    if page is not None:
+                        page = await page
+                        page_keys, local, local_sources = self.writer.local_categories(page, project, run_id, counts)
+                        offset = len(merge_requests)
+                        merge_requests.extend(page)
+                        keys.extend(page_keys)
+                        assigned.update({offset + i: category for i, category in local.items()})
+                        sources.update({offset + i: source for i, source in local_sources.items()})
+                        pending.extend(offset + i for i in range(len(page)) if i not in local)
+                    while len(pending) >= batch_size or (page is None and pending):
+                        chunk, pending = pending[:batch_size], pending[batch_size:]
+                        tasks.append(asyncio.ensure_future(categorize(chunk)))
+                    if page is None:
+                        break
+
+                await gather_or_cancel(*tasks)
+            finally:
+                # Batches still running when consuming fails are of no use
+                for task in tasks:
+                    task.cancel()
+            self.writer.report_local(counts, run_id)
+
+        # If either side fails, the others are cancelled rather than left waiting on the queue
+        try:
+            collected, _, _ = await gather_or_cancel(
+                self.collector.run_async(state, exclude=('merge_requests',)),
+                produce(),
+                consume()
+            )
+        finally:
+            for page in enriching:
+                page.cancel()
+        if collected.get('error'):
+            return collected
+        self.writer.report_compaction(tokens)
+        if self.enricher is not None:
+            self.enricher.report(diff_stats)
+            collected.update(release_statistics(diff_stats))
+
+        collected['merge_requests'] = merge_requests
+        collected['collection_errors'] = {**collected.get('collection_errors', {}), **errors}
+        collected['contributors'] = set(collected.get('contributors', set()))
+        collected['contributors'].update(mr['author'] for mr in merge_requests if 'author' in mr)
+        # Items that failed every attempt are listed as 'other'
+        categories = [assigned.get(i, 'other') for i in range(len(merge_requests))]
+        origins = [sources.get(i, 'failed') for i in range(len(merge_requests))]
+        if self.linker is not None:
+            linked, kept = self.linker.link_indexed({**state, **collected})
+            collected.update(linked)
+            categories = [categories[i] for i in kept]
+            origins = [origins[i] for i in kept]
+        collected['categorized_changes'] = self.writer.group_categories(
+            collected['merge_requests'], dict(enumerate(categories))
+        )
+        collected['category_sources'] = self.writer.category_sources(
+            collected['merge_requests'], dict(enumerate(origins))
+        )
+        return collected
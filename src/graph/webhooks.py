@@ -0,0 +1,303 @@
+import os
+import sys
+import hmac
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from ..agents.collector import collect_contributors, collection_statistics
+from ..agents.writer import WriterAgent, SECTION_HEADINGS, format_change, render_markdown
+from ..records import IssueRecord, MergeRequestRecord, pack_text
+from .backfill import DEFAULT_OUTPUT_DIR, release_filename
+
+DEFAULT_EVENT_LOG = '.release_notes_cache/draft_events.jsonl'
+
+# `after` of a tag push that deletes the tag
+DELETED_REF = '0' * 40
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _labels(payload: Dict) -> List[str]:
+    labels = payload.get('labels') or payload['object_attributes'].get('labels') or []
+    return [_intern(label['title'] if isinstance(label, dict) else label) for label in labels]
+
+
+def _hook_username(payload: Dict) -> Optional[str]:
+    return _intern((payload.get('user') or {}).get('username'))
+
+
+def merge_request_from_hook(payload: Dict) -> MergeRequestRecord:
+    """Build a merge request record from a GitLab merge request webhook
+
+    Hooks carry the acting user rather than the author, so the author is
+    the name on the last commit and the user of a `merge` action is the merger.
+    """
+    mr = payload['object_attributes']
+    last_commit_author = (mr.get('last_commit') or {}).get('author') or {}
+    return MergeRequestRecord(
+        iid=mr['iid'],
+        title=mr['title'],
+        _description=pack_text(mr.get('description') or ''),
+        author=_intern(last_commit_author.get('name')) or 'Unknown',
+        merged_at=mr.get('merged_at') or mr.get('updated_at'),
+        merged_by=_hook_username(payload) if mr.get('action') == 'merge' else None,
+        web_url=mr.get('url'),
+        labels=_labels(payload),
+        source_branch=_intern(mr.get('source_branch')),
+        target_branch=_intern(mr.get('target_branch')),
+        merge_commit_sha=mr.get('merge_commit_sha'),
+        squash_commit_sha=mr.get('squash_commit_sha')
+    )
+
+
+def issue_from_hook(payload: Dict) -> IssueRecord:
+    """Build an issue record from a GitLab issue webhook; the user of a `close` action closed it"""
+    issue = payload['object_attributes']
+    return IssueRecord(
+        iid=issue['iid'],
+        title=issue['title'],
+        _description=pack_text(issue.get('description') or ''),
+        author='Unknown',
+        closed_at=issue.get('closed_at') or issue.get('updated_at'),
+        closed_by=_hook_username(payload) if issue.get('action') == 'close' else None,
+        web_url=issue.get('url'),
+        labels=_labels(payload),
+        assignees=[_intern(user.get('username')) for user in payload.get('assignees') or []]
+    )
+
+
+def load_fixtures(path: str) -> Iterator[Dict]:
+    """Webhook payloads from a JSON file (one payload or a list), a JSONL file, or a directory of them"""
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            if name.endswith(('.json', '.jsonl')):
+                yield from load_fixtures(os.path.join(path, name))
+        return
+    with open(path) as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+        data = json.load(f)
+    yield from data if isinstance(data, list) else [data]
+
+
+class ReleaseDraft:
+    """Release notes draft kept current from GitLab webhooks
+
+    Each merged merge request is categorized when its webhook arrives and
+    only its own line is rendered; closed issues and contributors are kept
+    alongside. A release is cut by snapshotting the draft, without
+    collecting or categorizing anything. Accepted events are appended to
+    an event log so the draft survives restarts: replaying it only hits
+    the categorization cache.
+    """
+
+    def __init__(self, writer: WriterAgent, project_id: Optional[str] = None, event_log: Optional[str] = None,
+                 output_dir: Optional[str] = None):
+        self.writer = writer
+        # Events of other projects are ignored; None accepts every project
+        self.project_id = project_id if project_id is not None else os.getenv('PROJECT_ID')
+        # Set DRAFT_EVENT_LOG to an empty string to keep the draft in memory only
+        self.event_log = event_log if event_log is not None else os.getenv('DRAFT_EVENT_LOG', DEFAULT_EVENT_LOG)
+        self.output_dir = output_dir if output_dir is not None else os.getenv('DRAFT_OUTPUT_DIR', DEFAULT_OUTPUT_DIR)
+        self._reset()
+
+    def _reset(self):
+        self.merge_requests: Dict[int, MergeRequestRecord] = {}
+        self.issues: Dict[int, IssueRecord] = {}
+        self.categories: Dict[int, str] = {}
+        # Rendered line of each merge request per category, in arrival order
+        self._lines: Dict[str, Dict[int, str]] = {category: {} for category in self.writer.group_categories([], {})}
+        self._markdown: Optional[str] = None
+
+    def _accepts(self, payload: Dict) -> bool:
+        if not self.project_id:
+            return True
+        project = payload.get('project') or {}
+        return str(self.project_id) in (project.get('path_with_namespace'), str(project.get('id')))
+
+    async def restore(self):
+        """Rebuild the draft from the event log"""
+        if self.event_log and os.path.exists(self.event_log):
+            events = list(load_fixtures(self.event_log))
+            await self.ingest_many(events, log=False)
+            print(f"Restored release draft from {len(events)} events")
+
+    async def ingest(self, payload: Dict) -> List[Dict[str, Any]]:
+        """Apply one webhook payload; returns any releases it cut"""
+        return await self.ingest_many([payload])
+
+    async def ingest_many(self, payloads: Iterable[Dict], log: bool = True) -> List[Dict[str, Any]]:
+        """Apply webhook payloads in order, categorizing the merged merge requests among them together"""
+        merged: Dict[int, MergeRequestRecord] = {}
+        releases = []
+        for payload in payloads:
+            kind = payload.get('object_kind')
+            if kind == 'tag_push':
+                if payload.get('after') != DELETED_REF and self._accepts(payload):
+                    # Changes that arrived before the tag belong to its release
+                    await self._add_merge_requests(merged)
+                    merged = {}
+                    releases.append(self.cut_release(payload['ref'].rpartition('refs/tags/')[2]))
+                continue
+            if kind not in ('merge_request', 'issue') or not self._accepts(payload):
+                continue
+
+            attributes = payload['object_attributes']
+            project = payload.get('project') or {}
+            if project.get('id') is not None and project.get('path_with_namespace'):
+                self.writer.add_project_paths({str(project['id']): project['path_with_namespace']})
+            if kind == 'merge_request':
+                if attributes.get('state') != 'merged':
+                    continue
+                if project.get('default_branch') and attributes.get('target_branch') != project['default_branch']:
+                    continue
+                merged[attributes['iid']] = merge_request_from_hook(payload)
+            elif attributes.get('state') == 'closed':
+                self.issues[attributes['iid']] = issue_from_hook(payload)
+                self._markdown = None
+            elif self.issues.pop(attributes['iid'], None) is not None:
+                # Reopened
+                self._markdown = None
+            if log:
+                self._log(payload)
+
+        await self._add_merge_requests(merged)
+        return releases
+
+    async def _add_merge_requests(self, merged: Dict[int, MergeRequestRecord]):
+        """Categorize newly merged (or edited) merge requests and render their lines"""
+        if not merged:
+            return
+        records = list(merged.values())
+        categories = await self.writer.acategorize_items(records, self.project_id)
+        for mr, category in zip(records, categories):
+            previous = self.categories.get(mr.iid)
+            if previous is not None and previous != category:
+                del self._lines[previous][mr.iid]
+            self.merge_requests[mr.iid] = mr
+            self.categories[mr.iid] = category
+            self._lines[category][mr.iid] = format_change(mr)
+        self._markdown = None
+
+    def _log(self, payload: Dict):
+        if not self.event_log:
+            return
+        os.makedirs(os.path.dirname(self.event_log) or '.', exist_ok=True)
+        with open(self.event_log, 'a') as f:
+            f.write(json.dumps(payload) + '\n')
+
+    def snapshot(self, to_tag: Optional[str] = None) -> Dict[str, Any]:
+        """Current draft as a release notes state, without changing it"""
+        merge_requests = list(self.merge_requests.values())
+        issues = list(self.issues.values())
+        contributors = collect_contributors(merge_requests, issues)
+        sections = {category: list(self._lines[category].values())
+                    for category, _ in SECTION_HEADINGS if self._lines[category]}
+        if to_tag is not None or self._markdown is None:
+            markdown = render_markdown(to_tag or 'Latest', sections, contributors)
+            if to_tag is None:
+                self._markdown = markdown
+        else:
+            markdown = self._markdown
+        release = {
+            'project_id': self.project_id,
+            'to_tag': to_tag,
+            'merge_requests': merge_requests,
+            'issues': issues,
+            'contributors': contributors,
+            'categorized_changes': {category: [self.merge_requests[iid] for iid in lines]
+                                    for category, lines in self._lines.items()},
+            'release_notes_sections': sections,
+            'release_notes_markdown': markdown
+        }
+        release['statistics'] = collection_statistics(release)
+        return release
+
+    def cut_release(self, to_tag: str) -> Dict[str, Any]:
+        """Snapshot the draft as the notes of a release, write them and start the next draft"""
+        started = time.perf_counter()
+        release = self.snapshot(to_tag)
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            release['output_path'] = os.path.join(self.output_dir, release_filename(to_tag))
+            with open(release['output_path'], 'w') as f:
+                f.write(release['release_notes_markdown'])
+        self._reset()
+        if self.event_log and os.path.exists(self.event_log):
+            os.remove(self.event_log)
+        print(f"✅ Cut release {to_tag} with {len(release['merge_requests'])} merge requests "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+              + (f", saved to {release['output_path']}" if 'output_path' in release else ''))
+        return release
+
+
+class WebhookReceiver:
+    """HTTP endpoint for GitLab webhooks feeding a release draft
+
+    Requests are answered as soon as the payload is queued. Payloads are
+    applied in arrival order, and those that queue up while a batch is being
+    categorized are applied together.
+    """
+
+    def __init__(self, draft: ReleaseDraft, host: Optional[str] = None, port: Optional[int] = None,
+                 secret: Optional[str] = None):
+        self.draft = draft
+        self.host = host or os.getenv('WEBHOOK_HOST', '127.0.0.1')
+        self.port = port if port is not None else int(os.getenv('WEBHOOK_PORT', '8080'))
+        # Compared with the X-Gitlab-Token header when set
+        self.secret = secret if secret is not None else os.getenv('WEBHOOK_SECRET')
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    async def serve(self):
+        """Receive webhooks until cancelled"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        self._server = ThreadingHTTPServer((self.host, self.port), self._handler(loop, queue))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Receiving GitLab webhooks on http://{self.host}:{self._server.server_port}/")
+        try:
+            while True:
+                payloads = [await queue.get()]
+                while not queue.empty():
+                    payloads.append(queue.get_nowait())
+                try:
+                    await self.draft.ingest_many(payloads)
+                except Exception as e:
+                    print(f"Error applying {len(payloads)} webhook events: {e}")
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _handler(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue):
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                # Constant-time comparison; bytes so non-ASCII tokens are rejected, not raised on
+                token = (self.headers.get('X-Gitlab-Token') or '').encode('utf-8')
+                if receiver.secret and not hmac.compare_digest(token, receiver.secret.encode('utf-8')):
+                    self.send_error(401)
+                    return
+                try:
+                    payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                except ValueError:
+                    self.send_error(400)
+                    return
+                loop.call_soon_threadsafe(queue.put_nowait, payload)
+                self.send_response(202)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
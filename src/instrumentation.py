@@ -0,0 +1,370 @@
+"""
+Run instrumentation: node timings, GitLab and LLM call metrics, trace export
+
+A `RunRecorder` is activated around a graph run. While it is active, graph
+nodes, GitLab requests (both transports) and LLM calls record spans and
+metrics into it. Outside a run the hooks are no-ops. On exit the recorder
+writes a JSON run report and an OpenTelemetry trace file (OTLP/JSON) that
+can be loaded into any OTLP-compatible viewer.
+
+Components shared by concurrent runs (the categorizer, the prompt compactor,
+the GitLab tools) keep their counters in `RunStats` attributes, which hold
+one set of counters per `stats_scope()`; every graph node runs in one.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import asyncio
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, TypeVar
+from urllib.parse import urlsplit
+
+DEFAULT_REPORT_DIR = '.release_notes_cache/runs'
+
+T = TypeVar('T')
+
+_current_recorder: ContextVar[Optional['RunRecorder']] = ContextVar('release_notes_recorder', default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar('release_notes_span', default=None)
+_stats_scope: ContextVar[Optional[Dict[Any, Dict[str, Any]]]] = ContextVar('release_notes_stats', default=None)
+
+# Path rewrites that turn GitLab REST paths into endpoint templates
+_ENDPOINT_PATTERNS = [
+    (re.compile(r'^(projects|groups)/[^/]+'), r'\1/:id'),
+    (re.compile(r'(repository/(?:tags|branches))/[^/]+'), r'\1/:name'),
+    (re.compile(r'/\d+(?=/|$)'), '/:iid'),
+    (re.compile(r'/[0-9a-f]{7,40}(?=/|$)'), '/:sha'),
+]
+
+
+def endpoint_name(method: str, url: str) -> str:
+    """Name a GitLab request after its endpoint, e.g. 'GET projects/:id/merge_requests'"""
+    path = urlsplit(url).path.strip('/')
+    if path.startswith('api/v4/'):
+        path = path[len('api/v4/'):]
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return f"{method.upper()} {path}"
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Nearest-rank p50/p90/p95/p99 and max of a list of latencies"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def pick(q: int) -> float:
+        return ordered[min(len(ordered) - 1, max(0, -(-q * len(ordered) // 100) - 1))]
+
+    return {'p50': pick(50), 'p90': pick(90), 'p95': pick(95), 'p99': pick(99), 'max': ordered[-1]}
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class RunRecorder:
+    """Collects spans and metrics for one release notes run"""
+
+    def __init__(self, run_id: Optional[str] = None, report_dir: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        # Where reports are written; empty disables export
+        self.report_dir = report_dir if report_dir is not None else os.getenv('RUN_REPORT_DIR', DEFAULT_REPORT_DIR)
+        self.trace_id = uuid.uuid4().hex
+        self.started_at = datetime.now(timezone.utc)
+        self._started_ns = time.time_ns()
+        # python-gitlab requests are recorded from worker threads
+        self._lock = threading.Lock()
+        self.spans: List[Dict[str, Any]] = []
+        self.nodes: Dict[str, Dict[str, float]] = {}
+        self.endpoints: Dict[str, Dict[str, float]] = {}
+        self.llm: Dict[str, Dict[str, Any]] = {}
+        self._tokens = []
+
+    def __enter__(self) -> 'RunRecorder':
+        self._tokens.append(_current_recorder.set(self))
+        self._root = self._open_span('release_notes.run', {'run.id': self.run_id})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._close_span(self._root, error=exc)
+        _current_recorder.reset(self._tokens.pop())
+        if self.report_dir:
+            try:
+                report_path, trace_path = self.export(self.report_dir)
+                print(f"📊 Run report written to {report_path} (trace: {trace_path})")
+            except OSError as e:
+                print(f"Error writing run report: {e}")
+        return False
+
+    def _open_span(self, name: str, attributes: Dict[str, Any], start_ns: Optional[int] = None) -> Dict[str, Any]:
+        span = {
+            'name': name,
+            'span_id': uuid.uuid4().hex[:16],
+            'parent_id': _current_span.get(),
+            'start_ns': start_ns or time.time_ns(),
+            'attributes': dict(attributes)
+        }
+        span['token'] = _current_span.set(span['span_id'])
+        return span
+
+    def _close_span(self, span: Dict[str, Any], error: Optional[BaseException] = None, end_ns: Optional[int] = None):
+        _current_span.reset(span.pop('token'))
+        span['end_ns'] = end_ns or time.time_ns()
+        if error is not None:
+            span['error'] = f"{type(error).__name__}: {error}"
+        self.spans.append(span)
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Dict[str, Any]]:
+        """Record a span around a block; nested spans become its children"""
+        span = self._open_span(name, attributes)
+        try:
+            yield span['attributes']
+        except BaseException as e:
+            self._close_span(span, error=e)
+            raise
+        self._close_span(span)
+
+    def add_span(self, name: str, start_ns: int, end_ns: int, **attributes):
+        """Record a finished span under the current one"""
+        self.spans.append({
+            'name': name,
+            'span_id': uuid.uuid4().hex[:16],
+            'parent_id': _current_span.get(),
+            'start_ns': start_ns,
+            'end_ns': end_ns,
+            'attributes': attributes
+        })
+
+    def record_node(self, name: str, seconds: float):
+        stats = self.nodes.setdefault(name, {'calls': 0, 'seconds': 0.0})
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+
+    def record_api_call(self, method: str, url: str, status: Optional[int], size: int, seconds: float):
+        endpoint = endpoint_name(method, url)
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, {'calls': 0, 'errors': 0, 'bytes': 0, 'seconds': 0.0})
+            stats['calls'] += 1
+            stats['errors'] += int(status is None or status >= 400)
+            stats['bytes'] += size
+            stats['seconds'] += seconds
+        end_ns = time.time_ns()
+        self.add_span(endpoint, end_ns - int(seconds * 1e9), end_ns, **{
+            'http.request.method': method.upper(),
+            'url.path': urlsplit(url).path,
+            'http.response.status_code': status or 0,
+            'http.response.body.size': size
+        })
+
+    def record_llm_call(self, kind: str, seconds: float, items: int = 1, message: Any = None,
+                        error: Optional[BaseException] = None):
+        usage = getattr(message, 'usage_metadata', None) or {}
+        stats = self.llm.setdefault(kind, {'calls': 0, 'errors': 0, 'items': 0, 'input_tokens': 0,
+                                           'output_tokens': 0, 'latencies': []})
+        stats['calls'] += 1
+        stats['errors'] += int(error is not None)
+        stats['items'] += items
+        stats['input_tokens'] += usage.get('input_tokens', 0)
+        stats['output_tokens'] += usage.get('output_tokens', 0)
+        stats['latencies'].append(seconds)
+        end_ns = time.time_ns()
+        self.add_span(f"llm.{kind}", end_ns - int(seconds * 1e9), end_ns, **{
+            'llm.items': items,
+            'gen_ai.usage.input_tokens': usage.get('input_tokens', 0),
+            'gen_ai.usage.output_tokens': usage.get('output_tokens', 0),
+            'error': bool(error)
+        })
+
+    def report(self) -> Dict[str, Any]:
+        """Build the JSON run report"""
+        ended = max((span['end_ns'] for span in self.spans), default=time.time_ns())
+        gitlab = {
+            'calls': sum(stats['calls'] for stats in self.endpoints.values()),
+            'bytes': sum(stats['bytes'] for stats in self.endpoints.values()),
+            'endpoints': dict(sorted(self.endpoints.items(), key=lambda item: -item[1]['seconds']))
+        }
+        llm = {kind: {**{key: value for key, value in stats.items() if key != 'latencies'},
+                      'latency': percentiles(stats['latencies'])}
+               for kind, stats in self.llm.items()}
+        return {
+            'run_id': self.run_id,
+            'trace_id': self.trace_id,
+            'started_at': self.started_at.isoformat(),
+            'wall_seconds': (ended - self._started_ns) / 1e9,
+            'nodes': self.nodes,
+            'gitlab': gitlab,
+            'llm': llm
+        }
+
+    def otlp_trace(self) -> Dict[str, Any]:
+        """Build the trace in OTLP/JSON form"""
+        spans = []
+        for span in self.spans:
+            attributes = dict(span['attributes'])
+            record = {
+                'traceId': self.trace_id,
+                'spanId': span['span_id'],
+                'name': span['name'],
+                'kind': 3 if span['name'].startswith(('GET ', 'llm.')) else 1,
+                'startTimeUnixNano': str(span['start_ns']),
+                'endTimeUnixNano': str(span['end_ns']),
+                'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()],
+                'status': {'code': 2, 'message': span['error']} if span.get('error') else {'code': 1}
+            }
+            if span.get('parent_id'):
+                record['parentSpanId'] = span['parent_id']
+            spans.append(record)
+        return {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': 'gitlab-release-notes'}}]},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}]
+        }]}
+
+    def export(self, directory: str):
+        """Write `<run_id>.report.json` and `<run_id>.trace.json`, returning their paths"""
+        os.makedirs(directory, exist_ok=True)
+        report_path = os.path.join(directory, f"{self.run_id}.report.json")
+        trace_path = os.path.join(directory, f"{self.run_id}.trace.json")
+        with open(report_path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        with open(trace_path, 'w') as f:
+            json.dump(self.otlp_trace(), f)
+        return report_path, trace_path
+
+
+@contextmanager
+def stats_scope() -> Iterator[Dict[Any, Dict[str, Any]]]:
+    """Give `RunStats` attributes fresh counters for a block; nested scopes share the outer one"""
+    scope = _stats_scope.get()
+    if scope is not None:
+        yield scope
+        return
+    token = _stats_scope.set({})
+    try:
+        yield _stats_scope.get()
+    finally:
+        _stats_scope.reset(token)
+
+
+class RunStats:
+    """Attribute holding a component's counters per stats scope
+
+    Inside a `stats_scope()` every instance gets its own counters, created by
+    `factory` on first access, so runs sharing the instance neither reset nor
+    mix each other's counts. Outside any scope they live on the instance.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def _store(self, instance) -> Dict[str, Any]:
+        scope = _stats_scope.get()
+        return instance.__dict__ if scope is None else scope.setdefault(instance, {})
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        store = self._store(instance)
+        if self.name not in store:
+            store[self.name] = self.factory()
+        return store[self.name]
+
+    def __set__(self, instance, value):
+        self._store(instance)[self.name] = value
+
+
+def current_recorder() -> Optional[RunRecorder]:
+    """The recorder of the run in progress, if any"""
+    return _current_recorder.get()
+
+
+def instrument_node(name: str):
+    """Decorate a graph node so it runs in its own stats scope and its wall time is recorded as a span"""
+    def decorate(node):
+        if asyncio.iscoroutinefunction(node):
+            @functools.wraps(node)
+            async def wrapper(*args, **kwargs):
+                recorder = current_recorder()
+                with stats_scope():
+                    if recorder is None:
+                        return await node(*args, **kwargs)
+                    started = time.perf_counter()
+                    try:
+                        with recorder.span(f"node.{name}", **{'graph.node': name}):
+                            return await node(*args, **kwargs)
+                    finally:
+                        recorder.record_node(name, time.perf_counter() - started)
+        else:
+            @functools.wraps(node)
+            def wrapper(*args, **kwargs):
+                recorder = current_recorder()
+                with stats_scope():
+                    if recorder is None:
+                        return node(*args, **kwargs)
+                    started = time.perf_counter()
+                    try:
+                        with recorder.span(f"node.{name}", **{'graph.node': name}):
+                            return node(*args, **kwargs)
+                    finally:
+                        recorder.record_node(name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def record_api_call(method: str, url: str, status: Optional[int], size: int, seconds: float):
+    """Record a GitLab request in the active run"""
+    recorder = current_recorder()
+    if recorder is not None:
+        recorder.record_api_call(method, url, status, size, seconds)
+
+
+def record_llm_call(kind: str, seconds: float, items: int = 1, message: Any = None,
+                    error: Optional[BaseException] = None):
+    """Record an LLM call in the active run"""
+    recorder = current_recorder()
+    if recorder is not None:
+        recorder.record_llm_call(kind, seconds, items, message, error)
+
+
+async def traced_llm_call(kind: str, call: Awaitable[T], items: int = 1) -> T:
+    """Await an LLM call, recording its latency and token usage in the active run"""
+    started = time.perf_counter()
+    try:
+        message = await call
+    except Exception as e:
+        record_llm_call(kind, time.perf_counter() - started, items, error=e)
+        raise
+    record_llm_call(kind, time.perf_counter() - started, items, message)
+    return message
+
+
+def instrument_session(session, scheduler=None):
+    """Record every request made through a requests session (python-gitlab's transport)
+
+    With a scheduler, the rate-limit headers of every response (throttled
+    ones included) are passed to `scheduler.observe`.
+    """
+    def on_response(response, *args, **kwargs):
+        size = response.headers.get('Content-Length')
+        record_api_call(response.request.method, response.url, response.status_code,
+                        int(size) if size and size.isdigit() else len(response.content),
+                        response.elapsed.total_seconds())
+        if scheduler is not None:
+            scheduler.observe(response.headers)
+    session.hooks['response'].append(on_response)
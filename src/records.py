@@ -0,0 +1,233 @@
+"""
+Compact records for collected merge requests, issues and commits
+
+Collected items are slotted dataclasses instead of dicts: no per-instance
+`__dict__`, usernames, labels and branch names interned so thousands of
+records share one string each, and long descriptions and commit messages
+kept zlib-compressed and only decompressed when read. Records still behave
+like the dicts they replace (`mr['title']`, `mr.get('labels', [])`,
+`'author' in mr`), and LangGraph's checkpoint serializer stores them as
+dataclasses, so checkpoints shrink along with memory.
+"""
+
+import sys
+import copy
+import zlib
+import functools
+import dataclasses
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+# Text up to this many bytes is kept as is; compressing it would not pay off
+COMPRESS_THRESHOLD = 256
+
+Text = Union[str, bytes, None]
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _username(user: Optional[Dict]) -> Optional[str]:
+    return _intern(user.get('username', 'Unknown')) if user else None
+
+
+def pack_text(text: Optional[str]) -> Text:
+    """Compress long text for storage in a record"""
+    if not text:
+        return text
+    data = text.encode()
+    return zlib.compress(data, 6) if len(data) > COMPRESS_THRESHOLD else text
+
+
+def unpack_text(value: Text) -> Optional[str]:
+    return zlib.decompress(value).decode() if isinstance(value, bytes) else value
+
+
+@functools.lru_cache(maxsize=None)
+def _field_names(cls) -> Dict[str, str]:
+    """Public name of each dataclass field; compressed text fields carry a leading underscore"""
+    return {field.name.lstrip('_'): field.name for field in dataclasses.fields(cls)}
+
+
+class Record:
+    """Dict-style read access to a slotted dataclass
+
+    Fields whose value is None read as missing, like the optional keys of
+    the dicts these records replace.
+    """
+
+    __slots__ = ()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _field_names(type(self)):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in _field_names(type(self)):
+            raise KeyError(f"{type(self).__name__} has no field {key!r}")
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key) if key in _field_names(type(self)) else None
+        return default if value is None else value
+
+    def __contains__(self, key: str) -> bool:
+        field = _field_names(type(self)).get(key)
+        return field is not None and getattr(self, field) is not None
+
+    def keys(self) -> List[str]:
+        return [name for name, field in _field_names(type(self)).items() if getattr(self, field) is not None]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.keys()]
+
+    def replace(self, **changes) -> 'Record':
+        """Shallow copy with some fields changed"""
+        record = copy.copy(self)
+        for key, value in changes.items():
+            record[key] = value
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain dict with every field, text decompressed"""
+        return {name: getattr(self, name) for name in _field_names(type(self))}
+
+
+def text_property(field: str, doc: str) -> property:
+    """Public accessor for a compressed text field"""
+    return property(lambda self: unpack_text(getattr(self, field)) or '',
+                    lambda self, value: setattr(self, field, pack_text(value)), doc=doc)
+
+
+def with_fields(item: Union[Record, Dict], **changes) -> Union[Record, Dict]:
+    """Copy a record or plain dict with some fields changed"""
+    return item.replace(**changes) if isinstance(item, Record) else {**item, **changes}
+
+
+@dataclass(slots=True, eq=False)
+class MergeRequestRecord(Record):
+    iid: int
+    title: str
+    _description: Text = None
+    author: Optional[str] = None
+    merged_at: Optional[str] = None
+    merged_by: Optional[str] = None
+    web_url: Optional[str] = None
+    labels: List[str] = dataclasses.field(default_factory=list)
+    milestone: Optional[str] = None
+    source_branch: Optional[str] = None
+    target_branch: Optional[str] = None
+    merge_commit_sha: Optional[str] = None
+    squash_commit_sha: Optional[str] = None
+    # Set for multi-project runs
+    project: Optional[str] = None
+    reference: Optional[str] = None
+    # Set by the change linker
+    commits: Optional[List[str]] = None
+    closes_issues: Optional[List[str]] = None
+    duplicates: Optional[List[str]] = None
+    # Set by diff-stats enrichment
+    files_changed: Optional[int] = None
+    lines_changed: Optional[int] = None
+    impact: Optional[float] = None
+
+    @classmethod
+    def from_payload(cls, mr: Dict) -> 'MergeRequestRecord':
+        """Build the merge request record from a GitLab API payload"""
+        return cls(
+            iid=mr['iid'],
+            title=mr['title'],
+            _description=pack_text(mr.get('description') or ''),
+            author=_username(mr.get('author')) or 'Unknown',
+            merged_at=mr.get('merged_at'),
+            merged_by=_username(mr.get('merged_by')),
+            web_url=mr.get('web_url'),
+            labels=[sys.intern(label) for label in mr.get('labels', [])],
+            milestone=_intern(mr['milestone'].get('title')) if mr.get('milestone') else None,
+            source_branch=_intern(mr.get('source_branch')),
+            target_branch=_intern(mr.get('target_branch')),
+            merge_commit_sha=mr.get('merge_commit_sha'),
+            squash_commit_sha=mr.get('squash_commit_sha')
+        )
+
+
+MergeRequestRecord.description = text_property('_description', "Description, decompressed on access")
+
+
+@dataclass(slots=True, eq=False)
+class IssueRecord(Record):
+    iid: int
+    title: str
+    _description: Text = None
+    author: Optional[str] = None
+    closed_at: Optional[str] = None
+    closed_by: Optional[str] = None
+    web_url: Optional[str] = None
+    labels: List[str] = dataclasses.field(default_factory=list)
+    milestone: Optional[str] = None
+    assignees: List[str] = dataclasses.field(default_factory=list)
+    project: Optional[str] = None
+    reference: Optional[str] = None
+
+    @classmethod
+    def from_payload(cls, issue: Dict) -> 'IssueRecord':
+        """Build the issue record from a GitLab API payload"""
+        return cls(
+            iid=issue['iid'],
+            title=issue['title'],
+            _description=pack_text(issue.get('description') or ''),
+            author=_username(issue.get('author')) or 'Unknown',
+            closed_at=issue.get('closed_at'),
+            closed_by=_username(issue.get('closed_by')),
+            web_url=issue.get('web_url'),
+            labels=[sys.intern(label) for label in issue.get('labels', [])],
+            milestone=_intern(issue['milestone'].get('title')) if issue.get('milestone') else None,
+            assignees=[_username(a) for a in (issue.get('assignees') or [])]
+        )
+
+
+IssueRecord.description = text_property('_description', "Description, decompressed on access")
+
+
+@dataclass(slots=True, eq=False)
+class CommitRecord(Record):
+    id: str
+    short_id: Optional[str] = None
+    title: Optional[str] = None
+    _message: Text = None
+    author_name: Optional[str] = None
+    author_email: Optional[str] = None
+    authored_date: Optional[str] = None
+    committed_date: Optional[str] = None
+    web_url: Optional[str] = None
+    parent_ids: List[str] = dataclasses.field(default_factory=list)
+    # Set by tag-range collection
+    merge_request_iid: Optional[int] = None
+    project: Optional[str] = None
+
+    @classmethod
+    def from_payload(cls, commit: Dict) -> 'CommitRecord':
+        """Build the commit record from a GitLab API payload"""
+        return cls(
+            id=commit['id'],
+            short_id=commit.get('short_id'),
+            title=commit.get('title'),
+            _message=pack_text(commit.get('message')),
+            author_name=_intern(commit.get('author_name')),
+            author_email=_intern(commit.get('author_email')),
+            authored_date=commit.get('authored_date'),
+            committed_date=commit.get('committed_date'),
+            web_url=commit.get('web_url'),
+            parent_ids=commit.get('parent_ids', [])
+        )
+
+
+CommitRecord.message = text_property('_message', "Commit message, decompressed on access")
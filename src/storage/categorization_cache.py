@@ -0,0 +1,101 @@
+"""
+Persistent cache of LLM categorization results
+
+Entries are keyed on a content hash of the change plus the model name, the
+prompt version and the compaction version (rules and token budget), so any
+edit to the MR, the prompt or what the model is shown produces a fresh key.
+The cache is a small SQLite file with least-recently-used eviction.
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, Iterable, Optional
+
+DEFAULT_CACHE_PATH = '.release_notes_cache/categories.sqlite3'
+
+
+def cache_key(title: str, description: str, model: str, prompt_version: str, compaction_version: str) -> str:
+    """Content hash identifying one categorization"""
+    digest = hashlib.sha256()
+    for part in (title, description, model, prompt_version, compaction_version):
+        digest.update((part or '').encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class CategorizationCache:
+    """SQLite-backed, size-bounded LRU cache of category assignments"""
+
+    def __init__(self, path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.path = path or os.getenv('CATEGORY_CACHE_PATH') or DEFAULT_CACHE_PATH
+        self.max_entries = max_entries or int(os.getenv('CATEGORY_CACHE_MAX_ENTRIES', '50000'))
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS categories ("
+                "key TEXT PRIMARY KEY, category TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS categories_last_used ON categories (last_used)")
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Look up several keys, refreshing the recency of the ones found"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock, self._conn:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, category FROM categories WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                found.update(rows)
+            now = time.time()
+            self._conn.executemany(
+                "UPDATE categories SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+            )
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, entries: Dict[str, str]):
+        """Store category assignments and evict the least recently used overflow"""
+        if not entries:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO categories (key, category, last_used) VALUES (?, ?, ?)",
+                [(key, category, now) for key, category in entries.items()]
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM categories").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM categories WHERE key IN "
+                    "(SELECT key FROM categories ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get hit/miss counts since the cache was opened"""
+        lookups = self.hits + self.misses
+        (size,) = self._conn.execute("SELECT COUNT(*) FROM categories").fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': size
+        }
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,69 @@
+"""
+Batch-level journal of categorization results for resumable runs
+
+Graph checkpoints only land between nodes, so a failure halfway through the
+write node would otherwise lose every batch already categorized. Each batch
+is journaled under the run's thread ID as soon as it completes; a resumed
+run reads the journal back before calling the LLM, and the entries are
+dropped once the write node finishes.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+
+DEFAULT_CHECKPOINT_PATH = '.release_notes_cache/checkpoints.sqlite3'
+
+
+class CategorizationJournal:
+    """SQLite table of per-thread category assignments, keyed like the categorization cache"""
+
+    def __init__(self, path: Optional[str] = None):
+        # Shares the database file of the graph checkpointer
+        self.path = path or os.getenv('CHECKPOINT_PATH') or DEFAULT_CHECKPOINT_PATH
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS categorization_journal ("
+                "thread_id TEXT NOT NULL, key TEXT NOT NULL, category TEXT NOT NULL, "
+                "PRIMARY KEY (thread_id, key))"
+            )
+
+    def get_many(self, thread_id: str, keys: Iterable[str]) -> Dict[str, str]:
+        """Look up journaled categories for a thread"""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, category FROM categorization_journal "
+                    f"WHERE thread_id = ? AND key IN ({placeholders})", [thread_id, *chunk]
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, thread_id: str, entries: Dict[str, str]):
+        """Journal the categories of one completed batch"""
+        if not entries:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO categorization_journal (thread_id, key, category) VALUES (?, ?, ?)",
+                [(thread_id, key, category) for key, category in entries.items()]
+            )
+
+    def clear(self, thread_id: str):
+        """Drop a thread's entries once its categorization is checkpointed"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM categorization_journal WHERE thread_id = ?", (thread_id,))
+
+    def close(self):
+        self._conn.close()
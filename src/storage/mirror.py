@@ -0,0 +1,145 @@
+"""
+Local mirror of GitLab data for incremental collection
+
+Raw API payloads for merge requests, issues, commits and milestones are
+kept in SQLite, keyed by project, source and iid (or SHA for commits). Each
+(project, source) pair carries a watermark: the oldest window start that has
+been synced and the newest `updated_at` seen. Later runs only ask GitLab for
+items updated after the watermark and answer date-window queries locally.
+Commits are immutable but can land long after their commit date (a merged
+branch keeps its dates), so commit sources also record the head SHA of
+their ref, and later syncs fetch what is reachable from the new head only.
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+# Field that places an item in a release window, per source
+EVENT_FIELDS = {
+    'merge_requests': 'merged_at',
+    'issues': 'closed_at',
+    'commits': 'committed_date',
+    'milestones': 'updated_at'
+}
+
+# Field compared when upserting, and the newest value seen, per source
+UPDATED_FIELDS = {
+    'merge_requests': 'updated_at',
+    'issues': 'updated_at',
+    'commits': 'committed_date',
+    'milestones': 'updated_at'
+}
+
+# Identity field, per source
+KEY_FIELDS = {
+    'merge_requests': 'iid',
+    'issues': 'iid',
+    'commits': 'id',
+    'milestones': 'id'
+}
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    """Convert a GitLab ISO 8601 timestamp into epoch seconds"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+def _base_source(source: str) -> str:
+    """Strip qualifiers such as the ref name from 'commits:main'"""
+    return source.split(':', 1)[0]
+
+
+class GitLabMirror:
+    """SQLite store of GitLab items with per-source sync watermarks"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('GITLAB_MIRROR_PATH') or '.release_notes_cache/gitlab_mirror.sqlite3'
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS items ("
+                "project TEXT NOT NULL, source TEXT NOT NULL, key TEXT NOT NULL, "
+                "updated_at REAL, event_at REAL, payload TEXT NOT NULL, "
+                "PRIMARY KEY (project, source, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS items_event ON items (project, source, event_at)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks ("
+                "project TEXT NOT NULL, source TEXT NOT NULL, synced_from TEXT NOT NULL, "
+                "synced_until TEXT, PRIMARY KEY (project, source))"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(watermarks)")}
+            if 'head' not in columns:
+                # Mirrors created before commit sources recorded their ref head
+                self._conn.execute("ALTER TABLE watermarks ADD COLUMN head TEXT")
+
+    def get_watermark(self, project: str, source: str) -> Optional[Dict[str, Optional[str]]]:
+        """Get the synced range (and ref head, for commits) of a source, or None if it was never synced"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT synced_from, synced_until, head FROM watermarks WHERE project = ? AND source = ?",
+                (project, source)
+            ).fetchone()
+        if row is None:
+            return None
+        return {'synced_from': row[0], 'synced_until': row[1], 'head': row[2]}
+
+    def set_watermark(self, project: str, source: str, synced_from: str, synced_until: Optional[str],
+                      head: Optional[str] = None):
+        """Record the synced range of a source, and the synced ref head for commits"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO watermarks (project, source, synced_from, synced_until, head) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (project, source, synced_from, synced_until, head)
+            )
+
+    def upsert(self, project: str, source: str, items: Iterable[Dict]) -> Optional[str]:
+        """Store payloads, never replacing a newer copy; returns the newest updated timestamp seen"""
+        base = _base_source(source)
+        key_field, event_field, updated_field = KEY_FIELDS[base], EVENT_FIELDS[base], UPDATED_FIELDS[base]
+
+        rows = []
+        newest, newest_ts = None, None
+        for item in items:
+            updated = item.get(updated_field)
+            updated_ts = _timestamp(updated)
+            if updated_ts is not None and (newest_ts is None or updated_ts > newest_ts):
+                newest, newest_ts = updated, updated_ts
+            rows.append((project, source, str(item[key_field]), updated_ts,
+                         _timestamp(item.get(event_field)), json.dumps(item)))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO items (project, source, key, updated_at, event_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (project, source, key) DO UPDATE SET "
+                "updated_at = excluded.updated_at, event_at = excluded.event_at, payload = excluded.payload "
+                "WHERE excluded.updated_at IS NULL OR items.updated_at IS NULL "
+                "OR excluded.updated_at >= items.updated_at",
+                rows
+            )
+        return newest
+
+    def query(self, project: str, source: str, since: datetime, until: datetime) -> List[Dict]:
+        """Get stored payloads whose event timestamp falls inside [since, until]"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload FROM items WHERE project = ? AND source = ? "
+                "AND event_at BETWEEN ? AND ? ORDER BY event_at DESC",
+                (project, source, since.timestamp(), until.timestamp())
+            ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,186 @@
+"""
+Native async GitLab REST client
+
+A thin httpx-based client used as an alternative transport to python-gitlab.
+It keeps a pooled keep-alive connection to GitLab, fetches offset-paginated
+lists concurrently once the total page count is known, follows keyset
+`Link` headers where GitLab offers them, and yields pages as they arrive.
+"""
+
+import os
+import re
+import time
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import quote
+import httpx
+from .scheduler import AdaptiveScheduler
+from ..instrumentation import record_api_call
+
+# Page size used for list endpoints (GitLab's maximum)
+PAGE_SIZE = 100
+
+_NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+def project_path(project_id) -> str:
+    """URL-encode a project ID or path for use in REST paths"""
+    return f"projects/{quote(str(project_id), safe='')}"
+
+
+class AsyncGitLabClient:
+    """Pooled async client for the GitLab REST API"""
+
+    def __init__(self, gitlab_url: Optional[str] = None, private_token: Optional[str] = None,
+                 max_concurrency: int = 8, page_concurrency: int = 4, timeout: Optional[float] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None,
+                 scheduler: Optional[AdaptiveScheduler] = None):
+        self.gitlab_url = (gitlab_url or os.getenv('GITLAB_URL', 'https://gitlab.com')).rstrip('/')
+        self.private_token = private_token or os.getenv('GITLAB_PRIVATE_TOKEN')
+        self.max_concurrency = max_concurrency
+        self.page_concurrency = page_concurrency
+        self.timeout = timeout if timeout is not None else float(os.getenv('TIMEOUT', '30'))
+        # Custom transports make it possible to run against stub servers
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        # Adapts concurrency to GitLab's rate limits and retries transient failures
+        self.scheduler = scheduler or AdaptiveScheduler('gitlab', max_concurrency)
+
+        # Total requests issued by this client
+        self.requests_made = 0
+
+    def _http(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=f"{self.gitlab_url}/api/v4/",
+                headers={'PRIVATE-TOKEN': self.private_token or ''},
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency
+                ),
+                timeout=self.timeout,
+                transport=self.transport
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def request(self, path: str, params: Optional[Dict] = None) -> httpx.Response:
+        """Issue a GET request through the scheduler, retrying throttled and transient failures"""
+        client = self._http()
+
+        async def send() -> httpx.Response:
+            self.requests_made += 1
+            started = time.perf_counter()
+            response = await client.get(path, params=params)
+            record_api_call('GET', str(response.url), response.status_code, len(response.content),
+                            time.perf_counter() - started)
+            self.scheduler.observe(response.headers)
+            response.raise_for_status()
+            return response
+
+        return await self.scheduler.run(send)
+
+    async def get(self, path: str, **params) -> Dict:
+        """GET a single resource"""
+        response = await self.request(path, params=_clean(params))
+        return response.json()
+
+    async def graphql(self, query: str, variables: Optional[Dict] = None) -> Dict:
+        """POST a GraphQL query through the scheduler, returning its `data`"""
+        client = self._http()
+
+        async def send() -> httpx.Response:
+            self.requests_made += 1
+            started = time.perf_counter()
+            response = await client.post(f"{self.gitlab_url}/api/graphql",
+                                         json={'query': query, 'variables': variables or {}})
+            record_api_call('POST', str(response.url), response.status_code, len(response.content),
+                            time.perf_counter() - started)
+            self.scheduler.observe(response.headers)
+            response.raise_for_status()
+            return response
+
+        return graphql_data((await self.scheduler.run(send)).json())
+
+    async def iter_pages(self, path: str, keyset: bool = False, **params) -> AsyncIterator[List[Dict]]:
+        """Yield every page of a list endpoint in order
+
+        With offset pagination the first response tells us the total page count,
+        after which the remaining pages are fetched concurrently. With keyset
+        pagination (or when GitLab omits totals) the `next` links are followed.
+        """
+        params = {**_clean(params), 'per_page': PAGE_SIZE}
+        if keyset:
+            params['pagination'] = 'keyset'
+            params.setdefault('order_by', 'id')
+            params.setdefault('sort', 'asc')
+
+        response = await self.request(path, params=params)
+        yield response.json()
+
+        total_pages = response.headers.get('X-Total-Pages')
+        if not keyset and total_pages:
+            async for page in self._iter_offset_pages(path, params, int(total_pages)):
+                yield page
+            return
+
+        next_url = _next_link(response)
+        while next_url:
+            response = await self.request(next_url)
+            yield response.json()
+            next_url = _next_link(response)
+
+    async def _iter_offset_pages(self, path: str, params: Dict, total_pages: int) -> AsyncIterator[List[Dict]]:
+        """Fetch pages 2..total_pages with a sliding window of concurrent requests"""
+        async def fetch(page: int) -> List[Dict]:
+            response = await self.request(path, params={**params, 'page': page})
+            return response.json()
+
+        pending = {}
+        next_page = 2
+        try:
+            for page in range(2, total_pages + 1):
+                while next_page <= total_pages and len(pending) < self.page_concurrency:
+                    pending[next_page] = asyncio.ensure_future(fetch(next_page))
+                    next_page += 1
+                yield await pending.pop(page)
+        finally:
+            for task in pending.values():
+                task.cancel()
+
+    async def list_all(self, path: str, keyset: bool = False, **params) -> List[Dict]:
+        """Collect every page of a list endpoint"""
+        items = []
+        async for page in self.iter_pages(path, keyset=keyset, **params):
+            items.extend(page)
+        return items
+
+    async def aclose(self):
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._client_loop = None
+
+
+def graphql_data(payload: Dict) -> Dict:
+    """The `data` of a GraphQL response, raising on query errors (GraphQL answers them with 200)"""
+    if payload.get('errors'):
+        raise ValueError(f"GitLab GraphQL error: {payload['errors'][0].get('message')}")
+    return payload['data']
+
+
+def _clean(params: Dict) -> Dict:
+    """Drop unset query parameters and use GitLab's `key[]` form for array values"""
+    return {f"{key}[]" if isinstance(value, (list, tuple)) else key: value
+            for key, value in params.items() if value is not None}
+
+
+def _next_link(response: httpx.Response) -> Optional[str]:
+    """Extract the rel="next" URL from a Link header"""
+    match = _NEXT_LINK.search(response.headers.get('Link', ''))
+    return match.group(1) if match else None
@@ -3,201 +3,973 @@ GitLab tools using LangChain GitLab toolkit with proper python-gitlab API access
 
 This implementation shows how to properly use the LangChain GitLabAPIWrapper
 to access the underlying python-gitlab API for operations that aren't directly
-exposed through the LangChain tools.
+exposed through the LangChain tools. The connection, wrapper and toolkit are
+all created lazily, so importing and constructing the tools is cheap.
 """
 
 import os
+import re
+import math
 import asyncio
-from typing import List, Dict, Set, Optional
-from datetime import datetime
-from langchain_community.agent_toolkits.gitlab.toolkit import GitLabToolkit
-from langchain_community.utilities.gitlab import GitLabAPIWrapper
+from typing import AsyncIterator, List, Dict, Set, Optional, Tuple
+from datetime import datetime, timedelta
+from urllib.parse import quote
+import gitlab
 import gitlab.exceptions
+from .gitlab_async_client import AsyncGitLabClient, graphql_data, project_path
+from .scheduler import AdaptiveScheduler
+from .memo import SingleFlight, fetch_scope, memoized, recall, remember
+from ..instrumentation import RunStats, instrument_session
+from ..storage.mirror import GitLabMirror
+from ..records import CommitRecord, IssueRecord, MergeRequestRecord
+
+# Page size used for list endpoints (GitLab's maximum)
+LIST_PAGE_SIZE = 100
+
+# python-gitlab project manager for each REST resource
+PROJECT_MANAGERS = {
+    'merge_requests': 'mergerequests',
+    'issues': 'issues',
+    'repository/commits': 'commits',
+    'milestones': 'milestones'
+}
+
+# GitLab's merge commit message trailer, e.g. "See merge request group/project!123"
+MERGE_REQUEST_REF = re.compile(r'See merge request \S*!(\d+)')
+
+# Maximum iids per filtered merge request list call
+IIDS_PER_REQUEST = 100
+
+# Time after a tag range's newest commit within which its squash and
+# fast-forward merge requests are expected to have been merged and last updated
+TAG_RANGE_MERGE_SLACK = timedelta(hours=1)
+
+# Merged merge requests in a merge-date window. The REST API can only filter
+# them on updated_at; GraphQL filters on the merge date itself.
+MERGED_MERGE_REQUESTS_QUERY = """
+query($fullPath: ID!, $mergedAfter: Time, $mergedBefore: Time, $first: Int, $after: String) {
+  project(fullPath: $fullPath) {
+    mergeRequests(state: merged, mergedAfter: $mergedAfter, mergedBefore: $mergedBefore,
+                  first: $first, after: $after) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        iid title description state createdAt updatedAt mergedAt webUrl
+        sourceBranch targetBranch diffHeadSha mergeCommitSha squashCommitSha
+        author { username } mergeUser { username }
+        labels { nodes { title } } milestone { title }
+      }
+    }
+  }
+}
+"""
+
+# Diff summaries of merge requests by iid: GitLab computes them, so no diff is transferred
+MERGE_REQUEST_DIFF_STATS_QUERY = """
+query($fullPath: ID!, $iids: [String!], $first: Int) {
+  project(fullPath: $fullPath) {
+    mergeRequests(iids: $iids, first: $first) {
+      nodes { iid diffStatsSummary { additions deletions fileCount } diffStats { path } }
+    }
+  }
+}
+"""
+
+# Fields the list endpoints may omit; rows missing any of these get a detail fetch
+MR_DETAIL_FIELDS = ('merged_by',)
+ISSUE_DETAIL_FIELDS = ('closed_by',)
+
+
+def parse_gitlab_datetime(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp as returned by the GitLab API"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def in_window(timestamp: Optional[str], since: datetime, until: datetime) -> bool:
+    """Check whether a GitLab timestamp falls inside [since, until]"""
+    if not timestamp:
+        return False
+    try:
+        return since <= parse_gitlab_datetime(timestamp) <= until
+    except ValueError:
+        return False
+
+
+def first_parent_chain(commits_by_sha: Dict[str, Dict], head: str) -> List[str]:
+    """Walk first parents from `head`, newest first, while staying inside the commit set"""
+    chain = []
+    sha = head
+    while sha in commits_by_sha and sha not in chain:
+        chain.append(sha)
+        parents = commits_by_sha[sha].get('parent_ids') or []
+        sha = parents[0] if parents else None
+    return chain
+
+
+def merged_branch_commits(commits_by_sha: Dict[str, Dict], merge_sha: str, mainline: Set[str]) -> Set[str]:
+    """Commits a merge commit brought in: reachable from its side parents without touching the mainline"""
+    pending = list((commits_by_sha[merge_sha].get('parent_ids') or [])[1:])
+    seen = set()
+    while pending:
+        sha = pending.pop()
+        if sha in seen or sha in mainline or sha not in commits_by_sha:
+            continue
+        seen.add(sha)
+        pending.extend(commits_by_sha[sha].get('parent_ids') or [])
+    return seen
+
+
+def attribute_commits(commits_by_sha: Dict[str, Dict], mainline: List[str],
+                      landed: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Map commits to the merge request of the mainline commit that landed them
+
+    The mainline is walked oldest first, so a commit reachable from several
+    merges belongs to the first one that brought it in.
+    """
+    mainline_set = set(mainline)
+    attributed: Dict[str, Dict] = {}
+    for sha in reversed(mainline):
+        mr = landed.get(sha)
+        if mr is None:
+            continue
+        attributed[sha] = mr
+        for branch_sha in merged_branch_commits(commits_by_sha, sha, mainline_set):
+            attributed.setdefault(branch_sha, mr)
+    return attributed
+
+
+def split_window(since: datetime, until: datetime, partitions: int) -> List[Tuple[datetime, datetime]]:
+    """Split [since, until] into equally sized consecutive sub-windows"""
+    partitions = max(1, partitions)
+    step = (until - since) / partitions
+    bounds = [since + step * i for i in range(partitions)] + [until]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def merge_request_from_graphql(node: Dict) -> Dict:
+    """REST-shaped merge request payload from a GraphQL merge request node"""
+    return {
+        'iid': int(node['iid']),
+        'title': node['title'],
+        'description': node.get('description'),
+        'state': node.get('state'),
+        'created_at': node.get('createdAt'),
+        'updated_at': node.get('updatedAt'),
+        'merged_at': node.get('mergedAt'),
+        'web_url': node.get('webUrl'),
+        'source_branch': node.get('sourceBranch'),
+        'target_branch': node.get('targetBranch'),
+        'sha': node.get('diffHeadSha'),
+        'merge_commit_sha': node.get('mergeCommitSha'),
+        'squash_commit_sha': node.get('squashCommitSha'),
+        'author': node.get('author'),
+        'merged_by': node.get('mergeUser'),
+        'labels': [label['title'] for label in (node.get('labels') or {}).get('nodes', [])],
+        'milestone': node.get('milestone')
+    }
+
+
+def contributors_of(merge_requests: List[Dict], commits: List[Dict], issues: List[Dict]) -> Set[str]:
+    """Authors, mergers and assignees of collected items"""
+    contributors = set()
+    for mr in merge_requests:
+        contributors.add(mr['author'])
+        if mr.get('merged_by'):
+            contributors.add(mr['merged_by'])
+    for commit in commits:
+        contributors.add(commit['author_name'])
+    for issue in issues:
+        contributors.add(issue['author'])
+        contributors.update(issue.get('assignees', []))
+    return contributors
+
+
+def diff_stats_from_graphql(node: Dict) -> Dict[str, object]:
+    """Files, added and removed lines and top-level paths of a GraphQL merge request node"""
+    summary = node.get('diffStatsSummary') or {}
+    paths = {path.split('/', 1)[0] if '/' in path else '.'
+             for path in (item['path'] for item in node.get('diffStats') or [])}
+    return {'files': summary.get('fileCount', 0), 'additions': summary.get('additions', 0),
+            'deletions': summary.get('deletions', 0), 'paths': sorted(paths)}
+
+
+class ScheduledGitlab(gitlab.Gitlab):
+    """python-gitlab client that leaves rate limits and retries to the AdaptiveScheduler
+    
+    By default python-gitlab sleeps through 429s inside the worker thread, so
+    the scheduler never sees the throttling. Here every non-2xx response is
+    raised at once and retried (or not) by `AdaptiveScheduler.run`.
+    """
+    
+    def http_request(self, *args, **kwargs):
+        kwargs.setdefault('obey_rate_limit', False)
+        kwargs.setdefault('retry_transient_errors', False)
+        return super().http_request(*args, **kwargs)
+
+
+def connect_gitlab(scheduler: AdaptiveScheduler) -> gitlab.Gitlab:
+    """Create a python-gitlab connection whose calls are paced by `scheduler`"""
+    gitlab_api = ScheduledGitlab(
+        os.getenv('GITLAB_URL', 'https://gitlab.com'),
+        private_token=os.getenv('GITLAB_PRIVATE_TOKEN'),
+        timeout=float(os.getenv('TIMEOUT', '30')),
+        retry_transient_errors=False
+    )
+    # Rate-limit headers of every response reach the scheduler through the session hook
+    instrument_session(gitlab_api.session, scheduler)
+    return gitlab_api
+
+
+def milestone_to_dict(milestone: Dict) -> Dict:
+    """Build the milestone record from a GitLab API payload"""
+    return {
+        'id': milestone['id'],
+        'iid': milestone.get('iid'),
+        'title': milestone.get('title'),
+        'description': milestone.get('description'),
+        'state': milestone.get('state'),
+        'created_at': milestone.get('created_at'),
+        'updated_at': milestone.get('updated_at'),
+        'due_date': milestone.get('due_date'),
+        'web_url': milestone.get('web_url')
+    }
 
 class GitLabLangChainTools:
     """GitLab tools using LangChain toolkit with direct python-gitlab access"""
     
-    def __init__(self):
-        # Initialize GitLab API wrapper
-        print(f"Initializing GitLab connection...")
-        print(f"GitLab URL: {os.getenv('GITLAB_URL', 'https://gitlab.com')}")
-        print(f"Project ID: {os.getenv('PROJECT_ID')}")
+    # API calls made by the most recent collection of each source, per run
+    api_calls = RunStats(dict)
+    # Items transferred vs. kept by the most recent collection of each source, per run
+    transferred = RunStats(dict)
+    overfetch = RunStats(dict)
+    
+    def __init__(self, max_concurrency: Optional[int] = None, collection_mode: Optional[str] = None,
+                 window_partitions: Optional[int] = None, transport: Optional[str] = None,
+                 async_client: Optional[AsyncGitLabClient] = None, mirror: Optional[GitLabMirror] = None,
+                 project_id: Optional[str] = None, gitlab_api: Optional[gitlab.Gitlab] = None,
+                 scheduler: Optional[AdaptiveScheduler] = None):
+        # Maximum number of GitLab requests in flight, shared by every source
+        self.max_concurrency = max_concurrency or int(os.getenv('GITLAB_MAX_CONCURRENCY', '8'))
         
-        try:
-            self.gitlab_wrapper = GitLabAPIWrapper(
-                gitlab_url=os.getenv('GITLAB_URL', 'https://gitlab.com'),
-                gitlab_personal_access_token=os.getenv('GITLAB_PRIVATE_TOKEN'),
-                gitlab_repository=os.getenv('PROJECT_ID')  # Can be project ID or path
-            )
-            print("GitLab wrapper initialized successfully")
-        except Exception as e:
-            print(f"Error initializing GitLab wrapper: {e}")
-            raise
+        # 'python-gitlab' runs the sync client in threads; 'async' uses the pooled
+        # httpx client for every data call
+        self.transport = transport or os.getenv('GITLAB_TRANSPORT', 'python-gitlab')
+        if async_client is not None:
+            self.transport = 'async'
+        if self.transport not in ('python-gitlab', 'async'):
+            raise ValueError(f"Unknown GitLab transport: {self.transport}")
+        self.project_id = project_id or os.getenv('PROJECT_ID')
+        self.async_client = async_client
+        if self.transport == 'async' and self.async_client is None:
+            self.async_client = AsyncGitLabClient(max_concurrency=self.max_concurrency, scheduler=scheduler)
         
-        # After initialization, we have access to:
-        # - self.gitlab_wrapper.gitlab: The python-gitlab Gitlab instance
-        # - self.gitlab_wrapper.gitlab_repo_instance: The python-gitlab Project instance
+        # Every GitLab call goes through one adaptive scheduler per connection,
+        # which backs off on rate limits and retries transient failures
+        if self.async_client is not None:
+            self.scheduler = self.async_client.scheduler
+        else:
+            self.scheduler = scheduler or AdaptiveScheduler('gitlab', self.max_concurrency)
+        self._project_info: Optional[Dict] = None
         
-        # Create toolkit for LangChain tools
-        print("Creating GitLab toolkit...")
-        try:
-            self.toolkit = GitLabToolkit.from_gitlab_api_wrapper(self.gitlab_wrapper)
-            self.tools = self.toolkit.get_tools()
-            
-            # Log available tools
-            tool_names = [tool.name for tool in self.tools]
-            print(f"Available LangChain GitLab tools: {', '.join(tool_names)}")
-        except Exception as e:
-            print(f"Error creating toolkit: {e}")
-            # Continue anyway, we mainly use direct API access
-            self.tools = []
+        # Concurrent identical fetches share one crawl; results are reused within
+        # a fetch_scope() (one graph run) instead of being fetched again
+        self.single_flight = SingleFlight()
         
-        # Get direct access to project
-        try:
-            self.project = self.gitlab_wrapper.gitlab_repo_instance
-            print(f"Connected to GitLab project: {self.project.path_with_namespace}")
-        except Exception as e:
-            print(f"Error accessing project: {e}")
-            raise
+        # 'updated' lists merge requests filtered on updated_after/updated_before over
+        # REST; 'windowed' lists them filtered on the merge date over GraphQL, in
+        # merge-date sub-windows fetched in parallel. Issues and commits are
+        # filtered the same way in both modes.
+        self.collection_mode = collection_mode or os.getenv('GITLAB_COLLECTION_MODE', 'updated')
+        if self.collection_mode not in ('updated', 'windowed'):
+            raise ValueError(f"Unknown collection mode: {self.collection_mode}")
+        self.window_partitions = window_partitions or int(os.getenv('GITLAB_WINDOW_PARTITIONS', '4'))
+        
+        # Optional local mirror; when set, only deltas since the last sync are fetched
+        if mirror is None and os.getenv('GITLAB_MIRROR_PATH'):
+            mirror = GitLabMirror()
+        self.mirror = mirror
+        
+        # The python-gitlab connection, the project handle and the LangChain
+        # wrapper and toolkit are created on first use, so constructing the tools
+        # makes no network calls. A shared connection (python-gitlab instance or
+        # async client) is used as is.
+        self._gitlab_api = gitlab_api
+        self._project = None
+        self._gitlab_wrapper = None
+        self._toolkit_tools = None
+    
+    @property
+    def gitlab_api(self) -> gitlab.Gitlab:
+        """The python-gitlab client, created on first use"""
+        if self._gitlab_api is None:
+            print(f"Initializing GitLab connection to {os.getenv('GITLAB_URL', 'https://gitlab.com')}")
+            self._gitlab_api = connect_gitlab(self.scheduler)
+        return self._gitlab_api
+    
+    @property
+    def project(self):
+        """Lazily bound python-gitlab project; attributes are not fetched"""
+        if self._project is None:
+            self._project = self.gitlab_api.projects.get(self.project_id, lazy=True)
+        return self._project
+    
+    @property
+    def gitlab_wrapper(self):
+        """The LangChain GitLab API wrapper, created on first use
+        
+        Building it authenticates and fetches the project, so nothing in the
+        collection path touches it.
+        """
+        if self._gitlab_wrapper is None:
+            from langchain_community.utilities.gitlab import GitLabAPIWrapper
+            try:
+                self._gitlab_wrapper = GitLabAPIWrapper(
+                    gitlab_url=os.getenv('GITLAB_URL', 'https://gitlab.com'),
+                    gitlab_personal_access_token=os.getenv('GITLAB_PRIVATE_TOKEN'),
+                    gitlab_repository=self.project_id  # Can be project ID or path
+                )
+                print("GitLab wrapper initialized successfully")
+            except Exception as e:
+                print(f"Error initializing GitLab wrapper: {e}")
+                raise
+        return self._gitlab_wrapper
+    
+    @property
+    def tools(self) -> list:
+        """LangChain GitLab toolkit tools, created on first use"""
+        if self._toolkit_tools is None:
+            from langchain_community.agent_toolkits.gitlab.toolkit import GitLabToolkit
+            try:
+                self._toolkit_tools = GitLabToolkit.from_gitlab_api_wrapper(self.gitlab_wrapper).get_tools()
+                print(f"Available LangChain GitLab tools: {', '.join(tool.name for tool in self._toolkit_tools)}")
+            except Exception as e:
+                print(f"Error creating toolkit: {e}")
+                self._toolkit_tools = []
+        return self._toolkit_tools
+    
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking python-gitlab call in a thread through the shared scheduler"""
+        return await self.scheduler.run(lambda: asyncio.to_thread(func, *args, **kwargs))
+    
+    def _start_collection(self, source: str):
+        """Reset the per-collection counters of a source"""
+        self.api_calls[source] = 0
+        self.transferred[source] = 0
+    
+    def _count_calls(self, source: str, calls: int = 1):
+        """Record GitLab API round trips made while collecting a source"""
+        self.api_calls[source] = self.api_calls.get(source, 0) + calls
     
-    async def get_merge_requests(self, project_id: str, since: datetime, until: datetime) -> List[Dict]:
+    def get_api_call_counts(self) -> Dict[str, int]:
+        """Get the number of API calls made by the most recent collection of each source"""
+        return dict(self.api_calls)
+    
+    def _record_overfetch(self, source: str, kept: int):
+        """Record how many items were transferred and how many survived client-side filtering"""
+        fetched = self.transferred.get(source, 0)
+        self.overfetch[source] = {
+            'fetched': fetched,
+            'kept': kept,
+            'ratio': fetched / kept if kept else float(fetched)
+        }
+    
+    def get_overfetch_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get fetched/kept counts and over-fetch ratios of the most recent collections"""
+        return {source: dict(stats) for source, stats in self.overfetch.items()}
+    
+    async def _list_resource(self, resource: str, source: str, **filters) -> List[Dict]:
+        """List every item of a project resource with the configured transport"""
+        if self.async_client is None:
+            manager = getattr(self.project, PROJECT_MANAGERS[resource])
+            return await self._run(self._list_all, manager, source, **filters)
+        
+        items = []
+        async for page in self._iter_resource_pages(resource, source, **filters):
+            items.extend(page)
+        return items
+    
+    async def _iter_resource_pages(self, resource: str, source: str, **filters) -> AsyncIterator[List[Dict]]:
+        """Yield the pages of a project resource as they are fetched"""
+        if self.async_client is not None:
+            async for page in self.async_client.iter_pages(f"{project_path(self.project_id)}/{resource}", **filters):
+                self._count_calls(source)
+                yield page
+            return
+        
+        manager = getattr(self.project, PROJECT_MANAGERS[resource])
+        page_number = 1
+        while True:
+            objects = await self._run(manager.list, page=page_number, per_page=LIST_PAGE_SIZE, **filters)
+            self._count_calls(source)
+            yield [obj.attributes for obj in objects]
+            if len(objects) < LIST_PAGE_SIZE:
+                return
+            page_number += 1
+    
+    async def _get_resource(self, resource: str, iid) -> Dict:
+        """Get a single project resource with the configured transport"""
+        if self.async_client is None:
+            manager = getattr(self.project, PROJECT_MANAGERS[resource])
+            return (await self._run(manager.get, iid)).attributes
+        return await self.async_client.get(f"{project_path(self.project_id)}/{resource}/{iid}")
+    
+    async def _get_path(self, path: str, **params):
+        """GET an arbitrary project-relative REST path with the configured transport"""
+        full_path = f"{project_path(self.project_id)}/{path}"
+        if self.async_client is None:
+            return await self._run(self.gitlab_api.http_get, f"/{full_path}", query_data=params)
+        return await self.async_client.get(full_path, **params)
+    
+    async def _list_path(self, path: str, **params) -> List[Dict]:
+        """GET every page of an arbitrary project-relative REST list path"""
+        full_path = f"{project_path(self.project_id)}/{path}"
+        if self.async_client is None:
+            return await self._run(self.gitlab_api.http_list, f"/{full_path}", query_data=params, get_all=True)
+        return await self.async_client.list_all(full_path, **params)
+    
+    async def _get_project_info(self) -> Dict:
+        """Get the project's attributes, fetched once"""
+        if self._project_info is None:
+            if self.async_client is None:
+                self._project_info = await self._run(self.gitlab_api.http_get, f"/{project_path(self.project_id)}")
+            else:
+                self._project_info = await self.async_client.get(project_path(self.project_id))
+        return self._project_info
+    
+    async def _default_branch(self) -> str:
+        """Get the project's default branch"""
+        if self._project_info is None and self.async_client is None:
+            # Lazily bound projects have no attributes loaded yet
+            default_branch = getattr(self.project, 'default_branch', None)
+            if default_branch:
+                return default_branch
+        return (await self._get_project_info())['default_branch']
+    
+    async def get_project_path(self) -> str:
+        """Get the project's full path, resolving a numeric project ID"""
+        if not str(self.project_id).isdigit():
+            return str(self.project_id)
+        return (await self._get_project_info())['path_with_namespace']
+    
+    async def _graphql(self, source: str, query: str, variables: Dict) -> Dict:
+        """Run a GraphQL query with the configured transport"""
+        self._count_calls(source)
+        if self.async_client is None:
+            payload = await self._run(self.gitlab_api.http_post, f"{self.gitlab_api.url}/api/graphql",
+                                      post_data={'query': query, 'variables': variables})
+            return graphql_data(payload)
+        return await self.async_client.graphql(query, variables)
+    
+    async def _iter_merged_pages(self, source: str, since: datetime, until: datetime) -> AsyncIterator[List[Dict]]:
+        """Yield pages of the merge requests merged in [since, until], filtered by GitLab on the merge date"""
+        variables = {'fullPath': await self.get_project_path(), 'mergedAfter': since.isoformat(),
+                     'mergedBefore': until.isoformat(), 'first': LIST_PAGE_SIZE, 'after': None}
+        while True:
+            project = (await self._graphql(source, MERGED_MERGE_REQUESTS_QUERY, variables))['project']
+            if project is None:
+                raise ValueError(f"Project {variables['fullPath']} not found")
+            connection = project['mergeRequests']
+            yield [merge_request_from_graphql(node) for node in connection['nodes']]
+            if not connection['pageInfo']['hasNextPage']:
+                return
+            variables['after'] = connection['pageInfo']['endCursor']
+    
+    async def _list_merged(self, source: str, since: datetime, until: datetime) -> List[Dict]:
+        """List the merge requests merged in the window, one GraphQL crawl per merge-date sub-window"""
+        async def crawl(start: datetime, end: datetime) -> List[Dict]:
+            items = []
+            async for page in self._iter_merged_pages(source, start, end):
+                items.extend(page)
+            return items
+        
+        pages = await asyncio.gather(*(crawl(start, end)
+                                       for start, end in split_window(since, until, self.window_partitions)))
+        
+        # Sub-windows share inclusive boundaries, so drop the odd duplicate
+        items = {}
+        for page in pages:
+            self.transferred[source] = self.transferred.get(source, 0) + len(page)
+            for item in page:
+                items.setdefault(item['iid'], item)
+        return list(items.values())
+    
+    async def _list_windows(self, resource: str, source: str, windows: List[Dict[str, str]],
+                            key: str = 'iid', **filters) -> List[Dict]:
+        """List several sub-windows in parallel and merge the results"""
+        pages = await asyncio.gather(*(
+            self._list_resource(resource, source, **window, **filters)
+            for window in windows
+        ))
+        
+        # Sub-windows share inclusive boundaries, so drop the odd duplicate
+        items = {}
+        for page in pages:
+            self.transferred[source] = self.transferred.get(source, 0) + len(page)
+            for item in page:
+                items.setdefault(item[key], item)
+        return list(items.values())
+    
+    async def _list_closed_in_window(self, resource: str, source: str, since: datetime, until: datetime,
+                                     **filters) -> List[Dict]:
+        """List items that may have been merged/closed in the window using the configured mode"""
+        if self.mirror is not None:
+            await self._sync_mirror(resource, source, since, **filters)
+            return self.mirror.query(str(self.project_id), source, since, until)
+        
+        return await self._list_windows(resource, source, self._closed_windows(since, until), **filters)
+    
+    def _closed_windows(self, since: datetime, until: datetime) -> List[Dict[str, str]]:
+        """REST filter sets covering items merged/closed in the window
+        
+        The REST API has no merged/closed date filter, so this is the update
+        window; items merged or closed in it are kept client-side.
+        """
+        return [{'updated_after': since.isoformat(), 'updated_before': until.isoformat()}]
+    
+    async def _sync_mirror(self, resource: str, source: str, since: datetime,
+                           time_params: Tuple[str, str] = ('updated_after', 'updated_before'),
+                           key: str = 'iid', mirror_source: Optional[str] = None, **filters):
+        """Bring the local mirror of a source up to date from `since` onwards
+        
+        Only items updated after the watermark are fetched, plus the gap before
+        the synced range when an older window is requested.
+        """
+        after, before = time_params
+        project = str(self.project_id)
+        mirror_source = mirror_source or source
+        mark = self.mirror.get_watermark(project, mirror_source)
+        
+        windows = []
+        synced_from = since.isoformat()
+        synced_until = None
+        if mark is None:
+            windows.append({after: since.isoformat()})
+        else:
+            if since < parse_gitlab_datetime(mark['synced_from']):
+                windows.append({after: since.isoformat(), before: mark['synced_from']})
+            else:
+                synced_from = mark['synced_from']
+            synced_until = mark['synced_until']
+            windows.append({after: synced_until or mark['synced_from']})
+        
+        items = await self._list_windows(resource, source, windows, key=key, **filters)
+        newest = self.mirror.upsert(project, mirror_source, items)
+        if newest and (not synced_until or parse_gitlab_datetime(newest) > parse_gitlab_datetime(synced_until)):
+            synced_until = newest
+        self.mirror.set_watermark(project, mirror_source, synced_from, synced_until)
+        print(f"Synced {len(items)} {source} into local mirror")
+    
+    async def _sync_commit_mirror(self, ref_name: str, since: datetime) -> str:
+        """Bring the local mirror of a ref's commits up to date, returning its mirror source
+        
+        Commit dates cannot serve as the watermark: the commits of a branch
+        merged later keep their older dates. The ref's head SHA is recorded
+        instead, and later syncs compare it with the current head, which
+        returns every newly reachable commit whatever its date. The first
+        sync, a window older than the synced range, and a recorded head
+        that can no longer be compared (e.g. after a force push) list
+        commits by date.
+        """
+        project = str(self.project_id)
+        mirror_source = f"commits:{ref_name}"
+        mark = self.mirror.get_watermark(project, mirror_source)
+        
+        self._count_calls('commits')
+        head = (await self._get_path(f"repository/commits/{quote(ref_name, safe='')}"))['id']
+        
+        windows = []
+        synced_from, synced_until = since.isoformat(), None
+        commits: List[Dict] = []
+        if mark is None or not mark.get('head'):
+            windows.append({'since': since.isoformat()})
+        else:
+            synced_until = mark['synced_until']
+            if since < parse_gitlab_datetime(mark['synced_from']):
+                windows.append({'since': since.isoformat(), 'until': mark['synced_from']})
+            else:
+                synced_from = mark['synced_from']
+            if head != mark['head']:
+                try:
+                    self._count_calls('commits')
+                    compare = await self._get_path('repository/compare', **{'from': mark['head'], 'to': head})
+                    commits.extend(compare.get('commits') or [])
+                except Exception as e:
+                    print(f"Error comparing {ref_name} with the mirrored head, syncing by date: {e}")
+                    windows.append({'since': synced_until or mark['synced_from']})
+        
+        if windows:
+            commits.extend(await self._list_windows('repository/commits', 'commits', windows, key='id',
+                                                    ref_name=ref_name))
+        newest = self.mirror.upsert(project, mirror_source, commits)
+        if newest and (not synced_until or parse_gitlab_datetime(newest) > parse_gitlab_datetime(synced_until)):
+            synced_until = newest
+        self.mirror.set_watermark(project, mirror_source, synced_from, synced_until, head=head)
+        print(f"Synced {len(commits)} commits of {ref_name} into local mirror")
+        return mirror_source
+    
+    def _list_all(self, manager, source: str, **filters) -> List[Dict]:
+        """List every page of a manager and return the raw attribute dicts"""
+        result = manager.list(iterator=True, per_page=LIST_PAGE_SIZE, **filters)
+        items = [obj.attributes for obj in result]
+        pages = result.total_pages or max(1, math.ceil(len(items) / LIST_PAGE_SIZE))
+        self._count_calls(source, pages)
+        return items
+    
+    async def _fetch_details(self, resource: str, iids: List[int], source: str) -> Dict[int, Dict]:
+        """Fetch full objects for the given iids within the shared request budget"""
+        async def fetch(iid: int):
+            self._count_calls(source)
+            try:
+                return iid, await self._get_resource(resource, iid)
+            except Exception as e:
+                print(f"Error fetching {source} {iid} details: {e}")
+                raise
+        
+        return dict(await asyncio.gather(*(fetch(iid) for iid in iids)))
+    
+    async def _complete_items(self, resource: str, items: List[Dict], detail_fields, source: str) -> List[Dict]:
+        """Fill in fields the list endpoint did not return, fetching details only where needed"""
+        missing = [item['iid'] for item in items if any(field not in item for field in detail_fields)]
+        if not missing:
+            return items
+        
+        details = await self._fetch_details(resource, missing, source)
+        if self.mirror is not None and details:
+            # Mirrored under the resource; `source` only names the calls (e.g. 'tag_range')
+            self.mirror.upsert(str(self.project_id), resource, details.values())
+        return [details.get(item['iid'], item) for item in items]
+    
+    @memoized
+    async def get_merge_requests(self, project_id: str, since: datetime, until: datetime) -> List[MergeRequestRecord]:
         """Get merged MRs using python-gitlab API directly"""
+        self._start_collection('merge_requests')
         try:
-            # Use python-gitlab API directly - wrap in thread to avoid blocking
-            merge_requests = await asyncio.to_thread(
-                self.project.mergerequests.list,
-                state='merged',
-                updated_after=since.isoformat(),
-                updated_before=until.isoformat(),
-                order_by='updated_at',
-                sort='desc',
-                all=True  # Get all pages
+            if self.collection_mode == 'windowed' and self.mirror is None:
+                # Filtered on the merge date by GitLab, so nothing outside the window is transferred
+                merge_requests = await self._list_merged('merge_requests', since, until)
+            else:
+                # Sync transport listing runs in threads to avoid blocking
+                merge_requests = await self._list_closed_in_window(
+                    'merge_requests',
+                    'merge_requests',
+                    since,
+                    until,
+                    state='merged',
+                    order_by='updated_at',
+                    sort='desc'
+                )
+            
+            # Check if actually merged in our date range
+            in_range = [mr for mr in merge_requests if in_window(mr.get('merged_at'), since, until)]
+            
+            # The list payload already carries everything we need; only fetch
+            # details for rows that are missing fields
+            in_range = await self._complete_items(
+                'merge_requests', in_range, MR_DETAIL_FIELDS, 'merge_requests'
             )
             
             mrs_data = []
-            for mr in merge_requests:
+            for mr in in_range:
                 try:
-                    # Get full MR data - wrap in thread to avoid blocking
-                    mr_full = await asyncio.to_thread(
-                        self.project.mergerequests.get,
-                        mr.iid
-                    )
-                    
-                    # Check if actually merged in our date range
-                    if mr_full.merged_at:
-                        merged_date = datetime.fromisoformat(mr_full.merged_at.replace('Z', '+00:00'))
-                        if since <= merged_date <= until:
-                            mrs_data.append({
-                                'iid': mr_full.iid,
-                                'title': mr_full.title,
-                                'description': mr_full.description or '',
-                                'author': mr_full.author.get('username', 'Unknown'),
-                                'merged_at': mr_full.merged_at,
-                                'merged_by': mr_full.merged_by.get('username', 'Unknown') if mr_full.merged_by else None,
-                                'web_url': mr_full.web_url,
-                                'labels': mr_full.labels,
-                                'milestone': mr_full.milestone.get('title') if mr_full.milestone else None,
-                                'source_branch': mr_full.source_branch,
-                                'target_branch': mr_full.target_branch
-                            })
+                    mrs_data.append(MergeRequestRecord.from_payload(mr))
                 except Exception as e:
-                    print(f"Error processing MR {mr.iid}: {e}")
+                    print(f"Error processing MR {mr.get('iid')}: {e}")
                     continue
             
-            print(f"Found {len(mrs_data)} merged MRs between {since.date()} and {until.date()}")
+            self._record_overfetch('merge_requests', len(mrs_data))
+            print(f"Found {len(mrs_data)} merged MRs between {since.date()} and {until.date()} "
+                  f"({self.api_calls['merge_requests']} API calls, "
+                  f"over-fetch {self.overfetch['merge_requests']['ratio']:.2f}x)")
             return mrs_data
             
         except Exception as e:
             print(f"Error fetching merge requests: {e}")
-            return []
+            raise
     
-    async def get_issues(self, project_id: str, since: datetime, until: datetime) -> List[Dict]:
+    async def iter_merge_requests(self, project_id: str, since: datetime,
+                                  until: datetime) -> AsyncIterator[List[MergeRequestRecord]]:
+        """Yield merged MRs page by page as they arrive from GitLab
+        
+        Sub-windows are fetched concurrently and their pages are yielded in
+        arrival order, so consumers can start working before the crawl ends.
+        """
+        window = {'since': since, 'until': until}
+        cached = recall(self, 'get_merge_requests', window)
+        if cached is not None or self.mirror is not None:
+            # Already collected in this scope, or the mirror answers locally once the delta is synced
+            yield cached if cached is not None else await self.get_merge_requests(project_id, since, until)
+            return
+        
+        self._start_collection('merge_requests')
+        collected: List[MergeRequestRecord] = []
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        async def produce(pages: AsyncIterator[List[Dict]]):
+            try:
+                async for page in pages:
+                    await queue.put(page)
+            finally:
+                await queue.put(None)
+        
+        if self.collection_mode == 'windowed':
+            crawls = [self._iter_merged_pages('merge_requests', start, end)
+                      for start, end in split_window(since, until, self.window_partitions)]
+        else:
+            crawls = [self._iter_resource_pages('merge_requests', 'merge_requests', state='merged',
+                                                order_by='updated_at', sort='desc', **window)
+                      for window in self._closed_windows(since, until)]
+        producers = [asyncio.ensure_future(produce(pages)) for pages in crawls]
+        seen = set()
+        kept = 0
+        try:
+            finished = 0
+            while finished < len(producers):
+                page = await queue.get()
+                if page is None:
+                    finished += 1
+                    continue
+                
+                self.transferred['merge_requests'] += len(page)
+                fresh = [mr for mr in page if mr['iid'] not in seen and in_window(mr.get('merged_at'), since, until)]
+                seen.update(mr['iid'] for mr in page)
+                if not fresh:
+                    continue
+                
+                fresh = await self._complete_items('merge_requests', fresh, MR_DETAIL_FIELDS, 'merge_requests')
+                records = [MergeRequestRecord.from_payload(mr) for mr in fresh]
+                kept += len(records)
+                collected.extend(records)
+                yield records
+        finally:
+            for producer in producers:
+                producer.cancel()
+            errors = [result for result in await asyncio.gather(*producers, return_exceptions=True)
+                      if isinstance(result, Exception)]
+        
+        # A failed page would otherwise silently drop merge requests
+        if errors:
+            print(f"Error streaming merge requests: {errors[0]}")
+            raise errors[0]
+        
+        self._record_overfetch('merge_requests', kept)
+        remember(self, 'get_merge_requests', window, collected)
+        print(f"Streamed {kept} merged MRs between {since.date()} and {until.date()} "
+              f"({self.api_calls['merge_requests']} API calls)")
+    
+    @memoized
+    async def get_issues(self, project_id: str, since: datetime, until: datetime) -> List[IssueRecord]:
         """Get closed issues using python-gitlab API directly"""
+        self._start_collection('issues')
         try:
-            # Get closed issues - wrap in thread to avoid blocking
-            issues = await asyncio.to_thread(
-                self.project.issues.list,
-                state='closed',
-                updated_after=since.isoformat(),
-                updated_before=until.isoformat(),
-                order_by='updated_at',
-                sort='desc',
-                all=True
+            filters = {'order_by': 'updated_at', 'sort': 'desc'}
+            # The mirror syncs every state so reopened issues drop out of the local index
+            if self.mirror is None:
+                filters['state'] = 'closed'
+            
+            # Get closed issues - sync transport listing runs in threads to avoid blocking
+            issues = await self._list_closed_in_window('issues', 'issues', since, until, **filters)
+            
+            # Check if closed in our date range
+            in_range = [issue for issue in issues if in_window(issue.get('closed_at'), since, until)]
+            
+            in_range = await self._complete_items(
+                'issues', in_range, ISSUE_DETAIL_FIELDS, 'issues'
             )
             
             issues_data = []
-            for issue in issues:
+            for issue in in_range:
                 try:
-                    # Get full issue data - wrap in thread to avoid blocking
-                    issue_full = await asyncio.to_thread(
-                        self.project.issues.get,
-                        issue.iid
-                    )
-                    
-                    # Check if closed in our date range
-                    if issue_full.closed_at:
-                        closed_date = datetime.fromisoformat(issue_full.closed_at.replace('Z', '+00:00'))
-                        if since <= closed_date <= until:
-                            issues_data.append({
-                                'iid': issue_full.iid,
-                                'title': issue_full.title,
-                                'description': issue_full.description or '',
-                                'author': issue_full.author.get('username', 'Unknown'),
-                                'closed_at': issue_full.closed_at,
-                                'closed_by': issue_full.closed_by.get('username', 'Unknown') if hasattr(issue_full, 'closed_by') and issue_full.closed_by else None,
-                                'web_url': issue_full.web_url,
-                                'labels': issue_full.labels,
-                                'milestone': issue_full.milestone.get('title') if issue_full.milestone else None,
-                                'assignees': [a.get('username', 'Unknown') for a in (issue_full.assignees or [])]
-                            })
+                    issues_data.append(IssueRecord.from_payload(issue))
                 except Exception as e:
-                    print(f"Error processing issue {issue.iid}: {e}")
+                    print(f"Error processing issue {issue.get('iid')}: {e}")
                     continue
             
-            print(f"Found {len(issues_data)} closed issues between {since.date()} and {until.date()}")
+            self._record_overfetch('issues', len(issues_data))
+            print(f"Found {len(issues_data)} closed issues between {since.date()} and {until.date()} "
+                  f"({self.api_calls['issues']} API calls, "
+                  f"over-fetch {self.overfetch['issues']['ratio']:.2f}x)")
             return issues_data
             
         except Exception as e:
             print(f"Error fetching issues: {e}")
-            return []
+            raise
     
-    async def get_commits(self, project_id: str, since: datetime, until: datetime, ref_name: str = None) -> List[Dict]:
+    @memoized
+    async def get_commits(self, project_id: str, since: datetime, until: datetime,
+                          ref_name: str = None) -> List[CommitRecord]:
         """Get commits using python-gitlab API directly"""
+        self._start_collection('commits')
         try:
             # Use default branch if not specified
             if not ref_name:
-                ref_name = self.project.default_branch
+                ref_name = await self._default_branch()
             
-            # Get commits - wrap in thread to avoid blocking
-            commits = await asyncio.to_thread(
-                self.project.commits.list,
-                ref_name=ref_name,
-                since=since.isoformat(),
-                until=until.isoformat(),
-                all=True
+            if self.mirror is not None:
+                mirror_source = await self._sync_commit_mirror(ref_name, since)
+                commits = self.mirror.query(str(self.project_id), mirror_source, since, until)
+            else:
+                # Commit dates are filtered exactly server-side; in windowed mode the
+                # sub-windows are simply fetched in parallel
+                partitions = self.window_partitions if self.collection_mode == 'windowed' else 1
+                windows = [{'since': start.isoformat(), 'until': end.isoformat()}
+                           for start, end in split_window(since, until, partitions)]
+                
+                # Get commits - sync transport listing runs in threads to avoid blocking
+                commits = await self._list_windows(
+                    'repository/commits',
+                    'commits',
+                    windows,
+                    key='id',
+                    ref_name=ref_name
+                )
+            
+            commits_data = [CommitRecord.from_payload(commit) for commit in commits]
+            
+            print(f"Found {len(commits_data)} commits between {since.date()} and {until.date()} "
+                  f"({self.api_calls['commits']} API calls)")
+            return commits_data
+            
+        except Exception as e:
+            print(f"Error fetching commits: {e}")
+            raise
+    
+    @memoized
+    async def get_tag_date(self, tag: str) -> datetime:
+        """Get the commit date of a tag"""
+        tag_info = await self._get_path(f"repository/tags/{quote(tag, safe='')}")
+        return parse_gitlab_datetime(tag_info['commit']['committed_date'])
+    
+    async def get_tag_dates(self, from_tag: str, to_tag: str) -> Tuple[datetime, datetime]:
+        """Get the commit dates of two tags"""
+        from_date, to_date = await asyncio.gather(self.get_tag_date(from_tag), self.get_tag_date(to_tag))
+        return from_date, to_date
+    
+    @memoized
+    async def get_tag_range(self, from_tag: str, to_tag: str) -> Dict[str, List[Dict]]:
+        """Get the commits between two tags and the merge requests that introduced them
+        
+        One compare call resolves the commit set. Merge requests are found by iid
+        from merge commit messages and matched to commits through an in-memory
+        index of merge, squash and head SHAs. When several mainline commits remain
+        unmatched (squash or fast-forward merges), the merged merge requests last
+        updated between the oldest of them and the range's newest commit are
+        listed (or read from the mirror) and matched next; commits still unmatched,
+        e.g. of merge requests updated after the release, are looked up one by one.
+        """
+        self._start_collection('tag_range')
+        try:
+            self._count_calls('tag_range')
+            compare = await self._get_path('repository/compare', **{'from': from_tag, 'to': to_tag})
+            commits = compare.get('commits') or []
+            commits_by_sha = {commit['id']: commit for commit in commits}
+            if not commits:
+                print(f"No commits between {from_tag} and {to_tag}")
+                return {'merge_requests': [], 'commits': []}
+            
+            head = (compare.get('commit') or {}).get('id') or commits[-1]['id']
+            mainline = first_parent_chain(commits_by_sha, head)
+            
+            # Merge commits name their merge request; fetch those in batched iid lists
+            referenced = {}
+            for sha in mainline:
+                match = MERGE_REQUEST_REF.search(commits_by_sha[sha].get('message') or '')
+                if match:
+                    referenced[sha] = int(match.group(1))
+            iids = sorted(set(referenced.values()))
+            batches = await asyncio.gather(*(
+                self._list_resource('merge_requests', 'tag_range', state='merged',
+                                    iids=iids[start:start + IIDS_PER_REQUEST])
+                for start in range(0, len(iids), IIDS_PER_REQUEST)
+            ))
+            
+            # In-memory index: every SHA that identifies a merge request on the target branch
+            index: Dict[str, Dict] = {}
+            
+            def add_to_index(mr: Dict):
+                for field in ('merge_commit_sha', 'squash_commit_sha', 'sha'):
+                    if mr.get(field):
+                        index.setdefault(mr[field], mr)
+            
+            for batch in batches:
+                for mr in batch:
+                    add_to_index(mr)
+            
+            # Squash and fast-forward merges leave no trailer. Their merge requests were
+            # merged between the commits they landed and the end of the range, so one
+            # listing bounded by the range matches most of them; a single unmatched
+            # commit is cheaper to look up directly
+            unmatched = [sha for sha in mainline if sha not in index]
+            if len(unmatched) > 1:
+                since = min(parse_gitlab_datetime(commits_by_sha[sha]['committed_date']) for sha in unmatched)
+                until = max(parse_gitlab_datetime(commit['committed_date']) for commit in commits)
+                listed = await self._list_closed_in_window(
+                    'merge_requests', 'merge_requests' if self.mirror is not None else 'tag_range',
+                    since, until + TAG_RANGE_MERGE_SLACK, state='merged'
+                )
+                matched = {mr['iid'] for mr in index.values()}
+                for mr in listed:
+                    if mr['iid'] not in matched:
+                        add_to_index(mr)
+                unmatched = [sha for sha in unmatched if sha not in index]
+            
+            # Whatever is left is looked up one commit at a time
+            async def lookup(sha: str):
+                self._count_calls('tag_range')
+                try:
+                    return await self._get_path(f"repository/commits/{sha}/merge_requests")
+                except Exception as e:
+                    print(f"Error looking up merge requests for commit {sha[:8]}: {e}")
+                    raise
+            
+            for sha, found in zip(unmatched, await asyncio.gather(*(lookup(sha) for sha in unmatched))):
+                merged = [mr for mr in found if mr.get('state') == 'merged']
+                if merged:
+                    add_to_index(merged[0])
+                    index.setdefault(sha, merged[0])
+            
+            # Attribute every commit to a merge request through the mainline commit that landed it
+            commit_to_mr = attribute_commits(commits_by_sha, mainline, index)
+            
+            # Most recently landed first
+            merge_requests = list({mr['iid']: mr for mr in reversed(list(commit_to_mr.values()))}.values())
+            merge_requests = await self._complete_items(
+                'merge_requests', merge_requests, MR_DETAIL_FIELDS, 'tag_range'
             )
             
             commits_data = []
             for commit in commits:
-                commits_data.append({
-                    'id': commit.id,
-                    'short_id': commit.short_id,
-                    'title': commit.title,
-                    'message': commit.message,
-                    'author_name': commit.author_name,
-                    'author_email': commit.author_email,
-                    'authored_date': commit.authored_date,
-                    'committed_date': commit.committed_date,
-                    'web_url': commit.web_url,
-                    'parent_ids': commit.parent_ids
-                })
+                record = CommitRecord.from_payload(commit)
+                mr = commit_to_mr.get(commit['id'])
+                record['merge_request_iid'] = mr['iid'] if mr else None
+                commits_data.append(record)
             
-            print(f"Found {len(commits_data)} commits between {since.date()} and {until.date()}")
-            return commits_data
+            print(f"Found {len(merge_requests)} merged MRs and {len(commits_data)} commits between "
+                  f"{from_tag} and {to_tag} ({self.api_calls['tag_range']} API calls)")
+            return {
+                'merge_requests': [MergeRequestRecord.from_payload(mr) for mr in merge_requests],
+                'commits': commits_data
+            }
             
         except Exception as e:
-            print(f"Error fetching commits: {e}")
-            return []
+            print(f"Error fetching tag range: {e}")
+            raise
+    
+    async def get_diff_stats(self, iids: List[int]) -> Dict[int, Dict[str, object]]:
+        """Get the files, lines and top-level paths changed by up to a page of merge requests, in one call"""
+        variables = {'fullPath': await self.get_project_path(), 'iids': [str(iid) for iid in iids],
+                     'first': len(iids)}
+        try:
+            project = (await self._graphql('diff_stats', MERGE_REQUEST_DIFF_STATS_QUERY, variables))['project']
+            if project is None:
+                raise ValueError(f"Project {variables['fullPath']} not found")
+        except Exception as e:
+            print(f"Error fetching diff stats of {len(iids)} merge requests: {e}")
+            raise
+        return {int(node['iid']): diff_stats_from_graphql(node) for node in project['mergeRequests']['nodes']}
+    
+    async def aclose(self):
+        """Close pooled connections held by the async transport"""
+        if self.async_client is not None:
+            await self.async_client.aclose()
     
     def get_gitlab_api(self):
         """Get the underlying GitLab API wrapper for direct access if needed"""
@@ -208,56 +980,38 @@ class GitLabLangChainTools:
         return self.project
     
     async def get_contributors(self, since: datetime, until: datetime) -> Set[str]:
-        """Get unique contributors in the date range"""
-        contributors = set()
-        
-        # Get from MRs
-        mrs = await self.get_merge_requests(self.project.id, since, until)
-        for mr in mrs:
-            contributors.add(mr['author'])
-            if mr.get('merged_by'):
-                contributors.add(mr['merged_by'])
-        
-        # Get from commits
-        commits = await self.get_commits(self.project.id, since, until)
-        for commit in commits:
-            contributors.add(commit['author_name'])
+        """Get unique contributors in the date range
         
-        # Get from issues
-        issues = await self.get_issues(self.project.id, since, until)
-        for issue in issues:
-            contributors.add(issue['author'])
-            contributors.update(issue.get('assignees', []))
-        
-        return contributors
+        Built from the merge requests, commits and issues of the window, which
+        are reused from the current fetch scope when already collected.
+        """
+        with fetch_scope():
+            mrs, commits, issues = await asyncio.gather(
+                self.get_merge_requests(self.project_id, since, until),
+                self.get_commits(self.project_id, since, until),
+                self.get_issues(self.project_id, since, until)
+            )
+        return contributors_of(mrs, commits, issues)
     
+    @memoized
     async def get_milestones(self, since: datetime, until: datetime) -> List[Dict]:
         """Get milestones in date range"""
+        self._start_collection('milestones')
         try:
-            milestones = await asyncio.to_thread(
-                self.project.milestones.list,
-                state='all',
-                updated_after=since.isoformat(),
-                updated_before=until.isoformat(),
-                all=True
-            )
-            
-            milestones_data = []
-            for milestone in milestones:
-                milestones_data.append({
-                    'id': milestone.id,
-                    'iid': milestone.iid,
-                    'title': milestone.title,
-                    'description': milestone.description,
-                    'state': milestone.state,
-                    'created_at': milestone.created_at,
-                    'updated_at': milestone.updated_at,
-                    'due_date': milestone.due_date,
-                    'web_url': milestone.web_url
-                })
+            if self.mirror is not None:
+                await self._sync_mirror('milestones', 'milestones', since, key='id', state='all')
+                milestones = self.mirror.query(str(self.project_id), 'milestones', since, until)
+            else:
+                milestones = await self._list_resource(
+                    'milestones',
+                    'milestones',
+                    state='all',
+                    updated_after=since.isoformat(),
+                    updated_before=until.isoformat()
+                )
             
-            return milestones_data
+            return [milestone_to_dict(milestone) for milestone in milestones]
             
         except Exception as e:
             print(f"Error fetching milestones: {e}")
-            return []
\ No newline at end of file
+            raise
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+Request-scoped memoization and single-flight for GitLab fetches
+
+`fetch_scope()` opens a result cache that lives for one request (the collect
+step of a graph run): within it, a fetch for the same (project, source,
+window) runs once and later callers get the cached result. Independently of
+any scope, concurrent identical fetches are coalesced, so overlapping graph
+runs for the same window share one crawl instead of each starting their own.
+"""
+
+import asyncio
+import inspect
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+_scope: ContextVar[Optional[Dict[Hashable, Any]]] = ContextVar('gitlab_fetch_scope', default=None)
+
+
+@contextmanager
+def fetch_scope() -> Iterator[Dict[Hashable, Any]]:
+    """Cache fetch results for the duration of a block; nested scopes share the outer cache"""
+    scope = _scope.get()
+    if scope is not None:
+        yield scope
+        return
+    token = _scope.set({})
+    try:
+        yield _scope.get()
+    finally:
+        _scope.reset(token)
+
+
+class SingleFlight:
+    """Runs one task per key and lets concurrent callers await the same result"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Dict[str, Any]] = {}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        call = self._calls.get(key)
+        if call is None or call['loop'] is not loop:
+            call = {'loop': loop, 'task': loop.create_task(factory()), 'waiters': 0}
+            self._calls[key] = call
+            call['task'].add_done_callback(functools.partial(self._finish, key, call))
+        call['waiters'] += 1
+        try:
+            return await asyncio.shield(call['task'])
+        except asyncio.CancelledError:
+            # The last caller to give up (e.g. on a source timeout) stops the fetch
+            if call['waiters'] == 1:
+                call['task'].cancel()
+            raise
+        finally:
+            call['waiters'] -= 1
+
+    def _finish(self, key: Hashable, call: Dict[str, Any], task: asyncio.Task):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not task.cancelled():
+            # Retrieved here so an error nobody awaited any more is not reported as unhandled
+            task.exception()
+
+
+def _key_part(value: Any) -> Hashable:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value if isinstance(value, Hashable) else repr(value)
+
+
+def memo_key(tools, name: str, arguments: Dict[str, Any]) -> Tuple:
+    """Cache key of a tools fetch: (method, project, arguments)
+
+    The `project_id` argument is left out; the tools always fetch their own project.
+    """
+    return (name, str(tools.project_id),
+            *((key, _key_part(value)) for key, value in sorted(arguments.items()) if key != 'project_id'))
+
+
+def _copy(result: Any) -> Any:
+    """Give each caller its own containers over the shared records"""
+    if isinstance(result, list):
+        return list(result)
+    if isinstance(result, dict):
+        return {key: _copy(value) for key, value in result.items()}
+    if isinstance(result, set):
+        return set(result)
+    return result
+
+
+def memoized(method):
+    """Memoize an async fetch method of GitLabLangChainTools per fetch scope, single-flighted"""
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        del arguments['self']
+        key = memo_key(self, method.__name__, arguments)
+        scope = _scope.get()
+        if scope is not None and key in scope:
+            return _copy(scope[key])
+        result = await self.single_flight.do(key, lambda: method(self, *args, **kwargs))
+        if scope is not None:
+            scope[key] = result
+        return _copy(result)
+    return wrapper
+
+
+def remember(tools, name: str, arguments: Dict[str, Any], result: Any):
+    """Store a result obtained another way (e.g. by streaming) in the active scope"""
+    scope = _scope.get()
+    if scope is not None:
+        scope[memo_key(tools, name, arguments)] = result
+
+
+def recall(tools, name: str, arguments: Dict[str, Any]) -> Optional[Any]:
+    """Look up a result in the active scope"""
+    scope = _scope.get()
+    key = memo_key(tools, name, arguments)
+    return _copy(scope[key]) if scope is not None and key in scope else None
@@ -0,0 +1,205 @@
+"""
+Adaptive request scheduler shared by GitLab and LLM calls
+
+Every call goes through `AdaptiveScheduler.run`, which
+
+- caps the calls in flight with an AIMD window: +1/window per success, halved
+  (at most once per second) when the server throttles with 429 or 503;
+- pauses all callers until the reset time when a response says the rate
+  limit is used up (`Retry-After`, GitLab's `RateLimit-*`, OpenAI's
+  `x-ratelimit-*` headers);
+- retries transient failures (throttling, 5xx, timeouts, dropped
+  connections) with jittered exponential backoff, up to MAX_RETRIES times,
+  and re-raises everything else so callers never drop data silently.
+"""
+
+import os
+import re
+import time
+import random
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Mapping, Optional, TypeVar
+
+T = TypeVar('T')
+
+# Statuses worth retrying, and the subset that signals throttling
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+THROTTLE_STATUS = {429, 503}
+
+# Exception class names (anywhere in the MRO) that mean the request never completed:
+# httpx, requests, openai and builtin timeouts and connection failures
+TRANSIENT_ERRORS = {'TimeoutError', 'TimeoutException', 'TransportError', 'Timeout',
+                    'ConnectionError', 'APIConnectionError'}
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an httpx, openai or python-gitlab exception"""
+    for attribute in ('status_code', 'response_code'):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+
+def error_headers(error: BaseException) -> Mapping[str, str]:
+    """Response headers carried by an exception, if any"""
+    return getattr(getattr(error, 'response', None), 'headers', None) or {}
+
+
+def is_transient(error: BaseException) -> bool:
+    """Whether a failed call is worth retrying"""
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return any(cls.__name__ in TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+def _header(headers: Mapping[str, str], name: str) -> Optional[str]:
+    if hasattr(headers, 'get') and headers.get(name) is not None:
+        return headers.get(name)
+    name = name.lower()
+    return next((value for key, value in headers.items() if key.lower() == name), None)
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse OpenAI reset durations such as '20ms', '1s' or '6m0s'"""
+    parts = _DURATION_PART.findall(value or '')
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts) if parts else None
+
+
+def retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds to wait before the next request, or None if the headers do not say"""
+    value = _header(headers, 'Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+
+    # GitLab: RateLimit-Reset is a Unix timestamp
+    if _header(headers, 'RateLimit-Remaining') == '0':
+        reset = _header(headers, 'RateLimit-Reset')
+        if reset and reset.isdigit():
+            return max(0.0, int(reset) - time.time())
+
+    # OpenAI: x-ratelimit-reset-* are durations
+    for kind in ('requests', 'tokens'):
+        if _header(headers, f'x-ratelimit-remaining-{kind}') == '0':
+            reset = _parse_duration(_header(headers, f'x-ratelimit-reset-{kind}'))
+            if reset is not None:
+                return reset
+    return None
+
+
+class AdaptiveScheduler:
+    """AIMD concurrency window with header-aware pauses and jittered retries"""
+
+    def __init__(self, name: str, max_concurrency: int, min_concurrency: int = 1,
+                 max_retries: Optional[int] = None, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('MAX_RETRIES', '3'))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        # Current window; starts wide open and backs off on throttling
+        self.limit = float(self.max_concurrency)
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+
+        # Event-loop bound state, recreated when used from a new loop
+        self._loop = None
+        self._condition: Optional[asyncio.Condition] = None
+        self._in_flight = 0
+
+        self.stats = {'calls': 0, 'retries': 0, 'throttled': 0, 'failures': 0}
+
+    def _state(self) -> asyncio.Condition:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+            self._in_flight = 0
+        return self._condition
+
+    async def _acquire(self):
+        condition = self._state()
+        async with condition:
+            await condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+
+    async def _release(self):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def pause(self, seconds: float):
+        """Hold back every new call for the given time"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def observe(self, headers: Mapping[str, str]):
+        """Honour rate-limit headers of a response"""
+        wait = retry_after(headers)
+        if wait:
+            self.pause(wait)
+
+    def _on_success(self):
+        self.stats['calls'] += 1
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+
+    def _on_throttle(self):
+        self.stats['throttled'] += 1
+        now = time.monotonic()
+        # Concurrent rejections of one overload count as a single signal
+        if now - self._last_decrease >= 1.0:
+            self.limit = max(float(self.min_concurrency), self.limit / 2)
+            self._last_decrease = now
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    async def run(self, call: Callable[[], Awaitable[T]]) -> T:
+        """Run a call within the window, retrying transient failures"""
+        attempt = 0
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            await self._acquire()
+            try:
+                result = await call()
+            except Exception as error:
+                if not is_transient(error) or attempt >= self.max_retries:
+                    self.stats['failures'] += 1
+                    raise
+                if error_status(error) in THROTTLE_STATUS:
+                    self._on_throttle()
+                wait = retry_after(error_headers(error))
+                if wait is not None:
+                    self.pause(wait)
+                delay = wait if wait is not None else self._backoff(attempt)
+                attempt += 1
+                self.stats['retries'] += 1
+                print(f"{self.name}: {type(error).__name__} ({error_status(error) or 'no status'}), "
+                      f"retry {attempt}/{self.max_retries} in {delay:.1f}s at concurrency {int(self.limit)}")
+            else:
+                self._on_success()
+                return result
+            finally:
+                await self._release()
+            await asyncio.sleep(delay)
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get call, retry and throttle counts with the current concurrency window"""
+        return {**self.stats, 'concurrency': int(self.limit)}
@@ -0,0 +1,71 @@
+from src.agents.compaction import COMPACTION_VERSION, PromptCompactor, strip_boilerplate
+
+
+def offline_compactor(max_tokens: int) -> PromptCompactor:
+    """Compactor estimating tokens from characters, since tiktoken downloads its vocabularies"""
+    compactor = PromptCompactor('gpt-3.5-turbo', max_tokens=max_tokens)
+    compactor._encoding_loaded = True
+    return compactor
+
+
+def test_strips_template_noise():
+    description = """## What does this MR do?
+<!-- Describe the change in a sentence or two -->
+Adds retry on token refresh.
+
+## Screenshots
+![before](/uploads/before.png)
+
+## Checklist
+- [x] Tests added
+- [ ] Docs updated
+
+<details><summary>Logs</summary>
+stack trace
+</details>
+
+/label ~bug
+/assign @me
+"""
+    assert strip_boilerplate(description) == "## What does this MR do?\n\nAdds retry on token refresh."
+
+
+def test_strips_code_fences_and_unclosed_comments():
+    assert strip_boilerplate("Fix parser\n```\ntraceback\n```\nDone") == "Fix parser\n\nDone"
+    assert strip_boilerplate("Fix parser\n~~~python\nprint(1)") == "Fix parser"
+    assert strip_boilerplate("Keep this <!-- template leftovers") == "Keep this"
+
+
+def test_strips_html_tags_but_keeps_generics():
+    assert strip_boilerplate("<p>Return <b>List&lt;T&gt;</b></p>") == "Return List&lt;T&gt;"
+    assert strip_boilerplate("Return List<String> from Map<K, V>") == "Return List<String> from Map<K, V>"
+
+
+def test_quick_actions_only_at_line_start():
+    text = "Use /label in docs\n/label ~docs\n/unknowncommand stays"
+    assert strip_boilerplate(text) == "Use /label in docs\n\n/unknowncommand stays"
+
+
+def test_table_rules_and_blank_lines():
+    text = "| a | b |\n|---|---|\n| 1 | 2 |\n\n\n\nEnd"
+    assert strip_boilerplate(text) == "| a | b |\n\n| 1 | 2 |\n\nEnd"
+
+
+def test_compact_truncates_to_budget():
+    compactor = offline_compactor(12)
+    text, before, after = compactor.compact('Add cache', 'word ' * 200)
+    assert text.startswith('Add cache - word')
+    assert text.endswith(' …')
+    assert before > after
+    assert after <= 12 + compactor.count_tokens(' …')
+
+
+def test_compact_without_budget_keeps_body():
+    compactor = offline_compactor(0)
+    text, _, _ = compactor.compact('Add cache', 'word ' * 200)
+    assert text == 'Add cache - ' + ('word ' * 200).strip()
+
+
+def test_version_includes_rules_and_budget():
+    assert PromptCompactor(max_tokens=256).version == f"{COMPACTION_VERSION}:256"
+    assert PromptCompactor(max_tokens=256).version != PromptCompactor(max_tokens=128).version
@@ -0,0 +1,96 @@
+import pytest
+
+from src.agents.linker import ChangeLinker, MinHasher, closed_issue_refs, estimated_similarity, title_shingles
+
+
+def mr(iid, title, **fields):
+    return {'iid': iid, 'title': title, 'description': '', 'labels': [], **fields}
+
+
+@pytest.fixture
+def linker():
+    return ChangeLinker(threshold=0.8)
+
+
+def test_title_shingles_ignore_noise():
+    assert title_shingles('Draft: Fix crash [backport] (!12)') == {'fix', 'crash', 'fix crash'}
+
+
+def test_minhash_estimates_similarity():
+    hasher = MinHasher(64)
+    same = hasher.signature(title_shingles('Fix crash when saving empty files'))
+    assert estimated_similarity(same, hasher.signature(title_shingles('fix crash when saving empty files'))) == 1.0
+    other = hasher.signature(title_shingles('Add dark mode to the settings page'))
+    assert estimated_similarity(same, other) < 0.3
+    assert estimated_similarity((), same) == 0.0
+
+
+def test_closed_issue_refs():
+    text = "Closes #12, fixes group/app#3 and #4. Mentions #99"
+    assert closed_issue_refs(text, 'group/web') == [('group/web', 12), ('group/app', 3), ('group/web', 4)]
+
+
+def test_links_commits_and_issues(linker):
+    state = {
+        'merge_requests': [mr(1, 'Add export', merge_commit_sha='m1', description='Closes #7'),
+                           mr(2, 'Fix import')],
+        'commits': [{'id': 'm1', 'message': 'Merge branch'},
+                    {'id': 'c2', 'message': 'Fix import\n\nSee merge request group/app!2'},
+                    {'id': 'c3', 'message': 'Unrelated'}],
+        'issues': [{'iid': 7, 'title': 'Export', 'reference': '#7'}]
+    }
+    result = linker.link(state)
+    first, second = result['merge_requests']
+    assert first['commits'] == ['m1'] and first['closes_issues'] == ['#7']
+    assert second['commits'] == ['c2']
+    assert result['link_stats']['commits_linked'] == 2
+    assert result['link_stats']['issues_linked'] == 1
+
+
+def test_folds_cherry_picked_backport(linker):
+    original, backport = 'a1b2c3d4e5f6', '0f9e8d7c6b5a'
+    state = {'merge_requests': [
+        mr(1, 'Fix crash when saving empty files', merge_commit_sha=original, target_branch='main'),
+        mr(2, 'Fix crash when saving empty files', merge_commit_sha=backport, target_branch='stable'),
+    ], 'commits': [
+        {'id': original, 'message': 'Fix crash'},
+        {'id': backport, 'message': f'Fix crash\n\n(cherry picked from commit {original[:8]})'},
+    ]}
+    linked, kept = linker.link_indexed(state)
+    assert kept == [0]
+    assert linked['merge_requests'][0]['duplicates'] == ['#2']
+    assert linked['merge_requests'][0]['commits'] == [original, backport]
+
+
+def test_folds_merge_requests_sharing_a_commit(linker):
+    state = {'merge_requests': [
+        mr(1, 'Fix crash when saving empty files', target_branch='main'),
+        mr(2, 'Fix crash when saving empty files (backport)', target_branch='stable'),
+    ], 'commits': [
+        {'id': 'c0ffee0', 'message': 'Fix crash', 'merge_request_iid': 1},
+        {'id': 'c0ffee0', 'message': 'Fix crash', 'merge_request_iid': 2},
+    ]}
+    assert linker.link_indexed(state)[1] == [0]
+
+
+def test_folds_same_source_branch_into_other_target(linker):
+    state = {'merge_requests': [
+        mr(1, 'Fix crash when saving empty files', source_branch='fix-save', target_branch='main'),
+        mr(2, 'Fix crash when saving empty files', source_branch='fix-save', target_branch='release-1.2'),
+    ]}
+    assert linker.link_indexed(state)[1] == [0]
+
+
+def test_similar_titles_alone_are_not_enough(linker):
+    state = {'merge_requests': [mr(1, 'Fix typo', source_branch='a'), mr(2, 'Fix typo', source_branch='b')]}
+    linked, kept = linker.link_indexed(state)
+    assert kept == [0, 1]
+    assert linked['link_stats']['near_duplicates'] == 0
+
+
+def test_reverts_stay_separate(linker):
+    state = {'merge_requests': [
+        mr(1, 'Add export', merge_commit_sha='a1'),
+        mr(2, 'Revert "Add export"', description='This reverts commit a1'),
+    ], 'commits': [{'id': 'a1', 'message': 'Add export'}]}
+    assert linker.link_indexed(state)[1] == [0, 1]
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from src.storage.mirror import GitLabMirror
+from src.tools.gitlab_langchain_tools import GitLabLangChainTools
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = GitLabMirror(str(tmp_path / 'mirror.sqlite3'))
+    yield mirror
+    mirror.close()
+
+
+def test_watermark_round_trip(mirror):
+    assert mirror.get_watermark('group/app', 'merge_requests') is None
+    mirror.set_watermark('group/app', 'merge_requests', '2024-01-01T00:00:00+00:00', '2024-01-05T00:00:00Z')
+    assert mirror.get_watermark('group/app', 'merge_requests') == {
+        'synced_from': '2024-01-01T00:00:00+00:00', 'synced_until': '2024-01-05T00:00:00Z', 'head': None}
+    mirror.set_watermark('group/app', 'commits:main', '2024-01-01T00:00:00+00:00', None, head='abc123')
+    assert mirror.get_watermark('group/app', 'commits:main')['head'] == 'abc123'
+
+
+def test_upsert_keeps_newer_copies_and_returns_newest(mirror):
+    newer = {'iid': 1, 'title': 'New title', 'updated_at': '2024-01-03T00:00:00Z', 'merged_at': '2024-01-02T00:00:00Z'}
+    older = {**newer, 'title': 'Old title', 'updated_at': '2024-01-01T00:00:00Z'}
+    assert mirror.upsert('group/app', 'merge_requests', [newer]) == '2024-01-03T00:00:00Z'
+    assert mirror.upsert('group/app', 'merge_requests', [older]) == '2024-01-01T00:00:00Z'
+    stored = mirror.query('group/app', 'merge_requests', utc(2024, 1, 1), utc(2024, 1, 31))
+    assert [mr['title'] for mr in stored] == ['New title']
+
+
+def test_query_filters_on_event_time(mirror):
+    mirror.upsert('group/app', 'merge_requests', [
+        {'iid': 1, 'updated_at': '2024-02-10T00:00:00Z', 'merged_at': '2024-01-10T00:00:00Z'},
+        {'iid': 2, 'updated_at': '2024-02-10T00:00:00Z', 'merged_at': '2024-02-10T00:00:00Z'},
+        {'iid': 3, 'updated_at': '2024-02-10T00:00:00Z', 'merged_at': None},
+    ])
+    assert [mr['iid'] for mr in mirror.query('group/app', 'merge_requests', utc(2024, 2, 1), utc(2024, 3, 1))] == [2]
+    assert mirror.query('group/other', 'merge_requests', utc(2024, 1, 1), utc(2024, 3, 1)) == []
+
+
+class RecordingTools(GitLabLangChainTools):
+    """Tools whose listings come from a queue of canned pages instead of GitLab"""
+
+    def __init__(self, mirror, responses):
+        super().__init__(mirror=mirror, project_id='group/app')
+        self.responses = list(responses)
+        self.windows = []
+
+    async def _list_windows(self, resource, source, windows, key='iid', **filters):
+        self.windows.append(windows)
+        return self.responses.pop(0)
+
+
+def test_sync_fetches_only_past_the_watermark(mirror):
+    tools = RecordingTools(mirror, [
+        [{'iid': 1, 'updated_at': '2024-01-04T00:00:00Z', 'merged_at': '2024-01-03T00:00:00Z'}],
+        [{'iid': 2, 'updated_at': '2024-01-09T00:00:00Z', 'merged_at': '2024-01-08T00:00:00Z'}],
+        [],
+    ])
+    asyncio.run(tools._sync_mirror('merge_requests', 'merge_requests', utc(2024, 1, 1), state='merged'))
+    assert tools.windows[-1] == [{'updated_after': '2024-01-01T00:00:00+00:00'}]
+    assert mirror.get_watermark('group/app', 'merge_requests')['synced_until'] == '2024-01-04T00:00:00Z'
+
+    asyncio.run(tools._sync_mirror('merge_requests', 'merge_requests', utc(2024, 1, 2), state='merged'))
+    assert tools.windows[-1] == [{'updated_after': '2024-01-04T00:00:00Z'}]
+    assert mirror.get_watermark('group/app', 'merge_requests') == {
+        'synced_from': '2024-01-01T00:00:00+00:00', 'synced_until': '2024-01-09T00:00:00Z', 'head': None}
+
+    # An older window fills the gap before the synced range, and nothing new keeps the watermark
+    asyncio.run(tools._sync_mirror('merge_requests', 'merge_requests', utc(2023, 12, 1), state='merged'))
+    assert tools.windows[-1] == [
+        {'updated_after': '2023-12-01T00:00:00+00:00', 'updated_before': '2024-01-01T00:00:00+00:00'},
+        {'updated_after': '2024-01-09T00:00:00Z'},
+    ]
+    assert mirror.get_watermark('group/app', 'merge_requests') == {
+        'synced_from': '2023-12-01T00:00:00+00:00', 'synced_until': '2024-01-09T00:00:00Z', 'head': None}
@@ -0,0 +1,75 @@
+import pytest
+
+from src.agents.rules import RuleClassifier
+
+
+def mr(title='Update things', labels=(), branch='', description=''):
+    return {'title': title, 'labels': list(labels), 'source_branch': branch, 'description': description}
+
+
+@pytest.fixture
+def classifier():
+    return RuleClassifier({})
+
+
+@pytest.mark.parametrize('change, category', [
+    (mr('feat(api): add tokens'), 'features'),
+    (mr('fix: crash on empty list'), 'fixes'),
+    (mr('perf: cache lookups'), 'performance'),
+    (mr('refactor!: drop v1 endpoints'), 'breaking'),
+    (mr('Rework auth', description='BREAKING CHANGE: tokens expire'), 'breaking'),
+    (mr('Update docs', labels=['Documentation']), 'documentation'),
+    (mr('Tidy up', branch='bugfix/null-check'), 'fixes'),
+    (mr('Improve caching', labels=['bug'], branch='feature/cache'), 'fixes'),
+])
+def test_decides_obvious_changes(classifier, change, category):
+    assert classifier.classify_many([change]) == {0: category}
+
+
+@pytest.mark.parametrize('change', [
+    mr('Update dependencies'),
+    mr('chore: bump version'),
+    mr('Mixed change', labels=['bug', 'feature']),
+])
+def test_leaves_ambiguous_changes_to_the_model(classifier, change):
+    assert classifier.classify_many([change]) == {}
+
+
+def test_breaking_label_wins_over_others(classifier):
+    assert classifier.classify_many([mr('Change', labels=['bug', 'breaking'])]) == {0: 'breaking'}
+
+
+def test_stats(classifier):
+    classifier.classify_many([mr('fix: a'), mr('Update b')])
+    assert classifier.get_stats() == {'items': 2, 'resolved': 1, 'resolved_share': 0.5}
+
+
+def test_project_overrides_apply_last():
+    rules = RuleClassifier({
+        'default': {'labels': {'fixes': ['defect']}},
+        'projects': {'group/app': {'labels': {'features': ['bug']}, 'branch_prefixes': {'features': ['story']}}}
+    })
+    changes = [mr('Change', labels=['bug']), mr('Change', labels=['defect']), mr('Change', branch='story/1')]
+    assert rules.classify_many(changes, 'group/app') == {0: 'features', 1: 'fixes', 2: 'features'}
+    # The configured 'fixes' entry replaced the built-in one, so 'bug' is only known to group/app
+    assert rules.classify_many(changes, 'group/other') == {1: 'fixes'}
+
+
+def test_project_category_replaces_default_entry():
+    rules = RuleClassifier({'projects': {'group/app': {'labels': {'features': ['story']}}}})
+    assert rules.classify_many([mr('Change', labels=['enhancement'])], 'group/app') == {}
+    assert rules.classify_many([mr('Change', labels=['story'])], 'group/app') == {0: 'features'}
+
+
+def test_numeric_project_ids_resolve_to_path_overrides():
+    rules = RuleClassifier({'projects': {'group/app': {'labels': {'features': ['bug']}}}})
+    change = mr('Change', labels=['bug'])
+    assert rules.classify_many([change], 42) == {0: 'fixes'}
+    rules.add_project_paths({'42': 'group/app'})
+    assert rules.classify_many([change], 42) == {0: 'features'}
+    assert rules.classify_many([{**change, 'project': '42'}]) == {0: 'features'}
+
+
+def test_overrides_keyed_by_numeric_id():
+    rules = RuleClassifier({'projects': {'42': {'labels': {'documentation': ['bug']}}}})
+    assert rules.classify_many([mr('Change', labels=['bug'])], 42) == {0: 'documentation'}
@@ -0,0 +1,116 @@
+import asyncio
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.tools.scheduler import AdaptiveScheduler, _parse_duration, is_transient, retry_after
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type('Response', (), {'status_code': status_code, 'headers': headers or {}})()
+
+
+class ReadTimeout(TimeoutError):
+    pass
+
+
+@pytest.mark.parametrize('value, seconds', [
+    ('20ms', 0.02),
+    ('1s', 1.0),
+    ('6m0s', 360.0),
+    ('1h2m3.5s', 3723.5),
+])
+def test_parse_duration(value, seconds):
+    assert _parse_duration(value) == pytest.approx(seconds)
+
+
+def test_parse_duration_rejects_garbage():
+    assert _parse_duration('') is None
+    assert _parse_duration('soon') is None
+
+
+def test_retry_after_seconds_and_header_case():
+    assert retry_after({'Retry-After': '7'}) == 7.0
+    assert retry_after({'retry-after': '2.5'}) == 2.5
+    assert retry_after({'Retry-After': '-3'}) == 0.0
+
+
+def test_retry_after_http_date():
+    when = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert retry_after({'Retry-After': format_datetime(when, usegmt=True)}) == pytest.approx(30, abs=2)
+
+
+def test_retry_after_gitlab_reset_only_when_exhausted():
+    reset = str(int(time.time()) + 20)
+    assert retry_after({'RateLimit-Remaining': '0', 'RateLimit-Reset': reset}) == pytest.approx(20, abs=2)
+    assert retry_after({'RateLimit-Remaining': '5', 'RateLimit-Reset': reset}) is None
+
+
+def test_retry_after_openai_reset():
+    headers = {'x-ratelimit-remaining-requests': '3', 'x-ratelimit-reset-requests': '1s',
+               'x-ratelimit-remaining-tokens': '0', 'x-ratelimit-reset-tokens': '250ms'}
+    assert retry_after(headers) == pytest.approx(0.25)
+    assert retry_after({}) is None
+
+
+def test_is_transient():
+    assert is_transient(StatusError(429))
+    assert is_transient(StatusError(503))
+    assert not is_transient(StatusError(404))
+    assert is_transient(ReadTimeout())
+    assert not is_transient(ValueError('bad payload'))
+
+
+def test_window_halves_on_throttle_and_grows_additively():
+    scheduler = AdaptiveScheduler('test', max_concurrency=8, min_concurrency=2, max_retries=0)
+    scheduler._on_throttle()
+    assert scheduler.limit == 4
+    # Rejections within a second of the last decrease are one overload
+    scheduler._on_throttle()
+    assert scheduler.limit == 4
+    scheduler._last_decrease -= 1.0
+    scheduler._on_throttle()
+    assert scheduler.limit == 2
+    scheduler._last_decrease -= 1.0
+    scheduler._on_throttle()
+    assert scheduler.limit == 2
+
+    for _ in range(2):
+        scheduler._on_success()
+    assert scheduler.limit == pytest.approx(2.5 + 1 / 2.5)
+    for _ in range(100):
+        scheduler._on_success()
+    assert scheduler.limit == 8
+    assert scheduler.get_stats()['throttled'] == 4
+
+
+def test_run_retries_transient_failures_after_retry_after():
+    scheduler = AdaptiveScheduler('test', max_concurrency=4, max_retries=2)
+    attempts = []
+
+    async def call():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise StatusError(429, {'Retry-After': '0.05'})
+        return 'ok'
+
+    assert asyncio.run(scheduler.run(call)) == 'ok'
+    assert attempts[1] - attempts[0] >= 0.04
+    assert scheduler.stats['retries'] == 1
+    assert scheduler.limit == pytest.approx(2 + 1 / 2)
+
+
+def test_run_raises_permanent_failures():
+    scheduler = AdaptiveScheduler('test', max_concurrency=4, max_retries=3)
+
+    async def call():
+        raise StatusError(404)
+
+    with pytest.raises(StatusError):
+        asyncio.run(scheduler.run(call))
+    assert scheduler.stats == {'calls': 0, 'retries': 0, 'throttled': 0, 'failures': 1}
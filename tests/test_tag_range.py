@@ -0,0 +1,60 @@
+from src.tools.gitlab_langchain_tools import attribute_commits, first_parent_chain, merged_branch_commits
+
+
+def history(*commits):
+    """{sha: commit} from (sha, parents) pairs, oldest first like a compare response"""
+    return {sha: {'id': sha, 'parent_ids': list(parents)} for sha, parents in commits}
+
+
+# base is the from-tag commit and is not part of the range:
+#
+#   base - s1 ------ m1 ------------ m2      (mainline)
+#      \            /               /
+#       b1 ------ b2 - x ------- c1          (b2 merged by m1; x merges s1 back into the branch)
+#                       \
+#                        s1
+COMMITS = history(
+    ('s1', ['base']),
+    ('b1', ['base']),
+    ('b2', ['b1']),
+    ('m1', ['s1', 'b2']),
+    ('x', ['b2', 's1']),
+    ('c1', ['x']),
+    ('m2', ['m1', 'c1']),
+)
+
+
+def test_first_parent_chain_stays_inside_range():
+    assert first_parent_chain(COMMITS, 'm2') == ['m2', 'm1', 's1']
+
+
+def test_first_parent_chain_of_unknown_head():
+    assert first_parent_chain(COMMITS, 'missing') == []
+
+
+def test_first_parent_chain_survives_cycles():
+    assert first_parent_chain(history(('a', ['b']), ('b', ['a'])), 'a') == ['a', 'b']
+
+
+def test_merged_branch_commits_stop_at_mainline():
+    mainline = set(first_parent_chain(COMMITS, 'm2'))
+    assert merged_branch_commits(COMMITS, 'm1', mainline) == {'b1', 'b2'}
+    # Commits merged back from the mainline are not part of the branch; already merged ones are
+    assert merged_branch_commits(COMMITS, 'm2', mainline) == {'c1', 'x', 'b2', 'b1'}
+
+
+def test_non_merge_commits_bring_in_nothing():
+    mainline = set(first_parent_chain(COMMITS, 'm2'))
+    assert merged_branch_commits(COMMITS, 's1', mainline) == set()
+
+
+def test_commits_belong_to_the_first_merge_that_landed_them():
+    landed = {'s1': {'iid': 3}, 'm1': {'iid': 1}, 'm2': {'iid': 2}}
+    attributed = attribute_commits(COMMITS, first_parent_chain(COMMITS, 'm2'), landed)
+    assert {sha: mr['iid'] for sha, mr in attributed.items()} == {
+        's1': 3, 'm1': 1, 'b1': 1, 'b2': 1, 'm2': 2, 'x': 2, 'c1': 2}
+
+
+def test_unmatched_mainline_commits_stay_unattributed():
+    attributed = attribute_commits(COMMITS, first_parent_chain(COMMITS, 'm2'), {'m2': {'iid': 2}})
+    assert set(attributed) == {'m2', 'c1', 'x', 'b2', 'b1'}